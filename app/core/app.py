@@ -4,17 +4,58 @@ from kivy.uix.screenmanager import ScreenManager
 
 from kivymd.app import MDApp
 
+from app.core.boot import BootSequence
 from app.core.router import AppRouter
+from app.services.app_lock import AppLock
+from app.services.calendar_index import CalendarIndex
+from app.services.diary_repository import DiaryRepository
+from app.services.entry_crypto import EntryCipher
+from app.services.entry_journal import EntryJournal
+from app.services.search_index import SearchIndex
 from app.services.settings_service import SettingsService
+from app.ui.text_cache import texture_cache
 
 class DiaryApp(MDApp):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         # Initialize
+        self.boot = BootSequence()
         self.sm = ScreenManager()
         self.router = AppRouter(self.sm)
-        self.settings_service = SettingsService()
+        
+        # Navigation goes through the lock screen while locked
+        self.app_lock = AppLock()
+        self.router.lock_guard = self.app_lock.is_locked
+        self.app_lock.lock_listeners.append(self.router.show_lock)
+        
+        # Fonts are loaded in a later boot stage
+        self.settings_service = SettingsService(defer_fonts=True)
+        
+        # Cached label textures have the old colors and fonts baked in
+        # (a re-imported font may even reuse its name)
+        self.settings_service.appearance_listeners.append(texture_cache.clear)
+        
+        # Opens its database lazily on a worker thread
+        self.diary_repository = DiaryRepository()
+        self.search_index = SearchIndex(self.diary_repository)
+        self.calendar_index = CalendarIndex(self.diary_repository)
+        
+        # Entries are encrypted while the app lock is on; decrypted text
+        # only lives in memory during an unlocked session, and nothing is
+        # written while locked
+        if self.app_lock.enabled:
+            self.diary_repository.lock()
+        self.app_lock.unlock_listeners.append(
+            lambda key: self.diary_repository.set_cipher(EntryCipher(key))
+        )
+        self.app_lock.lock_listeners.append(self.diary_repository.lock)
+        self.app_lock.lock_listeners.append(texture_cache.clear)
+        
+        # Editor autosave; a journal left by a crash is replayed at boot,
+        # or after unlock if it is encrypted
+        self.entry_journal = EntryJournal(self.diary_repository)
+        self.app_lock.unlock_listeners.append(lambda key: self.entry_journal.recover())
                
 
     def build(self):
@@ -25,11 +66,29 @@ class DiaryApp(MDApp):
         Window.bind(on_keyboard=self._on_back)
         Window.fullscreen = True
         
-        self.router.register_screens()
+        # Staged boot: main screen shell first, then everything else
+        self.boot.add_stage("main_screen", self.router.register_screens)
+        self.boot.add_stage("fonts", self.settings_service.load_fonts, interactive=True)
+        self.boot.add_stage("prewarm_editor", self.router.prewarm)
+        self.boot.add_stage("entry_journal", self.entry_journal.recover)
         return self.sm
         
     def on_start(self):
-        pass
+        self.boot.start()
+        
+    # Persist pending settings before Android may kill the app, and lock
+    # so the app comes back (and shows in the app switcher) locked
+    def on_pause(self):
+        self.settings_service.flush(wait=True)
+        self.entry_journal.flush(wait=True)
+        self.app_lock.lock()
+        return True
+        
+    def on_stop(self):
+        self.settings_service.flush(wait=True)
+        self.entry_journal.flush()
+        self.entry_journal.close().result()
+        self.diary_repository.close()
         
     # Listens to back or esc fires
     def _on_back(self, window, key, *args):
@@ -0,0 +1,83 @@
+import time
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.logger import Logger
+
+
+# Runs startup work in stages, one stage per frame, so the first frame is
+# drawn as early as possible and heavy work never blocks it.
+#
+# Each stage is scheduled for the next frame once the previous one has
+# finished, instead of relying on fixed delays. Milestones are recorded in
+# `timeline` as (label, seconds since the sequence was created):
+#   "first_frame"  first frame flipped after the first stage ran
+#   "interactive"  the stage marked interactive=True finished
+#   "<stage>"      each stage as it finishes
+class BootSequence:
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.timeline = []
+        self.stages = []
+        self.done = False
+        self._index = 0
+
+
+    # Adds a stage. Stages run in the order they were added.
+    # :param interactive: the app is usable once this stage has run
+    def add_stage(self, name, callback, *, interactive=False):
+        self.stages.append((name, callback, interactive))
+        return self
+
+
+    def start(self):
+        self.mark("boot_start")
+        self._schedule_next()
+
+
+    # Records a milestone relative to start_time
+    def mark(self, label, note=""):
+        elapsed = time.perf_counter() - self.start_time
+        self.timeline.append((label, elapsed))
+        Logger.info(f"Boot: {label} at {elapsed * 1000:.1f} ms {note}".rstrip())
+
+
+    # Returns the time of a milestone in seconds, or None
+    def get(self, label):
+        return next((t for name, t in self.timeline if name == label), None)
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _schedule_next(self):
+        Clock.schedule_once(self._run_stage, 0)
+
+
+    def _on_flip(self, *args):
+        Window.unbind(on_flip=self._on_flip)
+        self.mark("first_frame")
+
+
+    def _run_stage(self, dt):
+        if self._index >= len(self.stages):
+            self.done = True
+            self.mark("boot_done")
+            return
+
+        name, callback, interactive = self.stages[self._index]
+        self._index += 1
+
+        start = time.perf_counter()
+        callback()
+        self.mark(name, f"(took {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+        # The first stage puts something on screen; note when it is shown
+        if self._index == 1:
+            Window.bind(on_flip=self._on_flip)
+
+        if interactive:
+            self.mark("interactive")
+
+        self._schedule_next()
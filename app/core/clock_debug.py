@@ -0,0 +1,29 @@
+from collections import Counter
+
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen
+
+
+# Counts scheduled Clock callbacks per screen to catch polling loops.
+# Returns {screen_name: {"once": n, "interval": n}}; callbacks not owned by
+# a widget inside a screen are counted under "<app>".
+def clock_callbacks_by_screen() -> dict[str, Counter]:
+    counts = {}
+
+    for event in Clock.get_events():
+        callback = event.get_callback()
+        if callback is None:
+            continue
+
+        owner = getattr(callback, "__self__", None)
+        screen_name = "<app>"
+        while owner is not None:
+            if isinstance(owner, Screen):
+                screen_name = owner.name
+                break
+            owner = getattr(owner, "parent", None)
+
+        kind = "interval" if event.loop else "once"
+        counts.setdefault(screen_name, Counter())[kind] += 1
+
+    return counts
@@ -1,26 +1,82 @@
+import time
+from collections import OrderedDict
+from importlib import import_module
+
 from kivy.clock import Clock
+from kivy.logger import Logger, LOG_LEVELS
+
+from app.core.clock_debug import clock_callbacks_by_screen
+
+# Maximum number of constructed screens kept alive (pinned screens included)
+MAX_CACHED_SCREENS = 4
 
-from app.ui.screens.main_screen import MainScreen
+LOCK_SCREEN = "lock_screen"
+ENTRY_EDITOR = "entry_editor_screen"
+
+# Screens built ahead of first navigation: only the likely next one. The
+# rest are built when first opened.
+PREWARM_SCREENS = (ENTRY_EDITOR,)
 
-#Settings
-from app.ui.screens.theme_and_style import ThemeAndStyleScreen
 
 class AppRouter:
     def __init__(self, screen_manager):
         self.sm = screen_manager
         self.backstack = []
         self.ui_state = {}
+        
+        # Screen registry: screens are built on first navigation.
+        # Classes are given as "module:Class" so a screen's module (and the
+        # KV rules it loads at import) is only imported when first needed.
+        self.screen_classes = {
+            "main_screen": "app.ui.screens.main_screen:MainScreen",
+            LOCK_SCREEN: "app.ui.screens.lock_screen:LockScreen",
+            ENTRY_EDITOR: "app.ui.screens.entry_editor:EntryEditorScreen",
+            
+            #Settings
+            "theme_and_style_screen": "app.ui.screens.theme_and_style:ThemeAndStyleScreen",
+        }
+        self.pinned = {"main_screen", LOCK_SCREEN}
+        self.max_cached = MAX_CACHED_SCREENS
+        self._lru = OrderedDict()
+        self._prewarm_queue = []
+        
+        # Returns True while navigation must go through the lock screen
+        self.lock_guard = None
+        # Screen covered by the lock screen, and a navigation held until
+        # unlock as (screen_name, replace)
+        self._locked_from = None
+        self._after_unlock = None
+        
+        # Navigation timings per screen:
+        # {name: {"constructed": n, "reused": n, "construct_ms": t, "reuse_ms": t}}
+        self.nav_stats = {}
 
 
+    # Adds the main screen shell; called once the window exists
     def register_screens(self):
-        # Delay adding screens by 1 second to avoid FBO issues
-        Clock.schedule_once(self._add_screens, 1)
+        self._add_screens()
+        if self._is_locked():
+            self.show_lock()
+        
+        
+    # Builds screens ahead of first navigation so it feels instant, one
+    # per frame so no single frame pays for them all
+    def prewarm(self, *names):
+        self._prewarm_queue.extend(names or PREWARM_SCREENS)
+        Clock.schedule_once(self._prewarm_next, 0)
 
 
     # Navigate to another screen.
     # :param replace: if True, does not push current screen to back stack
     def go_to(self, screen_name, *, replace=False):
+        # Held until unlocked; the lock screen then continues here
+        if self._is_locked() and screen_name != LOCK_SCREEN:
+            self._after_unlock = (screen_name, replace)
+            self.show_lock()
+            return
+
         current = self.sm.current
+        self.get_screen(screen_name)
 
         if not replace and current != screen_name:
             self.backstack.append({
@@ -30,11 +86,55 @@ class AppRouter:
 
         self.sm.transition.direction = "left"
         self.sm.current = screen_name
+        
+        # Surface polling loops while debugging
+        if Logger.isEnabledFor(LOG_LEVELS["debug"]):
+            Logger.debug(f"Router: clock callbacks {clock_callbacks_by_screen()}")
+
+
+    # Covers the current screen with the lock screen. Screens stay built
+    # and cached underneath; unlocked() returns to where the user was.
+    def show_lock(self):
+        screen = self.get_screen(LOCK_SCREEN)
+        
+        # Already shown, possibly for setting a new passcode
+        if self.sm.current == LOCK_SCREEN:
+            if screen.mode != "unlock":
+                screen.mode = "unlock"
+                screen.on_pre_enter()
+            return
+        
+        screen.mode = "unlock"
+        self._locked_from = self.sm.current
+        self.sm.transition.direction = "up"
+        self.sm.current = LOCK_SCREEN
+        
+        
+    # Called by the lock screen after a successful unlock. Finishes the
+    # navigation that was held, as if it had never been interrupted.
+    def unlocked(self):
+        origin = self._locked_from or "main_screen"
+        target, replace = self._after_unlock or (origin, True)
+        self._locked_from = self._after_unlock = None
+        
+        if not replace and target != origin and self.sm.has_screen(origin):
+            self.backstack.append({
+                "screen": origin,
+                "state": self._capture_screen_state(origin)
+            })
+        
+        self.get_screen(target)
+        self.sm.transition.direction = "down"
+        self.sm.current = target
 
 
     # Handles back navigation.
-    # :param reload_all: If True, reload all screens before restoring previous
-    def on_back(self, reload_all=False):
+    def on_back(self):
+        # Nothing behind the lock screen may be reached with back; the key
+        # is consumed so Kivy doesn't close the app either
+        if self.sm.current == LOCK_SCREEN and self._is_locked():
+            return True
+        
         # If drawer / modal is open → close first
         if self._close_overlays():
             return True
@@ -57,15 +157,16 @@ class AppRouter:
                 main_screen = self.sm.get_screen("main_screen")
                 self.ui_state["main_screen_tab"] = main_screen.get_active_tab()
             
-            # Reload all screens if flag is set
-            if reload_all:
-                Clock.schedule_once(self._add_screens, 0.3)
             return True
 
         # Nothing to go back to → allow app exit
         return False
 
 
+    def _is_locked(self):
+        return bool(self.lock_guard and self.lock_guard())
+
+
     # Returns a dictionary with current UI state for the screen
     def _capture_screen_state(self, screen_name):
         screen = self.sm.get_screen(screen_name)
@@ -77,33 +178,78 @@ class AppRouter:
 
     # Restores previously captured UI state.
     def _restore_screen_state(self, screen_name, state):
-        screen = self.sm.get_screen(screen_name)
+        screen = self.get_screen(screen_name)
         if screen_name == "main_screen" and state:
             tab_name = state.get("tab_name")
             if tab_name:
                 screen.set_active_tab(tab_name)
 
 
-    # Adds all screens to screen manager
-    def _add_screens(self, dt=0):
-        screens = {
-            "main_screen": MainScreen,
-            "theme_and_style_screen": ThemeAndStyleScreen,
-        }
+    # Returns a screen, constructing and adding it on first use
+    def get_screen(self, name):
+        start = time.perf_counter()
+        stats = self.nav_stats.setdefault(name, {
+            "constructed": 0, "reused": 0, "construct_ms": None, "reuse_ms": None
+        })
+        
+        if self.sm.has_screen(name):
+            screen = self.sm.get_screen(name)
+            if name in self._lru:
+                self._lru.move_to_end(name)
+            stats["reused"] += 1
+            stats["reuse_ms"] = (time.perf_counter() - start) * 1000
+            return screen
+        
+        screen = self._resolve_screen_class(name)(name=name)
+        self.sm.add_widget(screen)
+        self._lru[name] = True
+        self._evict()
+        
+        stats["constructed"] += 1
+        stats["construct_ms"] = (time.perf_counter() - start) * 1000
+        return screen
+    
+    
+    def _prewarm_next(self, dt):
+        if not self._prewarm_queue:
+            return
+        name = self._prewarm_queue.pop(0)
+        if not self.sm.has_screen(name):
+            self.get_screen(name)
+        if self._prewarm_queue:
+            Clock.schedule_once(self._prewarm_next, 0)
+    
     
-        # Remove old screens
-        for name in screens:
+    # Imports the screen class on first use
+    def _resolve_screen_class(self, name):
+        cls = self.screen_classes[name]
+        if isinstance(cls, str):
+            module_name, class_name = cls.split(":")
+            cls = getattr(import_module(module_name), class_name)
+            self.screen_classes[name] = cls
+        return cls
+    
+    
+    # Removes least recently used screens beyond max_cached
+    def _evict(self):
+        for name in list(self._lru):
+            if len(self._lru) <= self.max_cached:
+                break
+            if name in self.pinned or name == self.sm.current:
+                continue
+            
+            del self._lru[name]
             if self.sm.has_screen(name):
                 self.sm.remove_widget(self.sm.get_screen(name))
     
-        # Add new instances dynamically
-        for name, cls in screens.items():
-            self.sm.add_widget(cls(name=name))
+    
+    # Adds the initial screen to screen manager
+    def _add_screens(self, dt=0):
+        main = self.get_screen("main_screen")
             
         # Restore main screen tab if available
         tab_name = self.ui_state.get("main_screen_tab")
-        if tab_name and self.sm.has_screen("main_screen"):
-            main = self.sm.get_screen("main_screen")
+        if tab_name:
             Clock.schedule_once(lambda dt: main.set_active_tab(tab_name), 0)            
                          
         # initial screen
@@ -0,0 +1,263 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from app.services.io_utils import write_json_atomic
+
+
+# scrypt cost: 128 * N * r bytes = 16 MB of memory per derivation
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Used instead when Python's OpenSSL build has no scrypt
+PBKDF2_ITERATIONS = 600_000
+
+SALT_SIZE = 16
+KEY_SIZE = 32
+
+# Seconds an unlocked session stays valid without activity (see touch());
+# 0 keeps it until the app is paused
+DEFAULT_SESSION_TIMEOUT = 300
+
+
+# Derives KEY_SIZE bytes of key followed by KEY_SIZE bytes of verifier.
+# Slow on purpose: only ever call from a worker thread.
+def derive_key(passcode: str, config: dict) -> bytes:
+    salt = bytes.fromhex(config["salt"])
+    if config["kdf"] == "scrypt":
+        return hashlib.scrypt(
+            passcode.encode("utf-8"), salt=salt,
+            n=config["n"], r=config["r"], p=config["p"],
+            maxmem=256 * config["n"] * config["r"], dklen=2 * KEY_SIZE
+        )
+    return hashlib.pbkdf2_hmac(
+        "sha256", passcode.encode("utf-8"), salt, config["iterations"], dklen=2 * KEY_SIZE
+    )
+
+
+# KDF settings for a new passcode, with a fresh salt
+def new_kdf_config() -> dict:
+    salt = os.urandom(SALT_SIZE).hex()
+    if hasattr(hashlib, "scrypt"):
+        return {"kdf": "scrypt", "n": SCRYPT_N, "r": SCRYPT_R, "p": SCRYPT_P, "salt": salt}
+    return {"kdf": "pbkdf2_sha256", "iterations": PBKDF2_ITERATIONS, "salt": salt}
+
+
+# Passcode lock for the whole app.
+#
+# The passcode is never stored: only the KDF settings and a verifier (the
+# second half of the derived bytes). Key derivation is memory-hard and runs
+# on a worker thread; results come back on the main thread via Clock, so
+# the lock screen keeps animating while it works.
+#
+# Entries are encrypted with a random data key, stored wrapped (XORed) with
+# the derived key, so changing the passcode never re-encrypts the diary.
+# A successful unlock caches the data key for session_timeout seconds, so
+# navigating around never re-derives it, and passes it to
+# unlock_listeners. Activity reported with touch() (e.g. typing) keeps the
+# session alive. lock() wipes it (called on pause and when the session
+# expires) and notifies lock_listeners.
+class AppLock:
+    def __init__(self, path: str = "app/data/app_lock.json"):
+        self.path = path
+        self.config = self._load()
+        self.lock_listeners = []
+        self.unlock_listeners = []
+
+        # Timings of the last unlock attempt, in ms
+        self.unlock_stats = {"attempts": 0, "unlock_ms": None, "kdf_ms": None}
+
+        self._key = None
+        self._expire_event = None
+        self._last_activity = 0.0
+
+
+    @property
+    def enabled(self) -> bool:
+        return "verifier" in self.config
+
+
+    @property
+    def session_timeout(self) -> int:
+        return self.config.get("session_timeout", DEFAULT_SESSION_TIMEOUT)
+
+
+    # Data key of the current session, or None while locked
+    @property
+    def key(self) -> bytes | None:
+        return bytes(self._key) if self._key else None
+
+
+    def is_locked(self) -> bool:
+        return self.enabled and self._key is None
+
+
+    # Checks a passcode in the background; callback(ok) runs on the main thread
+    def unlock(self, passcode: str, callback) -> None:
+        start = time.perf_counter()
+        config = dict(self.config)
+
+        def work():
+            kdf_start = time.perf_counter()
+            derived = derive_key(passcode, config)
+            kdf_ms = (time.perf_counter() - kdf_start) * 1000
+
+            ok = hmac.compare_digest(derived[KEY_SIZE:], bytes.fromhex(config["verifier"]))
+            key = self._unwrap(derived, config) if ok else None
+            Clock.schedule_once(lambda dt: self._unlock_done(key, start, kdf_ms, callback))
+
+        threading.Thread(target=work, daemon=True).start()
+
+
+    # Sets or changes the passcode; callback() runs on the main thread
+    # once it is saved. The new session starts unlocked. Changing it needs
+    # an unlocked session, whose data key is kept.
+    def set_passcode(self, passcode: str, callback=None) -> None:
+        if self.is_locked():
+            raise RuntimeError("Unlock before changing the passcode")
+
+        config = new_kdf_config()
+        config["session_timeout"] = self.session_timeout
+        data_key = self.key or os.urandom(KEY_SIZE)
+
+        def work():
+            derived = derive_key(passcode, config)
+            config["verifier"] = derived[KEY_SIZE:].hex()
+            config["wrapped_key"] = _xor_key(data_key, derived[:KEY_SIZE]).hex()
+            self._save(config)
+
+            def done(dt):
+                self.config = config
+                self._start_session(data_key)
+                if callback:
+                    callback()
+
+            Clock.schedule_once(done)
+
+        threading.Thread(target=work, daemon=True).start()
+
+
+    # Turns the lock off
+    def disable(self) -> None:
+        self._wipe()
+        self.config = {"session_timeout": self.session_timeout}
+        self._save(self.config)
+
+
+    def set_session_timeout(self, seconds: int) -> None:
+        self.config["session_timeout"] = seconds
+        self._save(self.config)
+        if self._key:
+            self._schedule_expiry()
+
+
+    # Marks the session as in use, so it expires session_timeout seconds
+    # after the last activity. Cheap enough to call per keystroke: only a
+    # timestamp is kept, checked when the expiry event fires.
+    def touch(self) -> None:
+        self._last_activity = time.monotonic()
+
+
+    # Wipes the cached key and shows the lock screen (via lock_listeners)
+    def lock(self) -> None:
+        if not self.enabled:
+            return
+
+        self._wipe()
+        for listener in self.lock_listeners:
+            listener()
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _unlock_done(self, key: bytes | None, start: float, kdf_ms: float, callback) -> None:
+        ok = key is not None
+        unlock_ms = (time.perf_counter() - start) * 1000
+        self.unlock_stats["attempts"] += 1
+        self.unlock_stats["unlock_ms"] = unlock_ms
+        self.unlock_stats["kdf_ms"] = kdf_ms
+        Logger.info(
+            f"AppLock: {'unlocked' if ok else 'wrong passcode'} in {unlock_ms:.0f} ms "
+            f"(key derivation {kdf_ms:.0f} ms)"
+        )
+
+        if ok:
+            self._start_session(key)
+        callback(ok)
+
+
+    # Data key from a correct derivation
+    def _unwrap(self, derived: bytes, config: dict) -> bytes:
+        return _xor_key(bytes.fromhex(config["wrapped_key"]), derived[:KEY_SIZE])
+
+
+    def _start_session(self, key: bytes) -> None:
+        self._wipe()
+        self._key = bytearray(key)
+        self._schedule_expiry()
+        for listener in self.unlock_listeners:
+            listener(bytes(self._key))
+
+
+    def _schedule_expiry(self) -> None:
+        if self._expire_event:
+            self._expire_event.cancel()
+            self._expire_event = None
+        self._last_activity = time.monotonic()
+        if self.session_timeout > 0:
+            self._expire_event = Clock.schedule_once(self._expire, self.session_timeout)
+
+
+    # Locks, unless there was activity since; then waits out the rest of
+    # the timeout from the last activity
+    def _expire(self, dt) -> None:
+        self._expire_event = None
+        idle = time.monotonic() - self._last_activity
+        if idle < self.session_timeout:
+            self._expire_event = Clock.schedule_once(self._expire, self.session_timeout - idle)
+        else:
+            self.lock()
+
+
+    # Overwrites the key in place; Python may still hold copies handed out
+    # by `key`, so this is best effort
+    def _wipe(self) -> None:
+        if self._expire_event:
+            self._expire_event.cancel()
+            self._expire_event = None
+        if self._key:
+            for index in range(len(self._key)):
+                self._key[index] = 0
+        self._key = None
+
+
+    def _load(self) -> dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    return json.load(file)
+            except (OSError, ValueError):
+                print(f"Warning: Failed to parse JSON file:  {self.path}")
+        return {}
+
+
+    def _save(self, config: dict) -> None:
+        try:
+            write_json_atomic(self.path, config)
+        except OSError as e:
+            print(f"Warning: Failed to save app lock: {e}")
+
+
+# Each derived key wraps one data key only (new salt per passcode), so a
+# plain XOR is a one-time pad
+def _xor_key(key: bytes, pad: bytes) -> bytes:
+    return bytes(a ^ b for a, b in zip(key, pad))
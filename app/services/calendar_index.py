@@ -0,0 +1,133 @@
+import sqlite3
+from collections import OrderedDict
+
+from kivy.clock import Clock
+
+from app.services.diary_repository import DiaryRepository
+
+
+# Months kept in memory
+MAX_CACHED_MONTHS = 24
+
+
+# Serves per-day aggregates for whole months from the day_stats table.
+#
+# One query loads a month; results are cached, and the months either side
+# of the requested one are prefetched in the background so swiping never
+# waits on the database. Writes invalidate the cache.
+#
+# A month is {day_of_month: {"entry_count", "word_count", "mood_bits", "tag_bits"}}
+# with only the days that have entries.
+class CalendarIndex:
+    def __init__(self, repository: DiaryRepository):
+        self.repository = repository
+        self.repository.write_hooks.append(self._on_write)
+        self.repository.bulk_insert_hooks.append(lambda conn, first_id: self._on_write(conn, [], []))
+        self._months = OrderedDict()
+        self._pending = {}
+        
+        # Called on the main thread after writes invalidated the cache
+        self.change_listeners = []
+
+
+    # Calls callback(month_stats) on the main thread. Cached months are
+    # delivered immediately, without a database round trip.
+    def get_month(self, year: int, month: int, callback) -> None:
+        key = month_key(year, month)
+
+        if key in self._months:
+            self._months.move_to_end(key)
+            callback(self._months[key])
+        else:
+            self._load(key, callback)
+
+        # Prefetch neighbours for the next swipe
+        for neighbour in (add_months(year, month, -1), add_months(year, month, 1)):
+            neighbour_key = month_key(*neighbour)
+            if neighbour_key not in self._months:
+                self._load(neighbour_key)
+
+
+    # Returns a cached month or None
+    def peek_month(self, year: int, month: int) -> dict | None:
+        return self._months.get(month_key(year, month))
+
+
+    def clear(self) -> None:
+        self._months.clear()
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    # Loads a month once, no matter how many callers ask for it meanwhile
+    def _load(self, key: str, callback=None) -> None:
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            if callback:
+                callbacks.append(callback)
+            return
+
+        def query(conn):
+            try:
+                return self._query_month(conn, key)
+            except Exception as e:
+                print(f"Warning: Calendar month {key} failed: {e}")
+                return None
+
+        self._pending[key] = [callback] if callback else []
+        self.repository.submit(query, lambda stats: self._loaded(key, stats))
+
+
+    # A failed month (stats None) is shown empty and not cached, so the
+    # next request queries it again
+    def _loaded(self, key: str, stats: dict | None) -> None:
+        if stats is not None:
+            self._months[key] = stats
+            self._months.move_to_end(key)
+            while len(self._months) > MAX_CACHED_MONTHS:
+                self._months.popitem(last=False)
+
+        for callback in self._pending.pop(key, []):
+            callback(stats if stats is not None else {})
+
+
+    # Worker thread: one indexed query per month
+    def _query_month(self, conn: sqlite3.Connection, key: str) -> dict:
+        rows = conn.execute(
+            "SELECT day, entry_count, word_count, mood_bits, tag_bits "
+            "FROM day_stats WHERE month = ?",
+            (key,)
+        )
+        return {
+            int(row["day"][8:10]): {
+                "entry_count": row["entry_count"],
+                "word_count": row["word_count"],
+                "mood_bits": row["mood_bits"],
+                "tag_bits": row["tag_bits"],
+            }
+            for row in rows
+        }
+
+
+    # Worker thread: drops cached months after a write. An update may move
+    # an entry between months and the old date isn't known here, so the
+    # whole cache goes; the visible month reloads with a single query.
+    def _on_write(self, conn, saved: list[dict], deleted_ids: list[int]) -> None:
+        Clock.schedule_once(lambda dt: self._invalidate())
+
+
+    def _invalidate(self) -> None:
+        self.clear()
+        for listener in self.change_listeners:
+            listener()
+
+
+def month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def add_months(year: int, month: int, delta: int) -> tuple[int, int]:
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
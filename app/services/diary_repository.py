@@ -0,0 +1,689 @@
+import hashlib
+import itertools
+import os
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+
+# Characters of body returned as "preview" by list queries
+PREVIEW_LENGTH = 200
+
+# Bitwise OR of the tags column over a group, in built-in SQL only so the
+# triggers using it work in any SQLite client: MAX(tags & bit) is bit if
+# any row has it. The sign bit is set if any value is negative.
+TAGS_OR = " | ".join(
+    [f"MAX(tags & {1 << bit})" for bit in range(63)] + ["(MIN(tags) < 0) * (1 << 63)"]
+)
+
+# Aggregates one day_stats row per entry_date; callers add WHERE / GROUP BY.
+# Mood bits are distinct powers of two, so their sum is their OR.
+DAY_STATS_SELECT = f"""
+        entry_date, substr(entry_date, 1, 7), COUNT(*), SUM(word_count),
+        COALESCE(SUM(DISTINCT CASE WHEN mood > 0 THEN 1 << mood ELSE 0 END), 0), {TAGS_OR}
+        FROM entries
+    """
+
+# The day_stats triggers; bulk imports pause the insert trigger by adding a
+# row to bulk_load
+DAY_STATS_TRIGGERS = f"""
+    CREATE TRIGGER entries_day_stats_insert AFTER INSERT ON entries
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+        DELETE FROM day_stats WHERE day = NEW.entry_date;
+        INSERT INTO day_stats SELECT {DAY_STATS_SELECT} WHERE entry_date = NEW.entry_date GROUP BY entry_date;
+    END;
+    CREATE TRIGGER entries_day_stats_update
+    AFTER UPDATE OF entry_date, word_count, mood, tags ON entries BEGIN
+        DELETE FROM day_stats WHERE day IN (OLD.entry_date, NEW.entry_date);
+        INSERT INTO day_stats SELECT {DAY_STATS_SELECT}
+            WHERE entry_date IN (OLD.entry_date, NEW.entry_date) GROUP BY entry_date;
+    END;
+    CREATE TRIGGER entries_day_stats_delete AFTER DELETE ON entries BEGIN
+        DELETE FROM day_stats WHERE day = OLD.entry_date;
+        INSERT INTO day_stats SELECT {DAY_STATS_SELECT} WHERE entry_date = OLD.entry_date GROUP BY entry_date;
+    END;
+"""
+
+# Each entry upgrades the schema by one version (PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE entries (
+        id INTEGER PRIMARY KEY,
+        entry_date TEXT NOT NULL,
+        title TEXT NOT NULL DEFAULT '',
+        body TEXT NOT NULL DEFAULT '',
+        created_at REAL NOT NULL,
+        modified_at REAL NOT NULL
+    );
+    CREATE INDEX idx_entries_date ON entries(entry_date, id);
+    CREATE INDEX idx_entries_modified ON entries(modified_at);
+    """,
+    # Full-text index, kept in sync by SearchIndex's write hook
+    """
+    CREATE VIRTUAL TABLE entries_fts USING fts5(
+        title, body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+    INSERT INTO entries_fts (rowid, title, body) SELECT id, title, body FROM entries;
+    """,
+    # Per-day aggregates for the calendar, maintained by triggers in
+    # built-in SQL so other SQLite clients (the sqlite3 shell, backup
+    # tools) can write entries too. Bulk imports pause the insert trigger
+    # with a bulk_load row and rebuild the touched days once at the end.
+    f"""
+    ALTER TABLE entries ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE entries ADD COLUMN mood INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE entries ADD COLUMN tags INTEGER NOT NULL DEFAULT 0;
+    UPDATE entries SET word_count = word_count(body);
+
+    CREATE TABLE day_stats (
+        day TEXT PRIMARY KEY,
+        month TEXT NOT NULL,
+        entry_count INTEGER NOT NULL,
+        word_count INTEGER NOT NULL,
+        mood_bits INTEGER NOT NULL,
+        tag_bits INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX idx_day_stats_month ON day_stats(month);
+    CREATE TABLE bulk_load (first_id INTEGER NOT NULL);
+    {DAY_STATS_TRIGGERS}
+    INSERT INTO day_stats SELECT {DAY_STATS_SELECT} GROUP BY entry_date;
+    """,
+    # Content hashes for import dedupe
+    """
+    ALTER TABLE entries ADD COLUMN content_hash BLOB;
+    UPDATE entries SET content_hash = content_hash(entry_date, title, body);
+    CREATE INDEX idx_entries_hash ON entries(content_hash);
+    """,
+    # Encrypted entries (see EntryCipher): title and body hold sealed blobs,
+    # sealed_preview the first PREVIEW_LENGTH characters; NULL nonce = plain
+    """
+    ALTER TABLE entries ADD COLUMN nonce BLOB;
+    ALTER TABLE entries ADD COLUMN sealed_preview BLOB;
+    """,
+]
+
+# Rows re-encrypted (or decrypted) per transaction when the lock changes
+RESEAL_BATCH_SIZE = 500
+
+# SQLite's default limit on "?" parameters per statement is 999
+MAX_QUERY_PARAMS = 500
+
+INSERT_SQL = (
+    "INSERT INTO entries (entry_date, title, body, sealed_preview, nonce, word_count, mood, "
+    "tags, content_hash, created_at, modified_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+LIST_COLUMNS = f"""
+    id, entry_date, title,
+    CASE WHEN nonce IS NULL THEN substr(body, 1, {PREVIEW_LENGTH}) ELSE sealed_preview END AS preview,
+    nonce, word_count, mood, tags, created_at, modified_at
+"""
+
+
+# Raised by writes of entry text while an encrypted diary is locked
+class DiaryLocked(RuntimeError):
+    pass
+
+
+# Identifies an entry by what it says, for skipping duplicates on import
+def content_hash(entry_date: str, title: str, body: str) -> bytes:
+    return hashlib.blake2b(_hash_text(entry_date, title, body), digest_size=16).digest()
+
+
+# Words in an entry's body, as stored in word_count
+def word_count(body: str) -> int:
+    return len((body or "").split())
+
+
+def _hash_text(entry_date: str, title: str, body: str) -> bytes:
+    return "\x1f".join((entry_date, title or "", body or "")).encode("utf-8")
+
+
+# Stores diary entries in SQLite (WAL mode).
+#
+# All queries run on a single worker thread that owns the connection, so
+# the Kivy main thread never waits on disk. Every public method returns a
+# Future; if `callback` is given it is called with the result on the main
+# thread via Clock. Blocking callers (benchmarks, import/export workers)
+# can use `.result()` on the Future instead.
+#
+# Entries are plain dicts:
+#   {"id", "entry_date" (YYYY-MM-DD), "title", "body", "mood" (0 = none, 1..7),
+#    "tags" (bitmask), "word_count", "created_at", "modified_at"}
+# List queries return "preview" (first PREVIEW_LENGTH chars) instead of "body".
+#
+# With a cipher set (diary unlocked with app lock on), text is stored
+# encrypted. Full entries from get_entry() and iter_entries() come back
+# decrypted; list rows keep "title" and "preview" sealed (with their
+# "nonce") so only the rows actually shown are decrypted, via reveal().
+# While locked (lock()) there is no cipher and writes of entry text raise
+# DiaryLocked, so nothing is ever stored in plain text meanwhile.
+#
+# write_hooks are called on the worker thread inside each write transaction
+# as hook(conn, saved_entries, deleted_ids), for indexes that must stay in
+# sync with the entries table. Bulk imports skip them and instead call
+# bulk_insert_hooks once at the end as hook(conn, first_id), to index every
+# entry with id >= first_id in one pass.
+class DiaryRepository:
+    def __init__(self, db_path: str = "app/data/diary.db"):
+        self.db_path = db_path
+        self.write_hooks = []
+        self.bulk_insert_hooks = []
+        self.cipher = None
+        self.locked = False
+        self._unseal_cipher = None
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diary-db")
+
+
+    #-----------------------------
+    # WRITES
+    #-----------------------------
+
+    # Inserts an entry (no "id") or updates it. Result: the saved entry.
+    def save_entry(self, entry: dict, callback=None) -> Future:
+        return self.submit(lambda conn: self._save_entries(conn, [entry])[0], callback)
+
+
+    # Saves many entries in one transaction. Result: the saved entries.
+    def save_entries(self, entries: list[dict], callback=None) -> Future:
+        return self.submit(lambda conn: self._save_entries(conn, entries), callback)
+
+
+    # Result: True if the entry existed
+    def delete_entry(self, entry_id: int, callback=None) -> Future:
+        return self.submit(lambda conn: self._delete_entries(conn, [entry_id]) > 0, callback)
+
+
+    # Inserts entries from any iterable in transactions of batch_size,
+    # skipping entries whose content is already stored (or repeated in the
+    # import). Per-row index maintenance is deferred: day_stats and the
+    # bulk_insert_hooks are updated once, after the last batch, even if the
+    # import fails or is cancelled part way.
+    # Blocks like iter_entries(): call from a worker thread.
+    # :param on_batch: called as on_batch(stats) after each batch; raise to stop
+    # Returns {"imported", "duplicates"}
+    def import_entries(self, entries, batch_size: int = 1000, on_batch=None) -> dict:
+        stats = {"imported": 0, "duplicates": 0}
+        seen = set()
+        entries = iter(entries)
+
+        first_id = self.submit(self._begin_bulk).result()
+        try:
+            while batch := list(itertools.islice(entries, batch_size)):
+                imported = self.submit(
+                    lambda conn, batch=batch: self._insert_batch(conn, batch, seen)
+                ).result()
+                stats["imported"] += imported
+                stats["duplicates"] += len(batch) - imported
+                if on_batch:
+                    on_batch(stats)
+        finally:
+            self.submit(lambda conn: self._end_bulk(conn, first_id)).result()
+
+        return stats
+
+
+    #-----------------------------
+    # READS
+    #-----------------------------
+
+    # Result: the full entry (with body) or None
+    def get_entry(self, entry_id: int, callback=None) -> Future:
+        def query(conn):
+            row = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+            return self.open_row(row) if row else None
+
+        return self.submit(query, callback)
+
+
+    # Result: the id of a stored entry with the same date, title and body,
+    # or None
+    def find_entry(self, entry: dict, callback=None) -> Future:
+        def query(conn):
+            entry_hash = self._content_hash(self._prepare(entry, 0))
+            row = conn.execute(
+                "SELECT id FROM entries WHERE content_hash = ? LIMIT 1", (entry_hash,)
+            ).fetchone()
+            return row[0] if row else None
+
+        return self.submit(query, callback)
+
+
+    # Result: entries dated start_date..end_date (inclusive), oldest first
+    def get_entries_between(self, start_date: str, end_date: str, callback=None) -> Future:
+        def query(conn):
+            rows = conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM entries "
+                "WHERE entry_date BETWEEN ? AND ? ORDER BY entry_date, id",
+                (start_date, end_date)
+            )
+            return [dict(row) for row in rows]
+
+        return self.submit(query, callback)
+
+
+    # Keyset pagination, newest first.
+    # :param after: (entry_date, id) of the last row of the previous page
+    # :param before: (entry_date, id) of the first row of the next page;
+    #     returns the page just above it instead (scrolling back up)
+    def get_entries_page(self, after: tuple[str, int] = None, limit: int = 50, callback=None,
+                         before: tuple[str, int] = None) -> Future:
+        return self.submit(lambda conn: self.query_page(conn, after, limit, before), callback)
+
+
+    # get_entries_page() for code already on the worker thread
+    def query_page(self, conn: sqlite3.Connection, after: tuple[str, int] = None, limit: int = 50,
+                   before: tuple[str, int] = None) -> list[dict]:
+        if before:
+            rows = conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM entries "
+                "WHERE (entry_date, id) > (?, ?) "
+                "ORDER BY entry_date, id LIMIT ?",
+                (before[0], before[1], limit)
+            ).fetchall()
+            rows.reverse()
+        elif after:
+            rows = conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM entries "
+                "WHERE (entry_date, id) < (?, ?) "
+                "ORDER BY entry_date DESC, id DESC LIMIT ?",
+                (after[0], after[1], limit)
+            )
+        else:
+            rows = conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM entries "
+                "ORDER BY entry_date DESC, id DESC LIMIT ?",
+                (limit,)
+            )
+        return [dict(row) for row in rows]
+
+
+    # Yields full entries oldest first, fetched in batches with keyset
+    # pagination, so the whole diary is never in memory at once.
+    # Blocks on each batch: call from a worker thread, never from the main
+    # thread or from inside submit().
+    def iter_entries(self, batch_size: int = 500):
+        def query(conn, after):
+            if after:
+                rows = conn.execute(
+                    "SELECT * FROM entries WHERE (entry_date, id) > (?, ?) "
+                    "ORDER BY entry_date, id LIMIT ?",
+                    (after[0], after[1], batch_size)
+                )
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM entries ORDER BY entry_date, id LIMIT ?",
+                    (batch_size,)
+                )
+            return [self.open_row(row) for row in rows]
+
+        after = None
+        while True:
+            batch = self.submit(lambda conn, after=after: query(conn, after)).result()
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = (batch[-1]["entry_date"], batch[-1]["id"])
+
+
+    # Text of a list row's "title" or "preview", decrypting sealed rows
+    # through the cipher's bounded cache. Main thread.
+    def reveal(self, row: dict, field: str) -> str:
+        if row.get("nonce") is None:
+            return row[field]
+        cipher = self.cipher or self._unseal_cipher
+        if cipher is None:
+            return ""  # locked
+        return cipher.decrypt_cached(row["nonce"], field, row[field])
+
+
+    # A stored row as a plain entry, decrypted if sealed. Worker thread.
+    def open_row(self, row: sqlite3.Row, cipher=None) -> dict:
+        entry = dict(row)
+        nonce = entry.pop("nonce", None)
+        entry.pop("sealed_preview", None)
+
+        if nonce is not None:
+            cipher = cipher or self.cipher or self._unseal_cipher
+            if cipher is None:
+                raise DiaryLocked("Diary is locked")
+            entry["title"] = cipher.decrypt(nonce, "title", entry["title"])
+            entry["body"] = cipher.decrypt(nonce, "body", entry["body"])
+        return entry
+
+
+    def count(self, callback=None) -> Future:
+        return self.submit(
+            lambda conn: conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+            callback
+        )
+
+
+    #-----------------------------
+    # ENCRYPTION
+    #-----------------------------
+
+    # Sets the cipher of an unlocked diary. Entries still in plain text,
+    # e.g. written before the lock was turned on, are encrypted in the
+    # background, and an import cut short by locking is finished.
+    def set_cipher(self, cipher) -> None:
+        if self.cipher:
+            self.cipher.purge()
+        self.cipher = cipher
+        self.locked = False
+        if cipher:
+            self.submit(self._finish_interrupted_bulk)
+            self.submit(lambda conn: self._reseal(conn, sealed=False, cipher=None))
+
+
+    # Drops the cipher and purges decrypted text. Until the next
+    # set_cipher(), writes of entry text raise DiaryLocked instead of
+    # storing it in plain text, and re-encryption in progress stops.
+    def lock(self) -> None:
+        for cipher in (self.cipher, self._unseal_cipher):
+            if cipher:
+                cipher.purge()
+        self.cipher = None
+        self._unseal_cipher = None
+        self.locked = True
+
+
+    # Decrypts every entry and stops encrypting, before the lock is turned
+    # off. Rows still sealed stay readable until the last batch is done.
+    # callback() runs on the main thread when done.
+    def unseal_all(self, callback=None) -> Future:
+        def start(conn):
+            cipher = self.cipher
+            if self.locked:
+                return  # locked first; the lock stays on
+            if cipher:
+                self.cipher, self._unseal_cipher = None, cipher
+                self._reseal(conn, sealed=True, cipher=cipher, callback=callback)
+            elif callback:
+                Clock.schedule_once(lambda dt: callback())
+
+        return self.submit(start)
+
+
+    #-----------------------------
+    # WORKER
+    #-----------------------------
+
+    # Runs func(conn) on the worker thread
+    def submit(self, func, callback=None) -> Future:
+        future = self._executor.submit(lambda: func(self._connection()))
+
+        if callback:
+            def done(future):
+                if future.exception():
+                    print(f"Warning: Diary query failed: {future.exception()}")
+                    return
+                result = future.result()
+                Clock.schedule_once(lambda dt: callback(result))
+
+            future.add_done_callback(done)
+        return future
+
+
+    # Finishes queued work and closes the connection
+    def close(self) -> None:
+        def close_connection():
+            if self._conn:
+                self._conn.execute("PRAGMA optimize")
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(close_connection).result()
+
+
+    # Opens the connection on first use (always on the worker thread)
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # Statements are compiled once and reused from this cache
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            # Used by migrations only; triggers stick to built-in SQL
+            conn.create_function("content_hash", 3, content_hash, deterministic=True)
+            conn.create_function("word_count", 1, word_count, deterministic=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            # Deleted and rewritten content (e.g. plain text replaced when
+            # encrypting) is zeroed on disk, not just unlinked
+            conn.execute("PRAGMA secure_delete=ON")
+            self._migrate(conn)
+            self._finish_interrupted_bulk(conn)
+            self._conn = conn
+        return self._conn
+
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;")
+
+
+    #-----------------------------
+    # INTERNAL (worker thread)
+    #-----------------------------
+
+    # Fills defaults and derived columns of an entry about to be written
+    def _prepare(self, entry: dict, now: float) -> dict:
+        entry = dict(entry)
+        entry["title"] = entry.get("title") or ""
+        entry["body"] = entry.get("body") or ""
+        entry["mood"] = entry.get("mood") or 0
+        entry["tags"] = entry.get("tags") or 0
+        entry["word_count"] = word_count(entry["body"])
+        entry["content_hash"] = self._content_hash(entry)
+
+        # New and imported entries keep given timestamps
+        entry["created_at"] = entry.get("created_at") or now
+        entry["modified_at"] = entry.get("modified_at") or now
+        return entry
+
+
+    def _save_entries(self, conn: sqlite3.Connection, entries: list[dict]) -> list[dict]:
+        now = time.time()
+        saved = []
+
+        with conn:
+            for entry in entries:
+                entry = self._prepare(entry, now)
+
+                if entry.get("id"):
+                    entry["modified_at"] = now
+                    conn.execute(
+                        "UPDATE entries SET entry_date = ?, title = ?, body = ?, sealed_preview = ?, "
+                        "nonce = ?, word_count = ?, mood = ?, tags = ?, content_hash = ?, "
+                        "modified_at = ? WHERE id = ?",
+                        (entry["entry_date"], *self._stored_text(entry), entry["word_count"],
+                         entry["mood"], entry["tags"], entry["content_hash"], entry["modified_at"],
+                         entry["id"])
+                    )
+                else:
+                    entry["id"] = conn.execute(INSERT_SQL, self._insert_row(entry)).lastrowid
+                saved.append(entry)
+
+            for hook in self.write_hooks:
+                hook(conn, saved, [])
+
+        return saved
+
+
+    def _delete_entries(self, conn: sqlite3.Connection, entry_ids: list[int]) -> int:
+        with conn:
+            # Hooks may need the rows before they are gone
+            for hook in self.write_hooks:
+                hook(conn, [], entry_ids)
+
+            deleted = conn.executemany(
+                "DELETE FROM entries WHERE id = ?",
+                [(entry_id,) for entry_id in entry_ids]
+            ).rowcount
+        return deleted
+
+
+    def _insert_row(self, entry: dict) -> tuple:
+        return (entry["entry_date"], *self._stored_text(entry), entry["word_count"],
+                entry["mood"], entry["tags"], entry["content_hash"],
+                entry["created_at"], entry["modified_at"])
+
+
+    # (title, body, sealed_preview, nonce) as stored: encrypted under a
+    # fresh nonce when a cipher is set. Refused while locked.
+    def _stored_text(self, entry: dict) -> tuple:
+        cipher = self.cipher
+        if cipher is None:
+            if self.locked:
+                raise DiaryLocked("Diary is locked")
+            return entry["title"], entry["body"], None, None
+
+        nonce = cipher.new_nonce()
+        return (
+            cipher.encrypt(nonce, "title", entry["title"]),
+            cipher.encrypt(nonce, "body", entry["body"]),
+            cipher.encrypt(nonce, "preview", entry["body"][:PREVIEW_LENGTH]),
+            nonce,
+        )
+
+
+    # Keyed by the cipher when encrypting, so hashes reveal nothing
+    def _content_hash(self, entry: dict) -> bytes:
+        text = _hash_text(entry["entry_date"], entry["title"], entry["body"])
+        if self.cipher:
+            return self.cipher.content_hash(text)
+        return hashlib.blake2b(text, digest_size=16).digest()
+
+
+    # Rewrites sealed (or plain) rows in the current mode, one batch per
+    # job so other queries run in between. Write hooks see the plain text
+    # and re-index it. Stops if the diary locks meanwhile; the next unlock
+    # encrypts whatever is left. Once plain rows have been encrypted, the
+    # database is vacuumed so no old plain-text pages remain in the file.
+    # :param cipher: opens the sealed rows being unsealed
+    # :param resealed: rows rewritten by the previous batches
+    def _reseal(self, conn: sqlite3.Connection, sealed: bool, cipher, after: int = 0,
+                callback=None, resealed: int = 0) -> None:
+        if self.locked:
+            return
+
+        rows = conn.execute(
+            f"SELECT * FROM entries WHERE id > ? AND nonce IS {'NOT NULL' if sealed else 'NULL'} "
+            "ORDER BY id LIMIT ?",
+            (after, RESEAL_BATCH_SIZE)
+        ).fetchall()
+
+        if rows:
+            try:
+                entries = [self.open_row(row, cipher) for row in rows]
+            except Exception as e:
+                print(f"Warning: Stopped re-encrypting entries: {e}")
+                if sealed:
+                    # Keep encrypting; what is still sealed stays readable
+                    self.cipher, self._unseal_cipher = cipher, None
+                return
+
+            with conn:
+                for entry in entries:
+                    entry["content_hash"] = self._content_hash(entry)
+                    conn.execute(
+                        "UPDATE entries SET title = ?, body = ?, sealed_preview = ?, nonce = ?, "
+                        "content_hash = ? WHERE id = ?",
+                        (*self._stored_text(entry), entry["content_hash"], entry["id"])
+                    )
+                for hook in self.write_hooks:
+                    hook(conn, entries, [])
+
+        resealed += len(rows)
+        if len(rows) == RESEAL_BATCH_SIZE:
+            last_id = rows[-1]["id"]
+            self.submit(lambda conn: self._reseal(conn, sealed, cipher, last_id, callback, resealed))
+            return
+
+        if sealed:
+            self._unseal_cipher = None
+            cipher.purge()
+        elif resealed:
+            # Merging the full-text index drops the old plain words too
+            with conn:
+                conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('optimize')")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if callback:
+            Clock.schedule_once(lambda dt: callback())
+
+
+    # Suspends the day_stats insert trigger. Returns the first new id.
+    def _begin_bulk(self, conn: sqlite3.Connection) -> int:
+        with conn:
+            first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()[0]
+            conn.execute("INSERT INTO bulk_load (first_id) VALUES (?)", (first_id,))
+        return first_id
+
+
+    # One transaction per batch; write_hooks are not called
+    def _insert_batch(self, conn: sqlite3.Connection, batch: list[dict], seen: set) -> int:
+        now = time.time()
+        entries = []
+        for entry in batch:
+            entry = self._prepare(entry, now)
+            entry.pop("id", None)
+            if entry["content_hash"] not in seen:
+                seen.add(entry["content_hash"])
+                entries.append(entry)
+
+        # Drop entries already in the store
+        hashes = [entry["content_hash"] for entry in entries]
+        stored = set()
+        for start in range(0, len(hashes), MAX_QUERY_PARAMS):
+            chunk = hashes[start:start + MAX_QUERY_PARAMS]
+            rows = conn.execute(
+                "SELECT content_hash FROM entries WHERE content_hash IN "
+                f"({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            stored.update(row[0] for row in rows)
+
+        rows = [self._insert_row(entry) for entry in entries if entry["content_hash"] not in stored]
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+        return len(rows)
+
+
+    # Re-enables the trigger and brings derived data up to date in one pass.
+    # Left for the next unlock while locked: sealed entries can't be indexed.
+    def _end_bulk(self, conn: sqlite3.Connection, first_id: int) -> None:
+        if self.locked:
+            return
+
+        with conn:
+            conn.execute("DELETE FROM bulk_load")
+            conn.execute(
+                "DELETE FROM day_stats WHERE day IN "
+                "(SELECT entry_date FROM entries WHERE id >= ?)",
+                (first_id,)
+            )
+            conn.execute(
+                f"INSERT INTO day_stats SELECT {DAY_STATS_SELECT} WHERE entry_date IN "
+                "(SELECT entry_date FROM entries WHERE id >= ?) GROUP BY entry_date",
+                (first_id,)
+            )
+            for hook in self.bulk_insert_hooks:
+                hook(conn, first_id)
+
+
+    # An import cut short by a crash (or by locking) left the insert
+    # trigger paused: finish it, so its entries are counted and indexed
+    def _finish_interrupted_bulk(self, conn: sqlite3.Connection) -> None:
+        row = conn.execute("SELECT MIN(first_id) FROM bulk_load").fetchone()
+        if row[0] is not None:
+            self._end_bulk(conn, row[0])
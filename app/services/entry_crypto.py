@@ -0,0 +1,148 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+
+
+NONCE_SIZE = 16
+TAG_SIZE = 16
+
+# Decrypted fields kept for the UI (titles and previews of visible rows)
+MAX_CACHED_FIELDS = 1000
+
+# Blind tokens memoised per session (words repeat a lot)
+MAX_CACHED_TOKENS = 50000
+
+# Field labels mixed into each keystream and tag, so fields can't be swapped
+FIELDS = {"title": b"t", "body": b"b", "preview": b"p"}
+
+_WORD_RE = re.compile(r"\w+")
+_COMBINING_RE = re.compile("[\u0300-\u036f]")
+
+
+class IntegrityError(Exception):
+    pass
+
+
+# Encrypts entry text with a key derived per entry.
+#
+# Built from the standard library only (no AES there): every save draws a
+# fresh random nonce, the entry key is BLAKE2b(nonce) keyed with the data
+# key, each field is XORed with a SHAKE-256 keystream of that entry key,
+# and a keyed BLAKE2b tag over nonce, field and ciphertext is checked
+# before anything is decrypted (encrypt-then-MAC).
+#
+# Blobs are tag + ciphertext. Dates, word counts, moods and tags stay in
+# clear for the calendar aggregates.
+class EntryCipher:
+    def __init__(self, data_key: bytes):
+        self._enc_key = _subkey(data_key, b"encrypt")
+        self._mac_key = _subkey(data_key, b"mac")
+        self._index_key = _subkey(data_key, b"index")
+        self._hash_key = _subkey(data_key, b"hash")
+
+        # (nonce, field) -> text; nonces change on every save, so stale
+        # entries are never hit. Main thread only.
+        self.cache = OrderedDict()
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self._tokens = {}
+
+
+    def new_nonce(self) -> bytes:
+        return os.urandom(NONCE_SIZE)
+
+
+    def encrypt(self, nonce: bytes, field: str, text: str) -> bytes:
+        data = text.encode("utf-8")
+        ciphertext = _xor(data, self._keystream(nonce, field, len(data)))
+        return self._tag(nonce, field, ciphertext) + ciphertext
+
+
+    def decrypt(self, nonce: bytes, field: str, blob: bytes) -> str:
+        tag, ciphertext = blob[:TAG_SIZE], blob[TAG_SIZE:]
+        if not hmac.compare_digest(tag, self._tag(nonce, field, ciphertext)):
+            raise IntegrityError(f"Entry {field} failed its integrity check")
+        return _xor(ciphertext, self._keystream(nonce, field, len(ciphertext))).decode("utf-8")
+
+
+    # decrypt() through the bounded cache, for rows being shown
+    def decrypt_cached(self, nonce: bytes, field: str, blob: bytes) -> str:
+        key = (nonce, field)
+        text = self.cache.get(key)
+        if text is not None:
+            self.cache.move_to_end(key)
+            self.cache_stats["hits"] += 1
+            return text
+
+        self.cache_stats["misses"] += 1
+        text = self.decrypt(nonce, field, blob)
+        self.cache[key] = text
+        while len(self.cache) > MAX_CACHED_FIELDS:
+            self.cache.popitem(last=False)
+        return text
+
+
+    # Drops all decrypted text and memoised words
+    def purge(self) -> None:
+        self.cache.clear()
+        self._tokens.clear()
+
+
+    # Keyed content hash, so stored hashes can't be matched against guesses
+    def content_hash(self, text: bytes) -> bytes:
+        return hashlib.blake2b(text, key=self._hash_key, digest_size=16).digest()
+
+
+    # Replaces each word with an opaque keyed token for the full-text index.
+    # Equal words give equal tokens, so whole words and phrases still match
+    # (and rank) without the index holding any text.
+    def blind_tokens(self, text: str) -> str:
+        return " ".join(self.blind_token(word) for word in words(text))
+
+
+    def blind_token(self, word: str) -> str:
+        token = self._tokens.get(word)
+        if token is None:
+            if len(self._tokens) >= MAX_CACHED_TOKENS:
+                self._tokens.clear()
+            digest = hashlib.blake2b(word.encode("utf-8"), key=self._index_key, digest_size=10).digest()
+            token = self._tokens[word] = base64.b32encode(digest).decode("ascii").lower()
+        return token
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _keystream(self, nonce: bytes, field: str, length: int) -> bytes:
+        entry_key = hashlib.blake2b(nonce, key=self._enc_key, digest_size=32).digest()
+        return hashlib.shake_256(entry_key + FIELDS[field]).digest(length)
+
+
+    def _tag(self, nonce: bytes, field: str, ciphertext: bytes) -> bytes:
+        return hashlib.blake2b(
+            nonce + FIELDS[field] + ciphertext, key=self._mac_key, digest_size=TAG_SIZE
+        ).digest()
+
+
+# Lowercased words without (Latin) diacritics, close to FTS5's unicode61
+# tokenizer with remove_diacritics
+def words(text: str) -> list[str]:
+    text = text.lower()
+    if not text.isascii():
+        text = _COMBINING_RE.sub("", unicodedata.normalize("NFKD", text))
+    return _WORD_RE.findall(text)
+
+
+def _subkey(data_key: bytes, purpose: bytes) -> bytes:
+    return hashlib.blake2b(purpose, key=data_key, digest_size=32).digest()
+
+
+# XOR of two equal-length byte strings, done on big integers for speed
+def _xor(data: bytes, keystream: bytes) -> bytes:
+    if not data:
+        return b""
+    return (int.from_bytes(data, "little") ^ int.from_bytes(keystream, "little")).to_bytes(len(data), "little")
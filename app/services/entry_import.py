@@ -0,0 +1,242 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+
+from kivy.clock import Clock
+
+from app.services.diary_repository import DiaryRepository
+from app.services.export_service import EXPORT_FIELDS
+
+
+# Entries per insert transaction
+BATCH_SIZE = 1000
+
+# Minimum seconds between two progress callbacks
+PROGRESS_INTERVAL = 0.1
+
+# Types an imported record's fields may have; None means "not set"
+FIELD_TYPES = {
+    "entry_date": str,
+    "title": str,
+    "body": str,
+    "mood": int,
+    "tags": int,
+    "created_at": (int, float),
+    "modified_at": (int, float),
+}
+
+# Day files written by the Markdown export: YYYY/MM/YYYY-MM-DD.md
+_DAY_FILE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\.md$")
+_HEADING_RE = re.compile(r"^## (.*)$", re.MULTILINE)
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+# Imports entries from a previous export on a worker thread.
+#
+# Accepts the JSON Lines export (.jsonl, also inside a .zip) and the
+# Markdown ZIP export. Records are streamed from the file into
+# DiaryRepository.import_entries(), which inserts them in large batches and
+# skips entries already in the diary, so restoring the same export twice
+# changes nothing. Callbacks run on the Kivy main thread:
+#   on_progress(fraction)  0.0 .. 1.0
+#   on_done(message, stats)  stats is None if the import failed
+class EntryImportTask:
+    def __init__(self, repository: DiaryRepository, path: str, on_progress=None, on_done=None):
+        self.repository = repository
+        self.path = path
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+        # {"imported", "duplicates", "seconds", "per_second"}
+        self.stats = None
+        self._cancel = threading.Event()
+        self._last_progress = 0
+        self._thread = None
+
+
+    def start(self) -> "EntryImportTask":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+
+    # Runs the import on the calling thread. Returns (message, stats).
+    def run(self) -> tuple[str, dict | None]:
+        if zipfile.is_zipfile(self.path):
+            read = self._read_zip
+        elif self.path.lower().endswith(".jsonl"):
+            read = self._read_jsonl
+        else:
+            return "Unsupported file: choose a .jsonl or .zip export", None
+
+        start = time.perf_counter()
+        counts = {"imported": 0, "duplicates": 0}
+
+        def on_batch(batch_counts):
+            counts.update(batch_counts)
+            if self._cancel.is_set():
+                raise ImportCancelled()
+
+        try:
+            self.repository.import_entries(read(), BATCH_SIZE, on_batch)
+            cancelled = False
+        except ImportCancelled:
+            cancelled = True
+        except Exception as e:
+            return f"Import failed: {e}", None
+
+        seconds = time.perf_counter() - start
+        self.stats = dict(
+            counts,
+            seconds=seconds,
+            per_second=counts["imported"] / seconds if seconds else 0.0
+        )
+        self._report_progress(1.0, force=True)
+
+        message = (
+            f"Imported {counts['imported']} entries "
+            f"({counts['duplicates']} duplicates skipped, {self.stats['per_second']:.0f}/s)"
+        )
+        if cancelled:
+            message = "Import cancelled. " + message
+        return message, self.stats
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _run(self) -> None:
+        message, stats = self.run()
+        if self.on_done:
+            Clock.schedule_once(lambda dt: self.on_done(message, stats))
+
+
+    # Yields entries from a JSON Lines export, one line at a time
+    def _read_jsonl(self):
+        size = os.path.getsize(self.path) or 1
+
+        with open(self.path, "rb") as file:
+            for line in file:
+                self._check_cancel()
+                entry = self._parse_json(line)
+                if entry:
+                    yield entry
+                self._report_progress(file.tell() / size)
+
+
+    # Yields entries from every .jsonl and day .md member of a ZIP
+    def _read_zip(self):
+        with zipfile.ZipFile(self.path, "r") as zip_ref:
+            members = [
+                info for info in zip_ref.infolist()
+                if info.filename.lower().endswith(".jsonl") or _DAY_FILE_RE.search(info.filename)
+            ]
+            total = sum(info.compress_size for info in members) or 1
+            done = 0
+
+            for info in members:
+                self._check_cancel()
+                with zip_ref.open(info) as member:
+                    if info.filename.lower().endswith(".jsonl"):
+                        for line in member:
+                            entry = self._parse_json(line)
+                            if entry:
+                                yield entry
+                    else:
+                        entry_date = _DAY_FILE_RE.search(info.filename).group(1)
+                        for entry in parse_markdown_day(entry_date, member.read().decode("utf-8")):
+                            error = record_error(entry)
+                            if error:
+                                print(f"Warning: Skipping entry in {info.filename}: {error}")
+                            else:
+                                yield entry
+
+                done += info.compress_size
+                self._report_progress(done / total)
+
+
+    def _parse_json(self, line: bytes) -> dict | None:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"Warning: Skipping unreadable line in {self.path}")
+            return None
+
+        if not isinstance(record, dict) or not record.get("entry_date"):
+            return None
+
+        record = {field: record[field] for field in EXPORT_FIELDS if field in record}
+        error = record_error(record)
+        if error:
+            print(f"Warning: Skipping entry in {self.path}: {error}")
+            return None
+        return record
+
+
+    def _check_cancel(self) -> None:
+        if self._cancel.is_set():
+            raise ImportCancelled()
+
+
+    # Posts progress to the main thread, throttled to PROGRESS_INTERVAL
+    def _report_progress(self, fraction: float, force: bool = False) -> None:
+        if not self.on_progress:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        Clock.schedule_once(lambda dt: self.on_progress(fraction))
+
+
+# Why a record can't be imported, or None if it can
+def record_error(record: dict) -> str | None:
+    for field, value in record.items():
+        expected = FIELD_TYPES[field]
+        # bool is an int subclass, but never a valid mood or tag set
+        if value is not None and (not isinstance(value, expected) or isinstance(value, bool)):
+            return f"{field} has the wrong type ({type(value).__name__})"
+
+    try:
+        datetime.date.fromisoformat(record["entry_date"])
+    except ValueError:
+        return f"invalid entry_date {record['entry_date']!r}"
+
+    if not 0 <= (record.get("mood") or 0) <= 7:
+        return f"mood {record['mood']} is not 0..7"
+    return None
+
+
+# Splits one exported day file ("# date", then "## title" per entry) back
+# into entries. A body line starting with "## " reads as a new entry; the
+# JSON Lines export has no such ambiguity.
+def parse_markdown_day(entry_date: str, text: str) -> list[dict]:
+    headings = list(_HEADING_RE.finditer(text))
+    entries = []
+
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        title = heading.group(1).strip()
+        entries.append({
+            "entry_date": entry_date,
+            "title": "" if title == "Untitled" else title,
+            "body": text[heading.end():end].strip("\n"),
+        })
+    return entries
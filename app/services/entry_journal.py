@@ -0,0 +1,369 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+from app.services.diary_repository import DiaryLocked, DiaryRepository
+
+
+# Deltas appended before they are folded into the entry store
+COMPACT_EVERY = 50
+
+# Seconds after which an open draft is compacted anyway
+COMPACT_INTERVAL = 30
+
+
+# Crash-safe autosave for the entry being edited.
+#
+# The editor hands over its text after each pause in typing; the journal
+# thread diffs it against the last recorded text and appends only the
+# change (start, end, inserted text) to an append-only file, so the cost
+# of a save follows the edit, not the entry. Every COMPACT_EVERY deltas or
+# COMPACT_INTERVAL seconds, and on close, the draft is saved to the
+# repository and the journal restarts from it.
+#
+# Journal lines, JSON:
+#   {"op": "open", "entry": {...without title/body}, "base": hash, "sealed": bool}
+#   {"op": "edit", "field": "title"|"body", "start", "end", "text"[, "nonce"]}
+# "base" is the hash of the title and body the deltas apply to (the stored
+# entry, or empty text for a new one). While the diary is encrypted, the
+# inserted text is sealed with the entry cipher.
+#
+# recover() replays a journal left behind by a crash (or by locking in the
+# middle of an edit) into the repository.
+class EntryJournal:
+    def __init__(self, repository: DiaryRepository, path: str = "app/data/entry_journal.jsonl",
+                 compact_every: int = COMPACT_EVERY, compact_interval: float = COMPACT_INTERVAL):
+        self.repository = repository
+        self.path = path
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+
+        # Called on the main thread by flush(), to hand over pending text
+        self.flush_listeners = []
+        # Called on the main thread after each recover() as listener(entry),
+        # with the entry it saved or None
+        self.recovered_listeners = []
+
+        self.stats = {"records": 0, "bytes": 0, "compactions": 0, "record_ms": 0.0}
+
+        # Journal thread state
+        self._draft = None
+        self._file = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="entry-journal")
+
+
+    # Starts journaling an entry (a dict from the repository, or one without
+    # "id" for a new entry) whose text is shown in the editor
+    def open(self, entry: dict) -> Future:
+        cipher = self.repository.cipher
+        return self._submit(lambda: self._open(entry, cipher))
+
+
+    # Records the editor's current text. Cheap on the calling thread: the
+    # diff runs on the journal thread. callback() runs once it is on disk.
+    def record(self, title: str, body: str, callback=None) -> Future:
+        done = (lambda result: callback()) if callback else None
+        return self._submit(lambda: self._record(title, body), done)
+
+
+    # Saves the draft to the repository and removes the journal.
+    # Result (and callback): the saved entry, or None
+    def close(self, callback=None) -> Future:
+        return self._submit(self._close, callback)
+
+
+    # Ends the draft without saving it, e.g. when the diary locks: the
+    # journal stays on disk for recover()
+    def detach(self) -> Future:
+        return self._submit(self._detach)
+
+
+    # Asks the editor for pending text.
+    # :param wait: if True, blocks until it is on disk (used on pause)
+    def flush(self, wait: bool = False) -> None:
+        for listener in self.flush_listeners:
+            listener()
+        if wait:
+            self._submit(lambda: None).result()
+
+
+    # Replays a journal left on disk into the repository.
+    # Result (and callback): the recovered entry, or None
+    def recover(self, callback=None) -> Future:
+        def done(entry):
+            for listener in self.recovered_listeners:
+                listener(entry)
+            if callback:
+                callback(entry)
+
+        return self._submit(self._recover, done)
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    # Runs func() on the journal thread; callback(result) on the main thread
+    def _submit(self, func, callback=None) -> Future:
+        future = self._executor.submit(func)
+
+        def done(future):
+            if future.exception():
+                print(f"Warning: Entry journal failed: {future.exception()}")
+                return
+            if callback:
+                result = future.result()
+                Clock.schedule_once(lambda dt: callback(result))
+
+        future.add_done_callback(done)
+        return future
+
+
+    def _open(self, entry: dict, cipher) -> None:
+        if self._draft:
+            self._close()
+
+        self._draft = {
+            "entry": {key: value for key, value in entry.items() if key not in ("title", "body")},
+            "title": entry.get("title") or "",
+            "body": entry.get("body") or "",
+            "cipher": cipher,
+            "records": 0,
+            "compacted_at": time.monotonic(),
+        }
+        self._restart()
+
+
+    def _record(self, title: str, body: str) -> None:
+        draft = self._draft
+        if draft is None:
+            return
+
+        start_time = time.perf_counter()
+        lines = []
+        for field, text in (("title", title), ("body", body)):
+            change = diff(draft[field], text)
+            if change:
+                lines.append(self._edit_line(field, *change))
+                draft[field] = text
+        if not lines:
+            return
+
+        self._append(lines)
+        draft["records"] += len(lines)
+        self.stats["records"] += len(lines)
+        self.stats["record_ms"] = (time.perf_counter() - start_time) * 1000
+
+        if (draft["records"] >= self.compact_every
+                or time.monotonic() - draft["compacted_at"] >= self.compact_interval):
+            self._compact()
+
+
+    def _close(self) -> dict | None:
+        draft = self._draft
+        if draft is None:
+            return None
+
+        entry = self._compact() if draft["records"] else None
+        self._detach()
+
+        # Nothing left to replay unless the save was skipped (locked)
+        if entry is not None or not draft["records"]:
+            self._remove()
+        return entry
+
+
+    def _detach(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._draft = None
+
+
+    # Saves the draft and starts a fresh journal from it
+    def _compact(self) -> dict | None:
+        draft = self._draft
+
+        # Never write a draft of an encrypted diary while it is locked;
+        # recover() saves it after the next unlock
+        if self.repository.cipher is None and (draft["cipher"] is not None or self.repository.locked):
+            return None
+
+        entry = dict(draft["entry"], title=draft["title"], body=draft["body"])
+        try:
+            entry = self.repository.save_entry(entry).result()
+        except DiaryLocked:
+            return None  # locked while saving
+
+        draft["entry"] = {key: value for key, value in entry.items() if key not in ("title", "body")}
+        draft["cipher"] = self.repository.cipher
+        draft["records"] = 0
+        draft["compacted_at"] = time.monotonic()
+        self._restart()
+        self.stats["compactions"] += 1
+        return entry
+
+
+    # Rewrites the journal as a single "open" line for the draft
+    def _restart(self) -> None:
+        draft = self._draft
+        if self._file:
+            self._file.close()
+
+        entry = {key: value for key, value in draft["entry"].items()
+                 if isinstance(value, (str, int, float, type(None)))}
+        line = json.dumps({
+            "op": "open",
+            "entry": entry,
+            "base": _text_hash(draft["cipher"], draft["title"], draft["body"]),
+            "sealed": draft["cipher"] is not None,
+        })
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(line + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+
+    def _edit_line(self, field: str, start: int, end: int, text: str) -> str:
+        record = {"op": "edit", "field": field, "start": start, "end": end}
+
+        cipher = self._draft["cipher"]
+        if cipher is None:
+            record["text"] = text
+        else:
+            nonce = cipher.new_nonce()
+            record["nonce"] = base64.b64encode(nonce).decode("ascii")
+            record["text"] = base64.b64encode(cipher.encrypt(nonce, field, text)).decode("ascii")
+        return json.dumps(record, ensure_ascii=False)
+
+
+    def _append(self, lines: list[str]) -> None:
+        data = "\n".join(lines) + "\n"
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.stats["bytes"] += len(data.encode("utf-8"))
+
+
+    def _remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+    def _recover(self) -> dict | None:
+        if self._draft or not os.path.exists(self.path):
+            return None
+
+        with open(self.path, encoding="utf-8") as file:
+            records = []
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break  # torn last write
+        if not records or records[0].get("op") != "open":
+            self._remove()
+            return None
+
+        opened, edits = records[0], records[1:]
+        cipher = self.repository.cipher
+        if cipher is None and (opened["sealed"] or self.repository.locked):
+            return None  # locked; replayed after the next unlock
+
+        entry = dict(opened["entry"])
+        if not edits:
+            self._remove()
+            return None
+
+        if entry.get("id"):
+            stored = self.repository.get_entry(entry["id"]).result()
+            if stored is None:
+                print("Warning: Journaled entry no longer exists, restoring it as a new entry")
+                entry.pop("id")
+                stored = {"title": "", "body": ""}
+            else:
+                entry = stored
+        else:
+            stored = {"title": "", "body": ""}
+
+        text = {"title": stored["title"], "body": stored["body"]}
+        base = _text_hash(cipher if opened["sealed"] else None, text["title"], text["body"])
+        if entry.get("id") and base != opened["base"]:
+            # Saved after the journal was written (the crash hit between the
+            # save and the journal restart), or changed elsewhere
+            print("Warning: Journaled entry was saved or changed since, skipping replay")
+            self._remove()
+            return None
+
+        for record in edits:
+            inserted = record["text"]
+            if opened["sealed"]:
+                inserted = cipher.decrypt(base64.b64decode(record["nonce"]), record["field"],
+                                          base64.b64decode(inserted))
+            value = text[record["field"]]
+            text[record["field"]] = value[:record["start"]] + inserted + value[record["end"]:]
+
+        entry = dict(entry, **text)
+        if entry.get("id"):
+            entry = self.repository.save_entry(entry).result()
+        else:
+            # A new entry may have been saved just before the crash
+            entry["id"] = self.repository.find_entry(entry).result()
+            if entry["id"] is None:
+                entry = self.repository.save_entry(entry).result()
+
+        self._remove()
+        return entry
+
+
+# The change from old to new as (start, end, inserted): new is
+# old[:start] + inserted + old[end:]. None if equal.
+#
+# Common prefix and suffix are found by binary search over slices, so a
+# 1 MB text takes a few fast comparisons instead of a character loop.
+def diff(old: str, new: str) -> tuple[int, int, str] | None:
+    if old == new:
+        return None
+
+    limit = min(len(old), len(new))
+    prefix = _common_length(old, new, limit, lambda text, a, b: text[a:b])
+
+    limit -= prefix
+    suffix = _common_length(old, new, limit,
+                            lambda text, a, b: text[len(text) - b:len(text) - a])
+
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+
+# Length of the common run (up to limit) of old and new, with
+# part(text, a, b) giving characters a..b of the run
+def _common_length(old: str, new: str, limit: int, part) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if part(old, low, middle) == part(new, low, middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+# Hash of a draft's text, keyed by the cipher while encrypted
+def _text_hash(cipher, title: str, body: str) -> str:
+    text = f"{title}\0{body}".encode("utf-8", "surrogatepass")
+    if cipher is not None:
+        return cipher.content_hash(text).hex()
+    return hashlib.blake2b(text, digest_size=16).hexdigest()
@@ -0,0 +1,197 @@
+import datetime
+import html
+import json
+import os
+import threading
+import time
+import zipfile
+
+from kivy.clock import Clock
+from kivy.utils import platform
+
+from app.services.diary_repository import DiaryRepository
+
+
+# Format name -> (label, file extension)
+EXPORT_FORMATS = {
+    "jsonl": ("JSON Lines", ".jsonl"),
+    "markdown_zip": ("Markdown (ZIP)", ".zip"),
+    "html": ("HTML", ".html"),
+    "text": ("Plain text", ".txt"),
+}
+
+# Fields written to JSON Lines exports (and read back by imports)
+EXPORT_FIELDS = ("entry_date", "title", "body", "mood", "tags", "created_at", "modified_at")
+
+# Minimum seconds between two progress callbacks
+PROGRESS_INTERVAL = 0.1
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+# Returns a folder the user can find exports in
+def default_export_dir() -> str:
+    if platform == "android":
+        return "/storage/emulated/0/Documents"
+    documents = os.path.join(os.path.expanduser("~"), "Documents")
+    return documents if os.path.isdir(documents) else os.path.expanduser("~")
+
+
+# Exports all entries on a worker thread.
+#
+# Entries stream from DiaryRepository.iter_entries() through a generator
+# straight into the output file, so memory stays bounded by one batch.
+# Output goes to a temp file that replaces the target only on success.
+# Callbacks run on the Kivy main thread:
+#   on_progress(fraction)  0.0 .. 1.0
+#   on_done(message, path)  path is None if the export failed or was cancelled
+class ExportTask:
+    def __init__(self, repository: DiaryRepository, fmt: str, path: str = None,
+                 on_progress=None, on_done=None):
+        self.repository = repository
+        self.fmt = fmt
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+        if path is None:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(default_export_dir(), f"diary-{stamp}{EXPORT_FORMATS[fmt][1]}")
+        self.path = path
+
+        self.exported = 0
+        self._cancel = threading.Event()
+        self._last_progress = 0
+        self._thread = None
+
+
+    def start(self) -> "ExportTask":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+
+    # Runs the export on the calling thread. Returns (message, path).
+    def run(self) -> tuple[str, str | None]:
+        writers = {
+            "jsonl": self._write_jsonl,
+            "markdown_zip": self._write_markdown_zip,
+            "html": self._write_html,
+            "text": self._write_text,
+        }
+        if self.fmt not in writers:
+            return f"Unknown export format: {self.fmt}", None
+
+        tmp_path = self.path + ".tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            total = self.repository.count().result()
+            writers[self.fmt](self._entries(total), tmp_path)
+            os.replace(tmp_path, self.path)
+            return f"Exported {self.exported} entries to {self.path}", self.path
+
+        except ExportCancelled:
+            return "Export cancelled", None
+        except Exception as e:
+            return f"Export failed: {e}", None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _run(self) -> None:
+        message, path = self.run()
+        if self.on_done:
+            Clock.schedule_once(lambda dt: self.on_done(message, path))
+
+
+    # Yields entries, counting progress and honouring cancel
+    def _entries(self, total: int):
+        for entry in self.repository.iter_entries():
+            if self._cancel.is_set():
+                raise ExportCancelled()
+
+            yield entry
+            self.exported += 1
+            self._report_progress(self.exported / (total or 1))
+
+        self._report_progress(1.0, force=True)
+
+
+    def _write_jsonl(self, entries, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for entry in entries:
+                record = {field: entry.get(field) for field in EXPORT_FIELDS}
+                file.write(json.dumps(record, ensure_ascii=False))
+                file.write("\n")
+
+
+    # One Markdown file per day (YYYY/MM/YYYY-MM-DD.md), each written
+    # straight into the archive as its entries arrive
+    def _write_markdown_zip(self, entries, path: str) -> None:
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zip_ref:
+            day = None
+            member = None
+
+            for entry in entries:
+                if entry["entry_date"] != day:
+                    if member:
+                        member.close()
+                    day = entry["entry_date"]
+                    name = f"{day[:4]}/{day[5:7]}/{day}.md"
+                    member = zip_ref.open(name, "w")
+                    member.write(f"# {day}\n".encode("utf-8"))
+
+                member.write(f"\n## {entry['title'] or 'Untitled'}\n\n".encode("utf-8"))
+                member.write(entry["body"].encode("utf-8"))
+                member.write(b"\n")
+
+            if member:
+                member.close()
+
+
+    def _write_html(self, entries, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(
+                "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                "<title>Diary</title></head><body>\n"
+            )
+            for entry in entries:
+                body = html.escape(entry["body"]).replace("\n", "<br>\n")
+                file.write(
+                    f"<article><h2>{html.escape(entry['entry_date'])} &middot; "
+                    f"{html.escape(entry['title'] or 'Untitled')}</h2>\n<p>{body}</p></article>\n"
+                )
+            file.write("</body></html>\n")
+
+
+    def _write_text(self, entries, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for entry in entries:
+                heading = f"{entry['entry_date']}  {entry['title'] or 'Untitled'}"
+                file.write(f"{heading}\n{'=' * len(heading)}\n\n{entry['body']}\n\n\n")
+
+
+    # Posts progress to the main thread, throttled to PROGRESS_INTERVAL
+    def _report_progress(self, fraction: float, force: bool = False) -> None:
+        if not self.on_progress:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        Clock.schedule_once(lambda dt: self.on_progress(fraction))
@@ -0,0 +1,245 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+from kivy.clock import Clock
+
+from app.services.font_metadata import read_metadata
+from app.services.font_store import FontStore
+from app.services.font_styles import (
+    FONT_EXTENSIONS, classify, family_key, pick_classified, style_from_metadata
+)
+from app.services.sfnt import FontFormatError
+
+
+CHUNK_SIZE = 1024 * 1024
+
+# Minimum seconds between two progress callbacks
+PROGRESS_INTERVAL = 0.1
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+# Imports a font ZIP on a worker thread.
+#
+# One file per style is picked from the member names, and only those
+# members are streamed from the archive into the font store, in
+# fixed-size chunks, so memory stays flat even for multi-hundred-MB
+# bundles. Members whose names don't tell their style (e.g. "font1.ttf")
+# are extracted first and picked by their own metadata. The font folder
+# links to the stored files: files already stored by another import take
+# no extra space.
+#
+# Re-importing a ZIP whose font members (names, CRCs, sizes) are
+# unchanged returns right after reading the archive's directory.
+#
+# Callbacks run on the Kivy main thread:
+#   on_progress(fraction)  0.0 .. 1.0
+#   on_done(message, font_name)  font_name is None if nothing was imported
+class FontImportTask:
+    def __init__(
+        self,
+        zip_path: str,
+        fonts_path: str,
+        on_progress=None,
+        on_done=None,
+        store: FontStore = None
+    ):
+        self.zip_path = zip_path
+        self.fonts_path = fonts_path
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.store = store or FontStore(fonts_path)
+
+        self.font_name = os.path.splitext(os.path.basename(zip_path))[0]
+        self._cancel = threading.Event()
+        self._last_progress = 0
+        self._progress = [0, 0]
+        self._thread = None
+
+
+    def start(self) -> "FontImportTask":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+
+    # Runs the import on the calling thread. Returns (message, font_name).
+    def run(self) -> tuple[str, str | None]:
+        if not zipfile.is_zipfile(self.zip_path):
+            return "Invalid ZIP file", None
+
+        target_dir = os.path.join(self.fonts_path, self.font_name)
+        tmp_dir = None
+
+        try:
+            with zipfile.ZipFile(self.zip_path, "r") as zip_ref:
+                fonts = self._font_members(zip_ref.infolist())
+                if not fonts:
+                    return "No font files found in ZIP", None
+
+                archive_key = self.store.archive_key(fonts)
+                if self.store.is_imported(self.font_name, archive_key):
+                    self._report_progress(1.0, force=True)
+                    return f"Font already added: {self.font_name}", self.font_name
+
+                # Each task has its own folder, so a cancelled import of
+                # the same ZIP can't delete this one's files. Dot folders
+                # are skipped by the font registry.
+                os.makedirs(self.fonts_path, exist_ok=True)
+                tmp_dir = tempfile.mkdtemp(dir=self.fonts_path, prefix=".")
+                if not self._extract_styles(zip_ref, fonts, tmp_dir):
+                    return "No regular style found in ZIP", None
+
+            # Swap the finished folder into place
+            shutil.rmtree(target_dir, ignore_errors=True)
+            os.replace(tmp_dir, target_dir)
+            self.store.set_imported(self.font_name, archive_key)
+
+            saved = self._saved_bytes(target_dir)
+            message = f"Font successfully added: {self.font_name}"
+            if saved:
+                message += f" ({saved / (1024 * 1024):.1f} MB saved)"
+            return message, self.font_name
+
+        except ImportCancelled:
+            return "Font import cancelled", None
+        except Exception as e:
+            return f"Font extraction failed: {e}", None
+        finally:
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Files of a replaced folder, or of a cancelled or failed import
+            self.store.collect_garbage()
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _run(self) -> None:
+        message, font_name = self.run()
+        if self.on_done:
+            Clock.schedule_once(lambda dt: self.on_done(message, font_name))
+
+
+    def _font_members(self, infos: list[zipfile.ZipInfo]) -> list[zipfile.ZipInfo]:
+        return [
+            info for info in infos
+            if not info.is_dir() and info.filename.lower().endswith(FONT_EXTENSIONS)
+        ]
+
+
+    # Picks a member per style and extracts only those into folder.
+    # Members with ambiguous names are extracted first and classified by
+    # their metadata; the ones not picked are deleted again.
+    # Returns False if there is no regular style.
+    def _extract_styles(self, zip_ref: zipfile.ZipFile, infos, folder: str) -> bool:
+        named = [(classify(info.filename), info) for info in infos]
+        ambiguous = self._ambiguous(named)
+        self._progress = [0, sum(info.file_size for info in ambiguous)]
+
+        classified = [(style, info) for style, info in named if info not in ambiguous]
+        for info, path in self._stream_members(zip_ref, ambiguous, folder):
+            try:
+                style = style_from_metadata(read_metadata(path))
+            except (OSError, FontFormatError):
+                style = classify(info.filename)
+            classified.append((style, path))
+
+        styles = pick_classified(classified, preferred_family=self.font_name)
+        picked = [value for value in styles.values() if isinstance(value, zipfile.ZipInfo)]
+        self._progress[1] += sum(info.file_size for info in picked)
+        for _ in self._stream_members(zip_ref, picked, folder):
+            pass
+        self._report_progress(1.0, force=True)
+
+        keep = {os.path.basename(value if isinstance(value, str) else value.filename)
+                for value in styles.values()}
+        for entry in os.scandir(folder):
+            if entry.name not in keep:
+                os.remove(entry.path)
+        return "fn_regular" in styles
+
+
+    # Members whose names can't be trusted to tell their style: a style
+    # another member also claims, or a family no other member (and not the
+    # ZIP's name) has, like "font1.ttf"
+    def _ambiguous(self, named: list) -> list[zipfile.ZipInfo]:
+        if len(named) == 1:
+            return []
+
+        families = {}
+        styles = {}
+        for style, info in named:
+            if style:
+                families[style.family] = families.get(style.family, 0) + 1
+                styles[style] = styles.get(style, 0) + 1
+
+        preferred = family_key(self.font_name)
+        return [
+            info for style, info in named
+            if style is None
+            or styles[style] > 1
+            or (families[style.family] == 1 and style.family != preferred)
+        ]
+
+
+    # Stores members chunk by chunk and links them into target_dir,
+    # reporting progress (self._progress: [done, total] bytes) and
+    # honouring cancel. Yields (info, path) as each member is written.
+    def _stream_members(self, zip_ref: zipfile.ZipFile, infos, target_dir: str):
+        progress = self._progress
+
+        def on_chunk(size):
+            if self._cancel.is_set():
+                raise ImportCancelled()
+            progress[0] += size
+            self._report_progress(progress[0] / (progress[1] or 1))
+
+        for info in infos:
+            if self._cancel.is_set():
+                raise ImportCancelled()
+
+            target = os.path.join(target_dir, os.path.basename(info.filename))
+            with zip_ref.open(info) as source:
+                self.store.add(source, target, CHUNK_SIZE, on_chunk)
+            yield info, target
+
+
+    # Bytes of the imported folder that were already stored for other fonts
+    def _saved_bytes(self, folder: str) -> int:
+        saved = 0
+        for entry in os.scandir(folder):
+            stat = entry.stat()
+            # Links: the store's, this folder's, and any other folder's
+            if stat.st_nlink > 2:
+                saved += stat.st_size
+        return saved
+
+
+    # Posts progress to the main thread, throttled to PROGRESS_INTERVAL
+    def _report_progress(self, fraction: float, force: bool = False) -> None:
+        if not self.on_progress:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        Clock.schedule_once(lambda dt: self.on_progress(fraction))
@@ -0,0 +1,94 @@
+import struct
+from typing import NamedTuple
+
+from app.services.sfnt import FontFormatError, map_font, table_directory
+
+
+# name table IDs: typographic family/subfamily first, then the legacy
+# four-style ones ("Open Sans SemiBold" / "Regular")
+FAMILY_IDS = (16, 1)
+SUBFAMILY_IDS = (17, 2)
+
+# Windows English first, then any Windows, Mac Roman and Unicode names
+_PLATFORM_RANK = {(3, 0x409): 0, 3: 1, 1: 2, 0: 3}
+
+
+class FontMetadata(NamedTuple):
+    family: str
+    subfamily: str
+    weight: int
+    italic: bool
+    variable: bool
+
+
+# Reads family, subfamily, weight and slant from a font's name, OS/2 and
+# head tables. The file is memory-mapped and only the table directory and
+# those tables are touched, never the glyph data.
+def read_metadata(path: str) -> FontMetadata:
+    with map_font(path) as data:
+        tables = table_directory(data)
+        try:
+            names = _read_names(data, tables)
+            weight, italic = _read_style(data, tables)
+        except struct.error:
+            raise FontFormatError("truncated table")
+
+    family = next((names[i] for i in FAMILY_IDS if names.get(i)), None)
+    if not family:
+        raise FontFormatError("no family name")
+    subfamily = next((names[i] for i in SUBFAMILY_IDS if names.get(i)), "Regular")
+    return FontMetadata(family, subfamily, weight, italic, b"fvar" in tables)
+
+
+#-----------------------------
+# INTERNAL
+#-----------------------------
+
+# {name id: string} for the family and subfamily IDs, best platform first
+def _read_names(data, tables: dict) -> dict[int, str]:
+    if b"name" not in tables:
+        return {}
+    start = tables[b"name"][0]
+    count, string_offset = struct.unpack_from(">HH", data, start + 2)
+    strings_at = start + string_offset
+
+    wanted = FAMILY_IDS + SUBFAMILY_IDS
+    best = {}
+    for index in range(count):
+        platform, encoding, language, name_id, length, offset = struct.unpack_from(
+            ">HHHHHH", data, start + 6 + 12 * index
+        )
+        if name_id not in wanted:
+            continue
+
+        rank = _PLATFORM_RANK.get((platform, language), _PLATFORM_RANK.get(platform))
+        if rank is None or (platform == 1 and (encoding, language) != (0, 0)):
+            continue
+        if name_id in best and best[name_id][0] <= rank:
+            continue
+
+        raw = data[strings_at + offset:strings_at + offset + length]
+        text = raw.decode("mac_roman" if platform == 1 else "utf-16-be", errors="replace")
+        best[name_id] = (rank, text.strip())
+
+    return {name_id: text for name_id, (_, text) in best.items()}
+
+
+# (weight, italic) from OS/2, or from head.macStyle for fonts without it
+def _read_style(data, tables: dict) -> tuple[int, bool]:
+    if b"OS/2" in tables:
+        start = tables[b"OS/2"][0]
+        weight = struct.unpack_from(">H", data, start + 4)[0]
+        selection = struct.unpack_from(">H", data, start + 62)[0]
+
+        # A few old fonts use 1-9 instead of 100-900
+        if 0 < weight < 10:
+            weight *= 100
+        # ITALIC or OBLIQUE
+        return weight or 400, bool(selection & 0x201)
+
+    if b"head" in tables:
+        mac_style = struct.unpack_from(">H", data, tables[b"head"][0] + 44)[0]
+        return (700 if mac_style & 1 else 400), bool(mac_style & 2)
+
+    return 400, False
@@ -0,0 +1,292 @@
+import os
+import json
+import shutil
+
+from kivy.core.text import LabelBase
+
+from app.services.font_metadata import FontMetadata, read_metadata
+from app.services.font_styles import FONT_EXTENSIONS, classify, pick_classified, style_from_metadata
+from app.services.io_utils import write_json_atomic
+from app.services.sfnt import FontFormatError
+
+
+MANIFEST_VERSION = 3
+
+
+# Keeps an on-disk manifest of user fonts so the fonts folder is not
+# rescanned on every load, import, delete or dropdown open.
+#
+# Manifest layout:
+#   {
+#     "version": 3,
+#     "mtime": <fonts_path mtime>,
+#     "fonts": {
+#       "<folder>": {
+#         "mtime": <folder mtime>,
+#         "family": "<family name of the regular style>",
+#         "styles": {"fn_regular": "<path>", ...},
+#         "files": {"<filename>": [<mtime>, <size>, <metadata or null>], ...}
+#       }
+#     }
+#   }
+#
+# Styles and names come from each file's own metadata (name and OS/2
+# tables), read once per file and kept until its mtime or size changes.
+# Filenames are only used for files whose metadata can't be read.
+#
+# Fonts are only registered with LabelBase when they are selected.
+class FontRegistry:
+    def __init__(self, fonts_path: str, manifest_path: str):
+        self.fonts_path = fonts_path
+        self.manifest_path = manifest_path
+        self.fonts = {}
+        self._registered = set()
+        self._root_mtime = None
+
+        # Bumped whenever the fonts change, so callers can cache what they
+        # build from them (e.g. the font picker's items)
+        self.version = 0
+        self._display_names = None
+
+
+    #-----------------------------
+    # LOAD / VALIDATE
+    #-----------------------------
+
+    # Loads the manifest and rescans only folders whose mtime changed
+    def load(self) -> None:
+        manifest = self._read_manifest()
+        self.fonts = manifest.get("fonts", {})
+        self._root_mtime = manifest.get("mtime")
+        self._changed()
+
+        if self.validate():
+            self.save()
+
+
+    # Brings the manifest in sync with the fonts folder.
+    # Returns True if anything changed.
+    def validate(self) -> bool:
+        root_mtime = self._mtime(self.fonts_path)
+        if root_mtime is None:
+            changed = bool(self.fonts)
+            self.fonts = {}
+            return changed
+
+        changed = False
+
+        # Folders were added or removed: list the root once
+        if root_mtime != self._root_mtime:
+            # Dot folders are not fonts (e.g. the font store)
+            folders = {
+                name for name in os.listdir(self.fonts_path)
+                if not name.startswith(".") and os.path.isdir(os.path.join(self.fonts_path, name))
+            }
+            for name in set(self.fonts) - folders:
+                del self.fonts[name]
+                changed = True
+            for name in folders - set(self.fonts):
+                changed |= self._scan_folder(name)
+            self._root_mtime = root_mtime
+            changed = True
+
+        # Files inside a known folder changed: rescan that folder only
+        for name in list(self.fonts):
+            folder_mtime = self._mtime(os.path.join(self.fonts_path, name))
+            if folder_mtime is None:
+                del self.fonts[name]
+                changed = True
+            elif folder_mtime != self.fonts[name].get("mtime"):
+                self._scan_folder(name)
+                changed = True
+
+        if changed:
+            self._changed()
+        return changed
+
+
+    #-----------------------------
+    # INCREMENTAL UPDATES
+    #-----------------------------
+
+    # Adds or refreshes a single font folder
+    def add_font(self, name: str) -> bool:
+        found = self._scan_folder(name)
+        self._registered.discard(name)
+        self._root_mtime = self._mtime(self.fonts_path)
+        self._changed()
+        self.save()
+        return found
+
+
+    # Deletes every font folder in fonts_path, whether or not it is in the
+    # manifest, and empties the manifest. The font store and in-progress
+    # imports live in dot folders and are left alone.
+    # Returns (deleted, errors)
+    def remove_all(self) -> tuple[int, list[str]]:
+        deleted = 0
+        errors = []
+
+        names = os.listdir(self.fonts_path) if os.path.isdir(self.fonts_path) else []
+        for name in names:
+            font_dir = os.path.join(self.fonts_path, name)
+            if name.startswith(".") or not os.path.isdir(font_dir):
+                continue
+
+            try:
+                shutil.rmtree(font_dir)
+                deleted += 1
+            except Exception:
+                errors.append(name)
+                continue
+            self._registered.discard(name)
+
+        # Manifest entries whose folders are gone
+        for name in list(self.fonts):
+            if name not in errors:
+                del self.fonts[name]
+
+        self._root_mtime = self._mtime(self.fonts_path)
+        self._changed()
+        self.save()
+        return deleted, errors
+
+
+    #-----------------------------
+    # QUERIES
+    #-----------------------------
+
+    # Returns {font name: display name} of all fonts, sorted by display
+    # name case-insensitively. Display names are the fonts' family names;
+    # the folder is added when two folders hold the same family.
+    # Built once per version; don't modify the returned dict.
+    def get_fonts(self) -> dict[str, str]:
+        if self._display_names is not None:
+            return self._display_names
+
+        families = {}
+        for name, entry in self.fonts.items():
+            family = entry.get("family") or name.replace("_", " ")
+            families.setdefault(family, []).append(name)
+
+        fonts = {}
+        for family, names in families.items():
+            for name in names:
+                fonts[name] = family if len(names) == 1 else f"{family} ({name.replace('_', ' ')})"
+        self._display_names = dict(sorted(fonts.items(), key=lambda item: item[1].lower()))
+        return self._display_names
+
+
+    # Registers a font with LabelBase the first time it is used.
+    # Returns False if the font is not a user font (e.g. built-in Roboto).
+    def register(self, name: str) -> bool:
+        if name in self._registered:
+            return True
+
+        entry = self.fonts.get(name)
+        if not entry or "fn_regular" not in entry.get("styles", {}):
+            return False
+
+        LabelBase.register(name=name, **entry["styles"])
+        self._registered.add(name)
+        return True
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    # Lists one folder and stores its style map. Returns True if it holds fonts.
+    # Metadata of files unchanged since the last scan is reused.
+    def _scan_folder(self, name: str) -> bool:
+        folder_path = os.path.join(self.fonts_path, name)
+        known = self.fonts.get(name, {}).get("files", {})
+        files = {}
+
+        try:
+            entries = list(os.scandir(folder_path))
+        except OSError:
+            self.fonts.pop(name, None)
+            return False
+
+        classified = []
+        families = {}
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(FONT_EXTENSIONS):
+                continue
+
+            stat = entry.stat()
+            cached = known.get(entry.name)
+            if cached and len(cached) == 3 and cached[:2] == [stat.st_mtime, stat.st_size]:
+                metadata = cached[2]
+            else:
+                metadata = self._read_metadata(entry.path)
+            files[entry.name] = [stat.st_mtime, stat.st_size, metadata]
+
+            if metadata:
+                metadata = FontMetadata(*metadata)
+                families[entry.path] = metadata.family
+                classified.append((style_from_metadata(metadata), entry.path))
+            else:
+                classified.append((classify(entry.name), entry.path))
+
+        styles = pick_classified(classified, preferred_family=name)
+
+        # LabelBase needs at least a regular style
+        if "fn_regular" not in styles:
+            self.fonts.pop(name, None)
+            return False
+
+        self.fonts[name] = {
+            "mtime": self._mtime(folder_path),
+            "family": families.get(styles["fn_regular"]),
+            "styles": styles,
+            "files": files,
+        }
+        return True
+
+
+    # Metadata of one font file as a list (JSON-friendly), or None if the
+    # file can't be read as a font
+    def _read_metadata(self, path: str) -> list | None:
+        try:
+            return list(read_metadata(path))
+        except (OSError, FontFormatError) as e:
+            print(f"Warning: Cannot read font metadata of {path}: {e}")
+            return None
+
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._display_names = None
+
+
+    def _mtime(self, path: str) -> float | None:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest
+
+
+    # Writes the manifest atomically
+    def save(self) -> None:
+        try:
+            write_json_atomic(self.manifest_path, {
+                "version": MANIFEST_VERSION,
+                "mtime": self._root_mtime,
+                "fonts": self.fonts,
+            }, indent=None)
+        except OSError as e:
+            print(f"Warning: Failed to save font manifest: {e}")
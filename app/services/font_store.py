@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from app.services.io_utils import write_json_atomic
+
+
+STORE_DIR = ".store"
+
+# Imported ZIPs by font name: {"<font name>": "<archive key>"}
+IMPORTS_FILE = "imports.json"
+
+# Seconds after which a partly written file is left over from a crash
+STALE_TMP_AGE = 3600
+
+
+# Stores each distinct font file once, named by the hash of its content.
+#
+# Font folders under fonts_path hold hard links to the stored files, so
+# everything reading fonts (the registry, LabelBase, glyph coverage) sees
+# ordinary files while a file shared by several families, or imported
+# twice, takes its space once. Where hard links are not supported (e.g.
+# FAT-formatted storage), checked once per store, the store is not used:
+# files are written straight into their folders as before.
+#
+# A stored file whose only link is the store's own is unused;
+# collect_garbage() deletes those after folders are replaced or deleted.
+#
+#   fonts_path/
+#     .store/<blake2b>.ttf
+#     .store/imports.json
+#     Lora/Lora-Regular.ttf  -> link to .store/<blake2b>.ttf
+class FontStore:
+    def __init__(self, fonts_path: str):
+        self.fonts_path = fonts_path
+        self.store_path = os.path.join(fonts_path, STORE_DIR)
+        self._lock = threading.Lock()
+        self._links_supported = None
+
+
+    #-----------------------------
+    # FILES
+    #-----------------------------
+
+    # Copies a file-like object into the store chunk by chunk, hashing it
+    # on the way, and links target to the stored file. An identical file
+    # already in the store is reused. Returns the stored path, or target
+    # if it was written directly (no link support).
+    # :param on_chunk: called with the size of each chunk (may raise to cancel)
+    def add(self, source, target: str, chunk_size: int, on_chunk=None) -> str:
+        if not self.links_supported():
+            _copy(source, target, chunk_size, on_chunk)
+            return target
+
+        digest = hashlib.blake2b(digest_size=16)
+        tmp_path = os.path.join(self.store_path, f"{uuid.uuid4().hex}.tmp")
+
+        try:
+            _copy(source, tmp_path, chunk_size, on_chunk, digest)
+
+            extension = os.path.splitext(target)[1].lower()
+            path = os.path.join(self.store_path, digest.hexdigest() + extension)
+
+            # Linked before collect_garbage() can see the file unused
+            with self._lock:
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                else:
+                    os.replace(tmp_path, path)
+                if os.path.exists(target):
+                    os.remove(target)
+                os.link(path, target)
+            return path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+    # Deletes stored files no font folder links to any more, and import
+    # records of deleted folders. Returns (files, bytes) freed.
+    def collect_garbage(self) -> tuple[int, int]:
+        files = freed = 0
+        with self._lock:
+            try:
+                entries = list(os.scandir(self.store_path))
+            except OSError:
+                return 0, 0
+
+            for entry in entries:
+                if entry.name == IMPORTS_FILE or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    if time.time() - stat.st_mtime < STALE_TMP_AGE:
+                        continue  # an import may still be writing it
+                elif stat.st_nlink > 1:
+                    continue
+                try:
+                    os.remove(entry.path)
+                    files += 1
+                    freed += stat.st_size
+                except OSError as e:
+                    print(f"Warning: Failed to delete unused font file: {e}")
+
+            imports = self._read_imports()
+            kept = {
+                name: key for name, key in imports.items()
+                if os.path.isdir(os.path.join(self.fonts_path, name))
+            }
+            if kept != imports:
+                self._write_imports(kept)
+
+        return files, freed
+
+
+    #-----------------------------
+    # IMPORTS
+    #-----------------------------
+
+    # Identifies a ZIP's font members by name, CRC and size, all read from
+    # the archive's directory: nothing is decompressed
+    def archive_key(self, infos) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for info in sorted(infos, key=lambda info: info.filename):
+            digest.update(f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+
+    # True if font_name was imported from an archive with this key and its
+    # folder is still there
+    def is_imported(self, font_name: str, key: str) -> bool:
+        with self._lock:
+            imported = self._read_imports().get(font_name) == key
+        return imported and os.path.isdir(os.path.join(self.fonts_path, font_name))
+
+
+    def set_imported(self, font_name: str, key: str) -> None:
+        with self._lock:
+            imports = self._read_imports()
+            imports[font_name] = key
+            self._write_imports(imports)
+
+
+    #-----------------------------
+    # USAGE
+    #-----------------------------
+
+    # Disk use of the font folders:
+    #   files         font files in all folders
+    #   stored        distinct files in the store
+    #   bytes         size of all folder files, as if each were separate
+    #   stored_bytes  size actually used by the store
+    #   saved_bytes   bytes minus stored_bytes
+    def usage(self) -> dict:
+        files = size = 0
+        stored = {}
+        try:
+            folders = [
+                entry.path for entry in os.scandir(self.fonts_path)
+                if entry.is_dir() and not entry.name.startswith(".")
+            ]
+        except OSError:
+            folders = []
+
+        for folder in folders:
+            for entry in os.scandir(folder):
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                files += 1
+                size += stat.st_size
+                stored[(stat.st_dev, stat.st_ino)] = stat.st_size
+
+        stored_bytes = sum(stored.values())
+        return {
+            "files": files,
+            "stored": len(stored),
+            "bytes": size,
+            "stored_bytes": stored_bytes,
+            "saved_bytes": size - stored_bytes,
+        }
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    # True if font folders can hard-link to the store. Checked once by
+    # linking a probe file.
+    def links_supported(self) -> bool:
+        with self._lock:
+            if self._links_supported is None:
+                os.makedirs(self.store_path, exist_ok=True)
+                probe = os.path.join(self.store_path, f"{uuid.uuid4().hex}.tmp")
+                link = os.path.join(self.fonts_path, f".{uuid.uuid4().hex}.tmp")
+                try:
+                    open(probe, "wb").close()
+                    os.link(probe, link)
+                    self._links_supported = True
+                except OSError:
+                    print("Warning: Hard links are not supported here; font files are not deduplicated")
+                    self._links_supported = False
+                finally:
+                    for path in (probe, link):
+                        if os.path.exists(path):
+                            os.remove(path)
+            return self._links_supported
+
+
+    def _read_imports(self) -> dict:
+        try:
+            with open(os.path.join(self.store_path, IMPORTS_FILE), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+
+    def _write_imports(self, imports: dict) -> None:
+        try:
+            write_json_atomic(os.path.join(self.store_path, IMPORTS_FILE), imports, indent=None)
+        except OSError as e:
+            print(f"Warning: Failed to save font imports: {e}")
+
+
+# Copies a file-like object to path chunk by chunk
+def _copy(source, path: str, chunk_size: int, on_chunk=None, digest=None) -> None:
+    with open(path, "wb") as dest:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            if digest:
+                digest.update(chunk)
+            dest.write(chunk)
+            if on_chunk:
+                on_chunk(len(chunk))
@@ -0,0 +1,145 @@
+import re
+from typing import NamedTuple
+
+
+FONT_EXTENSIONS = (".ttf", ".otf")
+
+# LabelBase style slots and the (weight, italic) they stand for
+STYLE_SLOTS = {
+    "fn_regular": (400, False),
+    "fn_bold": (700, False),
+    "fn_italic": (400, True),
+    "fn_bolditalic": (700, True),
+}
+
+WEIGHT_NAMES = {
+    "thin": 100, "hairline": 100,
+    "extralight": 200, "ultralight": 200,
+    "light": 300,
+    "regular": 400, "normal": 400, "book": 400,
+    "medium": 500,
+    "semibold": 600, "demibold": 600,
+    "bold": 700,
+    "extrabold": 800, "ultrabold": 800,
+    "black": 900, "heavy": 900,
+}
+
+# Variable font suffix: "Inter[wght]", "Inter[slnt,wght]", "Inter-VariableFont_wght"
+_VARIABLE_RE = re.compile(r"(?:\[[^\]]*\]|[-_ ]?variable(?:font)?(?:[-_ ][a-z,]+)?)$")
+
+# Trailing style token: "-Bold", "_SemiBold Italic", " 700italic", "-Oblique"
+_STYLE_RE = re.compile(
+    r"[-_ ]"
+    r"(?P<weight>"
+    r"thin|hairline|(?:extra|ultra)[-_ ]?light|light|regular|normal|book|medium|"
+    r"(?:semi|demi)[-_ ]?bold|(?:extra|ultra)[-_ ]?bold|bold|black|heavy|[1-9]00"
+    r")?"
+    r"[-_ ]?(?P<italic>italic|oblique)?$"
+)
+
+
+class FontStyle(NamedTuple):
+    family: str
+    weight: int
+    italic: bool
+    variable: bool
+
+
+# Maps a font filename to (family, weight, italic, variable).
+# Returns None for anything that is not a .ttf/.otf file or a .ttc/.otc
+# collection (named like single fonts: "NotoSansCJK-Regular.ttc").
+def classify(filename: str) -> FontStyle | None:
+    # Plain string ops first; this runs once per file in every scan
+    name = filename.lower()
+    name = name[max(name.rfind("/"), name.rfind("\\")) + 1:]
+    stem, _, ext = name.rpartition(".")
+    if ext not in ("ttf", "otf", "ttc", "otc") or not stem or stem[0] == ".":
+        return None
+
+    variable = False
+    if "[" in stem or "variable" in stem:
+        match = _VARIABLE_RE.search(stem)
+        if match:
+            variable = True
+            stem = stem[:match.start()]
+
+    weight = 400
+    italic = False
+
+    match = _STYLE_RE.search(stem)
+    if match and match.end() > match.start() + 1:
+        token, italic = match.group("weight", "italic")
+        if token:
+            token = _compact(token)
+            weight = int(token) if token.isdigit() else WEIGHT_NAMES[token]
+        italic = bool(italic)
+        stem = stem[:match.start()]
+
+    return FontStyle(_compact(stem), weight, italic, variable)
+
+
+# FontStyle from a font's own metadata (see font_metadata.read_metadata)
+def style_from_metadata(metadata) -> FontStyle:
+    return FontStyle(_compact(metadata.family), metadata.weight, metadata.italic, metadata.variable)
+
+
+# Picks the best file for each LabelBase slot in a single pass.
+# :param entries: iterable of (filename, value); value is returned per slot
+# :param preferred_family: family to use when several are present
+# Returns {"fn_regular": value, ...}; empty if no regular style was found.
+def pick_styles(entries, preferred_family: str = None) -> dict:
+    return pick_classified(
+        ((classify(filename), value) for filename, value in entries),
+        preferred_family
+    )
+
+
+# pick_styles() for fonts whose FontStyle is already known, e.g. from
+# their metadata. Entries with a None style are skipped.
+def pick_classified(entries, preferred_family: str = None) -> dict:
+    families = {}
+
+    for style, value in entries:
+        if style is None:
+            continue
+
+        slots = families.setdefault(style.family, {})
+        for slot, (weight, italic) in STYLE_SLOTS.items():
+            if style.italic != italic:
+                continue
+
+            # Exact static weight beats a variable font beats the nearest weight.
+            # Variable fonts only fill the regular slots; LabelBase can't pick
+            # their bold instance, so bold is left to Kivy's synthetic bold.
+            if style.variable:
+                if weight != 400:
+                    continue
+                score = 1
+            elif style.weight == weight:
+                score = 0
+            elif abs(style.weight - weight) <= 100:
+                score = 2
+            else:
+                continue
+
+            if slot not in slots or score < slots[slot][0]:
+                slots[slot] = (score, value)
+
+    candidates = [
+        family for family, slots in families.items() if "fn_regular" in slots
+    ]
+    if not candidates:
+        return {}
+
+    preferred = _compact(preferred_family or "")
+    family = preferred if preferred in candidates else min(candidates, key=len)
+    return {slot: value for slot, (_, value) in families[family].items()}
+
+
+# Family names compare ignoring case, spaces, dashes and underscores
+def family_key(name: str) -> str:
+    return _compact(name)
+
+
+def _compact(name: str) -> str:
+    return name.lower().replace("-", "").replace("_", "").replace(" ", "")
@@ -0,0 +1,384 @@
+import bisect
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from app.services.io_utils import write_json_atomic
+from app.services.sfnt import FontFormatError, map_font, table_directory
+
+
+INDEX_VERSION = 1
+
+# cmap subtables by preference as (platform, encoding): full Unicode first
+CMAP_PREFERENCE = ((3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0), (3, 0))
+
+# Fallback chains remembered per (primary font, missing characters)
+MAX_CACHED_CHAINS = 256
+
+# Kivy markup tags, left alone by fallback_markup()
+_TAG_RE = re.compile(r"(\[[^\[\]]*\])")
+
+
+# Which characters each font has a glyph for, from the fonts' cmap tables.
+#
+# Each font file is memory-mapped and only its table directory and cmap
+# subtable are read, so indexing a large CJK font touches a few pages, not
+# the whole file. Coverage is stored as merged code point ranges, keyed by
+# file_key() (a hash of the table directory, which holds a checksum of
+# every table), and persisted in index_path: a font is only parsed again
+# when its file changes.
+#
+# Lookups bisect the ranges after a 256-code-point page bitmask has ruled
+# out fonts with nothing in that page. update() runs on a worker thread
+# and swaps in the new state at the end; the queries are for the main
+# thread.
+class GlyphCoverage:
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.stats = {"parsed": 0, "cached": 0, "failed": 0, "seconds": 0.0}
+
+        # file key -> flat [start, end, start, end, ...] list
+        self._entries = {}
+        # (name -> _Coverage, page -> names with glyphs in that page,
+        # chain cache, code point -> names with its glyph), replaced as a
+        # whole by update()
+        self._state = ({}, {}, OrderedDict(), {})
+        self._update_lock = threading.Lock()
+
+
+    # Reads the persisted index
+    def load(self) -> None:
+        try:
+            with open(self.index_path, "r") as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if index.get("version") == INDEX_VERSION:
+            self._entries = index.get("fonts", {})
+
+
+    # Indexes the given fonts, parsing only files not in the index yet.
+    # Blocking; call from a worker thread.
+    # :param fonts: {font name: file path}
+    def update(self, fonts: dict[str, str]) -> dict:
+        with self._update_lock:
+            return self._update(fonts)
+
+
+    def _update(self, fonts: dict[str, str]) -> dict:
+        start = time.perf_counter()
+        stats = {"parsed": 0, "cached": 0, "failed": 0}
+        entries = {}
+        coverage = {}
+
+        for name, path in fonts.items():
+            try:
+                key = file_key(path)
+                ranges = entries.get(key) or self._entries.get(key)
+                if ranges is None:
+                    ranges = [value for pair in read_coverage(path) for value in pair]
+                    stats["parsed"] += 1
+                else:
+                    stats["cached"] += 1
+            except (OSError, ValueError, FontFormatError, struct.error) as e:
+                print(f"Warning: Cannot read glyph coverage of {path}: {e}")
+                stats["failed"] += 1
+                continue
+
+            entries[key] = ranges
+            coverage[name] = _Coverage(path, ranges)
+
+        page_fonts = {}
+        for name, font in coverage.items():
+            for page in font.page_list:
+                page_fonts.setdefault(page, []).append(name)
+
+        changed = entries.keys() != self._entries.keys()
+        self._entries = entries
+        self._state = (coverage, page_fonts, OrderedDict(), {})
+
+        if changed:
+            try:
+                write_json_atomic(self.index_path, {"version": INDEX_VERSION, "fonts": entries}, indent=None)
+            except OSError as e:
+                print(f"Warning: Failed to save glyph coverage index: {e}")
+
+        stats["seconds"] = time.perf_counter() - start
+        self.stats = stats
+        return stats
+
+
+    def fonts(self) -> list[str]:
+        return list(self._state[0])
+
+
+    # True if the font has a glyph for every character of text that needs one
+    def covers(self, font_name: str, text: str) -> bool:
+        return not self.missing(font_name, text)
+
+
+    # Code points of text the font has no glyph for. Unknown fonts miss all.
+    def missing(self, font_name: str, text: str) -> set[int]:
+        return _missing(self._state[0], font_name, text)
+
+
+    # Fonts to render text with: the primary font first, then fonts
+    # covering what it misses, fewest first. Characters no font has are
+    # left to the primary font.
+    def fallback_chain(self, text: str, primary: str) -> list[str]:
+        fonts, page_fonts, chains, holders = self._state
+        missing = frozenset(_missing(fonts, primary, text))
+        if not missing:
+            return [primary]
+
+        key = (primary, missing)
+        chain = chains.get(key)
+        if chain is not None:
+            chains.move_to_end(key)
+            return chain
+
+        # Missing characters grouped by the fonts that have them; only
+        # fonts with something in a character's page are tested
+        groups = {}
+        for code in missing:
+            names = holders.get(code)
+            if names is None:
+                names = holders[code] = frozenset(
+                    name for name in page_fonts.get(code >> 8, ()) if fonts[name].has(code)
+                )
+            if names:
+                groups[names] = groups.get(names, 0) + 1
+
+        # Greedy set cover: one font for everything left if there is one,
+        # else the font showing the most of it
+        chain = [primary]
+        while groups:
+            common = frozenset.intersection(*groups)
+            if common:
+                chain.append(min(common))
+                break
+
+            counts = {}
+            for names, count in groups.items():
+                for name in names:
+                    counts[name] = counts.get(name, 0) + count
+            best = min(counts, key=lambda name: (-counts[name], name))
+            chain.append(best)
+            groups = {names: count for names, count in groups.items() if best not in names}
+
+        chains[key] = chain
+        if len(chains) > MAX_CACHED_CHAINS:
+            chains.popitem(last=False)
+        return chain
+
+
+    # Kivy markup for text in the primary font, with runs the primary font
+    # can't show wrapped in [font=...] of a fallback font. Existing markup
+    # tags are kept.
+    def fallback_markup(self, text: str, primary: str) -> str:
+        chain = self.fallback_chain(_TAG_RE.sub("", text), primary)
+        if len(chain) == 1:
+            return text
+
+        fonts = self._state[0]
+        fallbacks = [fonts[name] for name in chain[1:] if name in fonts]
+        primary_font = fonts.get(primary)
+        parts = []
+        for part in _TAG_RE.split(text):
+            if part.startswith("[") and part.endswith("]"):
+                parts.append(part)
+                continue
+
+            run_font, run = None, []
+            for char in part:
+                code = ord(char)
+                if code in _IGNORED:
+                    font = run_font  # spaces join the current run
+                elif primary_font and primary_font.has(code):
+                    font = None
+                else:
+                    font = next((fallback for fallback in fallbacks if fallback.has(code)), None)
+
+                if font is not run_font and run:
+                    parts.append(_wrap("".join(run), run_font))
+                    run = []
+                run_font = font
+                run.append(char)
+            if run:
+                parts.append(_wrap("".join(run), run_font))
+        return "".join(parts)
+
+
+# Fast membership test over one font's merged ranges
+class _Coverage:
+    def __init__(self, path: str, ranges: list[int]):
+        self.path = path
+        self.starts = ranges[0::2]
+        self.ends = ranges[1::2]
+
+        pages = set()
+        for start, end in zip(self.starts, self.ends):
+            pages.update(range(start >> 8, (end >> 8) + 1))
+        self.page_list = sorted(pages)
+        self.pages = sum(1 << page for page in pages)
+
+
+    def has(self, code: int) -> bool:
+        if not (self.pages >> (code >> 8)) & 1:
+            return False
+        index = bisect.bisect_right(self.starts, code) - 1
+        return index >= 0 and code <= self.ends[index]
+
+
+# Identifies a font file's content from its size and table directory,
+# which holds a checksum of every table: a few hundred bytes are read
+# instead of the whole file.
+def file_key(path: str) -> str:
+    with open(path, "rb") as file:
+        header = file.read(12)
+        if header[:4] == b"ttcf":
+            offset = struct.unpack(">I", file.read(4))[0]
+            file.seek(offset)
+            header = file.read(12)
+        if len(header) < 12:
+            raise FontFormatError("file too short")
+
+        num_tables = struct.unpack_from(">H", header, 4)[0]
+        directory = file.read(16 * num_tables)
+        size = os.fstat(file.fileno()).st_size
+
+    digest = hashlib.blake2b(header + directory, digest_size=16)
+    digest.update(size.to_bytes(8, "little"))
+    return digest.hexdigest()
+
+
+# Merged (start, end) code point ranges a TrueType/OpenType font (or the
+# first font of a collection) has glyphs for
+def read_coverage(path: str) -> list[tuple[int, int]]:
+    with map_font(path) as data:
+        return _merge(_read_cmap(data))
+
+
+#-----------------------------
+# INTERNAL
+#-----------------------------
+
+# Whitespace and controls need no glyph
+_IGNORED = frozenset(range(0x21)) | frozenset((0x7F, 0xA0, 0x200B, 0x200C, 0x200D, 0x2028, 0x2029, 0x3000, 0xFEFF))
+
+
+def _missing(fonts: dict, font_name: str, text: str) -> set[int]:
+    needed = {ord(char) for char in set(text)} - _IGNORED
+    font = fonts.get(font_name)
+    if font is None:
+        return needed
+    return {code for code in needed if not font.has(code)}
+
+
+def _wrap(text: str, font) -> str:
+    if font is None:
+        return text
+    return f"[font={font.path}]{text}[/font]"
+
+
+def _read_cmap(data) -> list[tuple[int, int]]:
+    cmap = table_directory(data).get(b"cmap")
+    if cmap is None:
+        raise FontFormatError("no cmap table")
+    cmap = cmap[0]
+
+    num_subtables = struct.unpack_from(">H", data, cmap + 2)[0]
+    subtables = {}
+    for index in range(num_subtables):
+        platform, encoding, offset = struct.unpack_from(">HHI", data, cmap + 4 + 8 * index)
+        subtables.setdefault((platform, encoding), cmap + offset)
+
+    for key in CMAP_PREFERENCE:
+        offset = subtables.get(key)
+        if offset is None:
+            continue
+        fmt = struct.unpack_from(">H", data, offset)[0]
+        reader = _FORMAT_READERS.get(fmt)
+        if reader:
+            return reader(data, offset)
+
+    raise FontFormatError("no supported Unicode cmap subtable")
+
+
+def _read_format_0(data, offset: int) -> list[tuple[int, int]]:
+    glyphs = data[offset + 6:offset + 6 + 256]
+    return [(code, code) for code, glyph in enumerate(glyphs) if glyph]
+
+
+def _read_format_4(data, offset: int) -> list[tuple[int, int]]:
+    seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    ends_at = offset + 14
+    starts_at = ends_at + 2 * seg_count + 2
+    deltas_at = starts_at + 2 * seg_count
+    range_offsets_at = deltas_at + 2 * seg_count
+
+    ends = struct.unpack_from(f">{seg_count}H", data, ends_at)
+    starts = struct.unpack_from(f">{seg_count}H", data, starts_at)
+    deltas = struct.unpack_from(f">{seg_count}H", data, deltas_at)
+    range_offsets = struct.unpack_from(f">{seg_count}H", data, range_offsets_at)
+
+    ranges = []
+    for index in range(seg_count):
+        start, end = starts[index], ends[index]
+        if start == 0xFFFF or start > end:
+            continue
+
+        range_offset = range_offsets[index]
+        if range_offset == 0:
+            ranges.append((start, end))
+            continue
+
+        # Glyph ids come from glyphIdArray; 0 means no glyph
+        glyphs_at = range_offsets_at + 2 * index + range_offset
+        glyphs = struct.unpack_from(f">{end - start + 1}H", data, glyphs_at)
+        for code, glyph in zip(range(start, end + 1), glyphs):
+            if glyph and (glyph + deltas[index]) & 0xFFFF:
+                ranges.append((code, code))
+    return ranges
+
+
+def _read_format_6(data, offset: int) -> list[tuple[int, int]]:
+    first, count = struct.unpack_from(">HH", data, offset + 6)
+    glyphs = struct.unpack_from(f">{count}H", data, offset + 10)
+    return [(first + index, first + index) for index, glyph in enumerate(glyphs) if glyph]
+
+
+# Format 12 (and 13, which maps each group to one glyph)
+def _read_format_12(data, offset: int) -> list[tuple[int, int]]:
+    num_groups = struct.unpack_from(">I", data, offset + 12)[0]
+    groups = struct.unpack_from(f">{3 * num_groups}I", data, offset + 16)
+
+    ranges = []
+    for index in range(0, len(groups), 3):
+        start, end, glyph = groups[index:index + 3]
+        if glyph == 0 and data[offset + 1] == 12:
+            start += 1  # first code maps to .notdef
+        if start <= end:
+            ranges.append((start, end))
+    return ranges
+
+
+_FORMAT_READERS = {0: _read_format_0, 4: _read_format_4, 6: _read_format_6,
+                   12: _read_format_12, 13: _read_format_12}
+
+
+def _merge(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
@@ -0,0 +1,16 @@
+import os
+import json
+
+
+# Writes data as JSON to path without ever leaving a half-written file
+def write_json_atomic(path: str, data, indent: int | None = 2) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,252 @@
+import re
+import sqlite3
+
+from kivy.clock import Clock
+from kivy.utils import escape_markup
+
+from app.services.diary_repository import DiaryRepository
+from app.services.entry_crypto import words
+
+
+PAGE_SIZE = 20
+
+# Title matches weigh more than body matches
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# Snippets are marked with control characters first, then escaped for
+# Kivy markup, then the markers become [b]...[/b]
+_HIT_START = "\x02"
+_HIT_END = "\x03"
+
+# "quoted phrases", words, and trailing * for prefixes
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+_WORD_SPAN_RE = re.compile(r"\w+")
+
+# Words shown around the first hit in snippets built from decrypted text
+SNIPPET_WORDS = 16
+
+# Ordering by FTS5's own rank column lets it sort internally and compute
+# snippets only for the rows of the requested page
+SEARCH_SQL = f"""
+    SELECT hits.id, e.entry_date, e.title, hits.snippet, hits.rank
+    FROM (
+        SELECT rowid AS id, rank,
+               snippet(entries_fts, 1, '{_HIT_START}', '{_HIT_END}', '…', 16) AS snippet
+        FROM entries_fts
+        WHERE entries_fts MATCH ? AND rank MATCH 'bm25({TITLE_WEIGHT}, {BODY_WEIGHT})'
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    ) AS hits
+    JOIN entries e ON e.id = hits.id
+    ORDER BY hits.rank
+"""
+
+# Encrypted diaries: the index only holds blind tokens, so snippets are
+# built from the decrypted bodies of the page's rows instead
+SEALED_SEARCH_SQL = f"""
+    SELECT hits.id, e.entry_date, e.title, e.body, e.nonce, hits.rank
+    FROM (
+        SELECT rowid AS id, rank
+        FROM entries_fts
+        WHERE entries_fts MATCH ? AND rank MATCH 'bm25({TITLE_WEIGHT}, {BODY_WEIGHT})'
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    ) AS hits
+    JOIN entries e ON e.id = hits.id
+    ORDER BY hits.rank
+"""
+
+
+# Full-text search over diary entries (SQLite FTS5 inside the diary db).
+#
+# The index is updated incrementally from DiaryRepository's write hook, in
+# the same transaction as the entry itself. Queries support prefixes
+# ("walk*", and the last word while typing), "quoted phrases", are ranked
+# by bm25 with titles weighted higher, and return snippets highlighted
+# with Kivy [b] markup.
+#
+# When the repository encrypts entries, the index stores keyed word tokens
+# (EntryCipher.blind_tokens) instead of text. Whole words and phrases
+# still match and rank the same way; prefix matching is not available.
+class SearchIndex:
+    def __init__(self, repository: DiaryRepository):
+        self.repository = repository
+        self.repository.write_hooks.append(self._on_write)
+        self.repository.bulk_insert_hooks.append(self._on_bulk_insert)
+        self._generation = 0
+
+
+    # Fetches one page. Result: [{"id", "entry_date", "title", "snippet", "rank"}]
+    def search(self, query: str, offset: int = 0, limit: int = PAGE_SIZE, callback=None):
+        return self.repository.submit(
+            lambda conn: self._query(conn, query, offset, limit),
+            callback
+        )
+
+
+    # Streams results page by page: on_page(results, done) is called on the
+    # main thread for each page. A new stream cancels the previous one.
+    # Other database work can run between pages.
+    def search_pages(self, query: str, on_page, page_size: int = PAGE_SIZE, max_pages: int = None):
+        self._generation += 1
+        generation = self._generation
+
+        def fetch(page):
+            def query_page(conn):
+                if generation != self._generation:
+                    return
+                results = self._query(conn, query, page * page_size, page_size)
+                done = len(results) < page_size or (max_pages and page + 1 >= max_pages)
+                Clock.schedule_once(lambda dt: deliver(results, done))
+                if not done:
+                    fetch(page + 1)
+
+            self.repository.submit(query_page)
+
+        def deliver(results, done):
+            if generation == self._generation:
+                on_page(results, done)
+
+        if query.strip():
+            fetch(0)
+        else:
+            Clock.schedule_once(lambda dt: deliver([], True))
+
+
+    # Stops delivering pages of the current stream
+    def cancel(self) -> None:
+        self._generation += 1
+
+
+    #-----------------------------
+    # INTERNAL (worker thread)
+    #-----------------------------
+
+    def _query(self, conn: sqlite3.Connection, query: str, offset: int, limit: int) -> list[dict]:
+        cipher = self.repository.cipher
+        match = build_match_query(query, cipher)
+        if not match:
+            return []
+
+        try:
+            rows = conn.execute(SEALED_SEARCH_SQL if cipher else SEARCH_SQL, (match, limit, offset)).fetchall()
+        except sqlite3.OperationalError:
+            return []  # query FTS5 can't parse
+
+        results = []
+        for row in rows:
+            if cipher:
+                entry = self.repository.open_row(row, cipher)
+                result = {
+                    "id": entry["id"],
+                    "entry_date": entry["entry_date"],
+                    "title": entry["title"],
+                    "snippet": make_snippet(entry["body"], set(words(query))),
+                    "rank": entry["rank"],
+                }
+            else:
+                result = dict(row)
+                result["snippet"] = highlight(result["snippet"])
+            results.append(result)
+        return results
+
+
+    # Keeps entries_fts in sync with saved and deleted entries
+    def _on_write(self, conn: sqlite3.Connection, saved: list[dict], deleted_ids: list[int]) -> None:
+        ids = [(entry["id"],) for entry in saved] + [(entry_id,) for entry_id in deleted_ids]
+        conn.executemany("DELETE FROM entries_fts WHERE rowid = ?", ids)
+        conn.executemany(
+            "INSERT INTO entries_fts (rowid, title, body) VALUES (?, ?, ?)",
+            [(entry["id"], *self._indexed_text(entry)) for entry in saved]
+        )
+
+
+    # Indexes all entries added by a bulk import in one statement. Entries
+    # saved normally meanwhile may already be indexed, so they go first.
+    def _on_bulk_insert(self, conn: sqlite3.Connection, first_id: int) -> None:
+        conn.execute("DELETE FROM entries_fts WHERE rowid >= ?", (first_id,))
+
+        if self.repository.cipher is None:
+            conn.execute(
+                "INSERT INTO entries_fts (rowid, title, body) "
+                "SELECT id, title, body FROM entries WHERE id >= ?",
+                (first_id,)
+            )
+            return
+
+        rows = conn.execute("SELECT * FROM entries WHERE id >= ?", (first_id,))
+        conn.executemany(
+            "INSERT INTO entries_fts (rowid, title, body) VALUES (?, ?, ?)",
+            ((row["id"], *self._indexed_text(self.repository.open_row(row))) for row in rows)
+        )
+
+
+    # (title, body) as written to the index: blind tokens when encrypting
+    def _indexed_text(self, entry: dict) -> tuple[str, str]:
+        cipher = self.repository.cipher
+        if cipher is None:
+            return entry["title"], entry["body"]
+        return cipher.blind_tokens(entry["title"]), cipher.blind_tokens(entry["body"])
+
+
+# Turns user input into an FTS5 MATCH expression.
+# Every term is quoted so punctuation can't break the syntax; the last bare
+# word also matches as a prefix so results appear while typing. With a
+# cipher, words become blind tokens and prefixes can't be matched.
+def build_match_query(query: str, cipher=None) -> str:
+    terms = []
+    tokens = _TOKEN_RE.findall(query)
+
+    for index, (phrase, word) in enumerate(tokens):
+        if cipher:
+            tokens_text = cipher.blind_tokens(phrase or word)
+            if tokens_text:
+                terms.append(f'"{tokens_text}"')
+            continue
+
+        if phrase:
+            terms.append('"' + phrase.replace('"', '""') + '"')
+            continue
+
+        prefix = word.endswith("*") or index == len(tokens) - 1
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+
+    return " ".join(terms)
+
+
+# Converts FTS5 hit markers into Kivy markup, escaping everything else
+def highlight(snippet: str) -> str:
+    if not snippet:
+        return ""
+    return escape_markup(snippet).replace(_HIT_START, "[b]").replace(_HIT_END, "[/b]")
+
+
+# A SNIPPET_WORDS window of text around the first of the given words,
+# highlighted like FTS5 snippets
+def make_snippet(text: str, query_words: set[str]) -> str:
+    spans = [match.span() for match in _WORD_SPAN_RE.finditer(text)]
+    if not spans:
+        return ""
+
+    hits = {
+        index for index, (start, end) in enumerate(spans)
+        if set(words(text[start:end])) & query_words
+    }
+    first = max(0, min(hits, default=0) - SNIPPET_WORDS // 4)
+    last = min(len(spans), first + SNIPPET_WORDS) - 1
+
+    parts = ["…" if first > 0 else ""]
+    position = spans[first][0]
+    for index in range(first, last + 1):
+        start, end = spans[index]
+        word = text[start:end]
+        parts.append(text[position:start])
+        parts.append(f"{_HIT_START}{word}{_HIT_END}" if index in hits else word)
+        position = end
+    parts.append("…" if last < len(spans) - 1 else "")
+
+    return highlight("".join(parts))
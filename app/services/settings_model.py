@@ -0,0 +1,71 @@
+from kivy.event import EventDispatcher
+from kivy.properties import BoundedNumericProperty, OptionProperty, StringProperty
+from kivy.utils import hex_colormap
+
+
+THEME_STYLES = ["Light", "Dark"]
+
+# Palette names as shown in the colour menu
+PALETTES = sorted(name.capitalize() for name in hex_colormap)
+
+MIN_FONT_SIZE = 10
+MAX_FONT_SIZE = 50
+
+
+# User settings as typed, validated Kivy properties.
+#
+# Every field is its own property, so widgets (and KV rules) bind to the
+# fields they show and are only notified when one of those changes.
+# Properties keep their values in Kivy's per-instance storage, which makes
+# a read an attribute lookup and a write a typed, validated store.
+# Invalid values raise ValueError.
+#
+# Persistence goes through to_dict(), which only holds fields changed
+# from their defaults.
+class SettingsModel(EventDispatcher):
+    theme_style = OptionProperty("Light", options=THEME_STYLES)
+    primary_palette = OptionProperty("Blue", options=PALETTES)
+
+    # Registered font family; "" for the KivyMD default (Roboto)
+    font_name = StringProperty("")
+
+    # Body text size in sp
+    font_size = BoundedNumericProperty(16, min=MIN_FONT_SIZE, max=MAX_FONT_SIZE)
+
+    # Seconds between editor autosaves
+    autosave_interval = BoundedNumericProperty(2.0, min=0.5, max=60)
+
+    FIELDS = ("theme_style", "primary_palette", "font_name", "font_size", "autosave_interval")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._defaults = {name: getattr(self, name) for name in self.FIELDS}
+
+
+    # Sets fields from a dict (e.g. a settings file). Unknown keys and
+    # invalid values are skipped with a warning.
+    def update(self, values: dict) -> None:
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                print(f"Warning: Unknown setting ignored: {name}")
+                continue
+            try:
+                setattr(self, name, value)
+            except ValueError:
+                print(f"Warning: Invalid setting ignored: {name}={value!r}")
+
+
+    # Takes the current values as the defaults, e.g. after loading the
+    # shipped default settings
+    def set_defaults(self) -> None:
+        self._defaults = {name: getattr(self, name) for name in self.FIELDS}
+
+
+    # Fields that differ from their defaults
+    def to_dict(self) -> dict:
+        values = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value != self._defaults[name]:
+                values[name] = value
+        return values
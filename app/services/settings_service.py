@@ -1,21 +1,81 @@
 import os
 import json
-import zipfile
-import shutil
+import threading
+from contextlib import contextmanager
 
-from kivy.core.text import LabelBase
+from kivy.clock import Clock
 from kivy.metrics import sp
+from kivy.resources import resource_find
+from kivy.utils import platform
 from kivymd.app import MDApp
 
+from app.services.font_import import FontImportTask
+from app.services.font_registry import FontRegistry
+from app.services.font_store import FontStore
+from app.services.font_styles import classify
+from app.services.glyph_coverage import GlyphCoverage
+from app.services.io_utils import write_json_atomic
+from app.services.settings_model import SettingsModel
+
+
+# Seconds to wait after the last change before writing settings to disk
+SAVE_DEBOUNCE = 0.5
+
+# Where fallback fonts for scripts the selected font lacks are looked up
+SYSTEM_FONT_DIRS = {
+    "android": ["/system/fonts"],
+    "linux": ["/usr/share/fonts", "~/.local/share/fonts", "~/.fonts"],
+    "macosx": ["/System/Library/Fonts", "/Library/Fonts"],
+    "ios": ["/System/Library/Fonts"],
+    "win": [os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")],
+}
+
 
 class SettingsService:
-    def __init__(self):
+    # :param defer_fonts: if True, fonts are loaded later via load_fonts()
+    def __init__(self, defer_fonts: bool = False):
         self.default_path = "app/data/default_settings.json"
         self.user_path = "app/data/user_settings.json"
         self.fonts_path = "assets/fonts/"
-        self.settings = {}
+        self.settings = SettingsModel()
+        self.font_registry = FontRegistry(
+            self.fonts_path,
+            manifest_path="app/data/font_manifest.json"
+        )
+        # Font files by content hash; font folders link to them
+        self.font_store = FontStore(self.fonts_path)
+        
+        # Which characters each font can show; updated on a worker thread
+        # after fonts load or change. coverage_listeners are called on the
+        # main thread once it is up to date.
+        self.glyph_coverage = GlyphCoverage("app/data/glyph_coverage.json")
+        self.coverage_listeners = []
+        self._coverage_loaded = False
+        
+        # Write-behind persistence state
+        self.mutation_count = 0
+        self.flush_count = 0
+        self._saved_settings = {}
+        self._save_event = None
+        self._save_seq = 0
+        self._written_seq = 0
+        self._write_lock = threading.Lock()
+        self._loading = False
+        
+        # Theme changes waiting for the end of a batch(); theme_passes
+        # counts the passes that pushed changes into theme_cls
+        self.theme_passes = 0
+        self._batch_depth = 0
+        self._pending = set()
+        
+        # Called on the main thread before each pass pushes appearance
+        # changes into theme_cls (e.g. to drop cached label textures)
+        self.appearance_listeners = []
         
-        self.load()
+        # Any field change is persisted (debounced)
+        self.settings.bind(**{name: self._on_setting for name in SettingsModel.FIELDS})
+        
+        self.load(defer_fonts=defer_fonts)
     
     
     #-----------------------------
@@ -23,16 +83,28 @@ class SettingsService:
     #-----------------------------
     
     # Load default and user settings 
-    def load(self) -> None:
-        self.settings = self._load_json(self.default_path)
-        user_settings = self._load_json(self.user_path)
-        if user_settings:
-            self.settings.update(user_settings)
+    def load(self, defer_fonts: bool = False) -> None:
+        self._loading = True
+        self.settings.update(self._load_json(self.default_path))
+        self.settings.set_defaults()
+        self.settings.update(self._load_json(self.user_path))
+        self._loading = False
+            
+        # What is on disk now, so unchanged settings are never rewritten
+        self._saved_settings = self.settings.to_dict()
 
-        self._register_fonts()
-        self.apply_theme()
+        with self.batch():
+            self.apply_theme()
+            self.apply_font_size()
+            if not defer_fonts:
+                self.load_fonts()
+            
+            
+    # Loads the font manifest and applies the saved font
+    def load_fonts(self) -> None:
+        self.font_registry.load()
         self.apply_font()
-        self.apply_font_size()
+        self.update_glyph_coverage()
 
 
     # Helper to safely load a JSON file
@@ -49,7 +121,30 @@ class SettingsService:
     #-----------------------------
     # THEME  
     #-----------------------------
-     
+    
+    # Groups appearance changes into one transaction:
+    #
+    #     with settings_service.batch():
+    #         settings_service.apply_theme(theme_style="Dark")
+    #         settings_service.apply_font("Lora")
+    #         settings_service.apply_font_size(18)
+    #
+    # The settings model changes right away; theme_cls is updated in a
+    # single pass (one font_styles dispatch, so one re-layout) and settings
+    # are written once, when the outermost batch ends.
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._apply_pending()
+                if not self._loading:
+                    self.flush()
+    
+    
     # Apply theme to current running app
     def apply_theme(
         self, 
@@ -62,14 +157,10 @@ class SettingsService:
             return
             
         if theme_style:
-            self.settings["theme_style"] = theme_style
+            self.settings.theme_style = theme_style
         if primary_palette:
-            self.settings["primary_palette"] = primary_palette
-                        
-        app.theme_cls.theme_style = self.settings.get("theme_style", "Light")
-        app.theme_cls.primary_palette = self.settings.get("primary_palette", "Blue")
-      
-        self._save_user_settings()     
+            self.settings.primary_palette = primary_palette
+        self._apply("theme")
             
 
     # -----------------------------
@@ -83,29 +174,19 @@ class SettingsService:
             return
     
         # Use font from settings if not provided
-        font_name = (font_name.replace(" ", "_") if font_name else None) or self.settings.get("font_name", None)
+        # Also accepts a folder name written with spaces ("Open Sans")
+        if font_name and font_name not in self.font_registry.fonts:
+            font_name = font_name.replace(" ", "_")
+        font_name = font_name or self.settings.font_name
         if not font_name:
             return  # no font to apply
     
-        # Save font name to settings
-        self.settings["font_name"] = font_name
-       
-        # Apply font to all font styles
-        for style_name, style_def in app.theme_cls.font_styles.items():
-            # Skip icons
-            if style_name == "Icon":
-                continue
-            
-            # Update top-level font_name
-            style_def["font_name"] = font_name
+        # Register user font with LabelBase on first use
+        self.font_registry.register(font_name)
     
-            # Update sub-level sizes if they exist
-            for size_key in ("large", "medium", "small"):
-                if size_key in style_def and isinstance(style_def[size_key], dict):
-                    style_def[size_key]["font-name"] = font_name           
-    
-        # Save updated settings
-        self._save_user_settings()                     
+        # Save font name to settings
+        self.settings.font_name = font_name
+        self._apply("font")
     
     
     # Apply font size to app's theme manager    
@@ -114,247 +195,250 @@ class SettingsService:
         if not app:
             return
                 
-        # Use font size  from settings if not provided
-        font_size = font_size or self.settings.get("font_size", None)
-        if not font_size:
-            return  # no font size to apply
-    
-        # Save font size to settings
-        self.settings["font_size"] = font_size
-       
-        # Apply font to all "Body" -> "large" style
-        app.theme_cls.font_styles["Body"]["large"]["font-size"] = int(sp(font_size))
-    
-        # Save updated settings
-        self._save_user_settings()         
+        # Use font size from settings if not provided
+        if font_size:
+            self.settings.font_size = font_size
+        self._apply("font_size")
                  
     
-    # Deletes all uploaded fonts from fonts_path
+    # Deletes all uploaded fonts from fonts_path: the font folders (links
+    # only), then the stored files nothing links to any more
     def delete_all_fonts(self) -> str:
         if not os.path.isdir(self.fonts_path):
             return "Font directory not found."
     
-        deleted = 0
-        errors = []
-    
-        for name in os.listdir(self.fonts_path):
-            font_dir = os.path.join(self.fonts_path, name)
-    
-            # Only delete folders (fonts are stored as folders)
-            if not os.path.isdir(font_dir):
-                continue
-    
-            try:
-                shutil.rmtree(font_dir)
-                deleted += 1
-            except Exception:
-                errors.append(name)
-    
-        # Clear cached font list if you keep one
-        if hasattr(self, "fonts_fonts"):
-            self.fonts_fonts.clear()
+        deleted, errors = self.font_registry.remove_all()
+        _, freed = self.font_store.collect_garbage()
     
-        if deleted == 0:
+        if deleted == 0 and not errors:
             return "No fonts to delete."
     
         if errors:
             return f"Deleted {deleted} fonts. Failed: {', '.join(errors)}"
         
         self.apply_font(font_name="Roboto") 
-        self._register_fonts()
-        return f"Deleted {deleted} fonts successfully."
+        self.update_glyph_coverage()
+        return f"Deleted {deleted} fonts successfully ({freed / (1024 * 1024):.1f} MB freed)."
     
     
-    # Extracts a user-provided font ZIP into fonts_path    
+    # Extracts a user-provided font ZIP into fonts_path (blocking)
     def extract_font_zip(self, zip_path: str) -> str:
-        if not zipfile.is_zipfile(zip_path):
-            return "Invalid ZIP file"
-    
-        font_name = os.path.splitext(os.path.basename(zip_path))[0]
-        target_dir = os.path.join(self.fonts_path, font_name)
-        tmp_dir = target_dir + "_tmp"
+        message, font_name = FontImportTask(zip_path, self.fonts_path, store=self.font_store).run()
+        if font_name:
+            self.font_registry.add_font(font_name)
+            self.update_glyph_coverage()
+        return message
+    
+    
+    # Imports a font ZIP on a worker thread.
+    # :param on_progress: called with 0.0 .. 1.0 on the main thread
+    # :param on_done: called with the result message on the main thread
+    def import_font_zip(self, zip_path: str, on_progress=None, on_done=None) -> FontImportTask:
+        def _done(message, font_name):
+            if font_name:
+                self.font_registry.add_font(font_name)
+                self.update_glyph_coverage()
+            if on_done:
+                on_done(message)
+    
+        return FontImportTask(
+            zip_path,
+            self.fonts_path,
+            on_progress=on_progress,
+            on_done=_done,
+            store=self.font_store
+        ).start()
+                                  
         
-        shutil.rmtree(tmp_dir, ignore_errors=True)
-        os.makedirs(tmp_dir, exist_ok=True)
-    
-        try:
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(tmp_dir)
-    
-            # Find the actual font folder (might be nested)
-            font_folder = self._find_font_folder(tmp_dir, font_name)
-            if not font_folder:
-                shutil.rmtree(tmp_dir, ignore_errors=True)
-                return "No font files found in ZIP"
-    
-            # Find required regular font file
-            found_regular = self._find_file_by_style(font_folder, "regular")
-            if not found_regular:
-                shutil.rmtree(tmp_dir, ignore_errors=True)
-                return "Missing required file: *-Regular.ttf"
-    
-            # Find all style variants
-            styles = ["regular", "bold", "italic", "bolditalic"]
-            font_files = []
-            
-            for style in styles:
-                found_file = self._find_file_by_style(font_folder, style)
-                if found_file:
-                    font_files.append(found_file)
+    # Returns the current font size in sp; widgets bind to
+    # settings.font_size instead
+    def get_current_font_size(self) -> float:
+        return self.settings.font_size
     
-            # Create target directory and copy only font files
-            if os.path.exists(target_dir):
-                shutil.rmtree(target_dir)
-            os.makedirs(target_dir, exist_ok=True)
     
-            for font_file in font_files:
-                filename = os.path.basename(font_file)
-                shutil.copy2(font_file, os.path.join(target_dir, filename))
+    #-----------------------------
+    # GLYPH COVERAGE
+    #-----------------------------
     
-            # Cleanup temp directory
-            shutil.rmtree(tmp_dir, ignore_errors=True)
+    # Re-indexes the built-in, user and system fonts on a worker thread.
+    # Only fonts not in the saved index (new or changed files) are parsed.
+    def update_glyph_coverage(self) -> None:
+        fonts = self._coverage_sources()
+        
+        def _update():
+            fonts.update(self._system_fonts())
+            if not self._coverage_loaded:
+                self.glyph_coverage.load()
+                self._coverage_loaded = True
+            self.glyph_coverage.update(fonts)
+            Clock.schedule_once(lambda dt: self._coverage_updated())
+        
+        threading.Thread(target=_update, daemon=True).start()
     
-            self._register_fonts()
-            return f"Font successfully added: {font_name}"
     
-        except Exception as e:
-            shutil.rmtree(tmp_dir, ignore_errors=True)
-            return f"Font extraction failed: {e}"    
-                                  
-        
-    # Returns the current font size
-    def get_current_font_size(self) -> float:
-        app = MDApp.get_running_app() 
-        return int(app.theme_cls.font_styles["Body"]["large"]["font-size"] / sp(1))
+    # Kivy markup showing text in the selected font, with characters it
+    # has no glyph for (e.g. CJK in a Latin font) in a fallback font
+    def fallback_markup(self, text: str) -> str:
+        return self.glyph_coverage.fallback_markup(text, self.settings.font_name or "Roboto")
                                                                    
     # -----------------------------
     # INTERNAL
     # -----------------------------
     
-    # Case-insensitive search for filename in dirpath
-    def _ci_exists(self, dirpath: str, filename: str) -> str | None:
-        target_lower = filename.lower()
-        for root, _, files in os.walk(dirpath):
-            for f in files:
-                if f.lower() == target_lower:
-                    return os.path.join(root, f)
-        return None
-        
+    # Applies a part of the appearance ("theme", "font", "font_size") now,
+    # or when the current batch ends
+    def _apply(self, part: str) -> None:
+        self._pending.add(part)
+        if self._batch_depth == 0:
+            self._apply_pending()
+    
+    
+    # Pushes the settings model into theme_cls in one pass
+    def _apply_pending(self) -> None:
+        app = MDApp.get_running_app()
+        parts, self._pending = self._pending, set()
+        if not app or not parts:
+            return
         
-    # Returns a list of available font names (folders containing font files)
-    def get_fonts(self) -> list[str]:
-        if not os.path.exists(self.fonts_path):
-            return []
-    
-        font_names = []
-        for item in os.listdir(self.fonts_path):
-            item_path = os.path.join(self.fonts_path, item)
-            
-            if os.path.isdir(item_path):
-                # Include folder only if it contains at least one .ttf or .otf file
-                if any(f.lower().endswith((".ttf", ".otf")) for f in os.listdir(item_path)):
-                    display_name = item.replace("_", " ")
-                    font_names.append(display_name)
+        self.theme_passes += 1
+        settings = self.settings
         
-        # Sort the font names alphabetically (case-insensitive)
-        font_names.sort(key=str.lower)
-    
-        return font_names                
-
+        for listener in self.appearance_listeners:
+            listener()
         
-    # Find .ttf file matching style (e.g., 'regular', 'bold', 'italic'). Searches for common naming patterns without requiring font name.
-    def _find_file_by_style(self, dirpath: str, style: str) -> str | None:
-        style_lower = style.lower()
+        if "theme" in parts:
+            app.theme_cls.theme_style = settings.theme_style
+            app.theme_cls.primary_palette = settings.primary_palette
         
-        # Common style naming patterns
-        patterns = [
-            f"-{style}.ttf",
-            f"_{style}.ttf", 
-            f" {style}.ttf"
-        ]
+        if "font" not in parts and "font_size" not in parts:
+            return
         
-        for root, _, files in os.walk(dirpath):
-            for f in files:
-                lf = f.lower()
-                if not lf.endswith('.ttf'):
+        font_styles = app.theme_cls.font_styles
+        if "font" in parts and settings.font_name:
+            for style_name, style_def in font_styles.items():
+                # Skip icons
+                if style_name == "Icon":
                     continue
                 
-                # Check exact patterns only
-                for pattern in patterns:
-                    if lf.endswith(pattern):
-                        return os.path.join(root, f)
+                # Top-level font_name, and the sub-level sizes if they exist
+                style_def["font_name"] = settings.font_name
+                for size_key in ("large", "medium", "small"):
+                    if size_key in style_def and isinstance(style_def[size_key], dict):
+                        style_def[size_key]["font-name"] = settings.font_name
+        
+        # Font size applies to the "Body" -> "large" style
+        if "font_size" in parts:
+            font_styles["Body"]["large"]["font-size"] = int(sp(settings.font_size))
         
-        return None
+        # Bound widgets re-layout once for all font changes
+        self._dispatch_font_styles(app)
     
     
-        # Find the actual font folder inside extracted ZIP.
-    def _find_font_folder(self, tmp_dir: str, font_name: str) -> str | None:
-        font_name_lower = font_name.lower()
+    # font_styles is edited in place, which Kivy can't observe. Dispatching
+    # the property re-evaluates every KV rule bound to it, so open screens
+    # update without being rebuilt.
+    def _dispatch_font_styles(self, app) -> None:
+        app.theme_cls.property("font_styles").dispatch(app.theme_cls)
         
-        # Check if fonts are directly in tmp_dir
-        ttf_files = [f for f in os.listdir(tmp_dir) if f.lower().endswith('.ttf')]
-        if ttf_files:
-            return tmp_dir
-   
-             
-        # Search for subfolder matching font name
-        for item in os.listdir(tmp_dir):
-            item_path = os.path.join(tmp_dir, item)
-            if os.path.isdir(item_path) and font_name_lower in item.lower():
-                return item_path
         
-        # Fallback: find first folder containing .ttf files
-        for root, dirs, files in os.walk(tmp_dir):
-            if any(f.lower().endswith('.ttf') for f in files):
-                return root
+    # Returns {font name: display name} of the user fonts from the font manifest
+    def get_fonts(self) -> dict[str, str]:
+        return self.font_registry.get_fonts()
+    
+    
+    # {font name: file} of Roboto and the user fonts
+    def _coverage_sources(self) -> dict[str, str]:
+        fonts = {}
+        roboto = resource_find("data/fonts/Roboto-Regular.ttf")
+        if roboto:
+            fonts["Roboto"] = roboto
+        
+        for name, entry in self.font_registry.fonts.items():
+            regular = entry.get("styles", {}).get("fn_regular")
+            if regular:
+                fonts[name] = regular
+        return fonts
+    
+    
+    # {path: path} of the regular style of each system font; the path
+    # works as a font name in markup. Lists folders, so off the main thread.
+    def _system_fonts(self) -> dict[str, str]:
+        fonts = {}
+        for directory in SYSTEM_FONT_DIRS.get(platform, []):
+            for root, _, files in os.walk(os.path.expanduser(directory)):
+                for filename in files:
+                    style = classify(filename)
+                    if style and style.weight == 400 and not style.italic:
+                        path = os.path.join(root, filename)
+                        fonts[path] = path
+        return fonts
+    
+    
+    def _coverage_updated(self) -> None:
+        for listener in self.coverage_listeners:
+            listener()
+
         
-        return None    
-  
-                      
-    # Registers all fonts in fonts_path to Kivy's LabelBase.
-    def _register_fonts(self) -> None:
-        if not os.path.exists(self.fonts_path):
+    # Persists a changed field, except while the files are being loaded.
+    # A batch writes once when it ends.
+    def _on_setting(self, model, value) -> None:
+        if self._loading:
             return
+        if self._batch_depth:
+            self.mutation_count += 1
+        else:
+            self._save_user_settings()
     
-        for folder in os.listdir(self.fonts_path):
-            folder_path = os.path.join(self.fonts_path, folder)
-            if not os.path.isdir(folder_path):
-                continue
-    
-            # Prepare dict for LabelBase registration
-            font_files = {
-                "fn_regular": None,
-                "fn_bold": None,
-                "fn_italic": None,
-                "fn_bolditalic": None
-            }
-    
-            for file in os.listdir(folder_path):
-                if not file.lower().endswith((".ttf", ".otf")):
-                    continue
-    
-                file_path = os.path.join(folder_path, file)
-                lower_file = file.lower()
     
-                if "-regular" in lower_file:
-                    font_files["fn_regular"] = file_path
-                elif "-bolditalic" in lower_file:
-                    font_files["fn_bolditalic"] = file_path
-                elif "-bold" in lower_file:
-                    font_files["fn_bold"] = file_path
-                elif "-italic" in lower_file:
-                    font_files["fn_italic"] = file_path
+    # Marks settings as changed and (re)starts the debounced save.
+    def _save_user_settings(self) -> None:
+        self.mutation_count += 1
+        
+        if self._save_event:
+            self._save_event.cancel()
+        self._save_event = Clock.schedule_once(lambda dt: self.flush(), SAVE_DEBOUNCE)
     
-            # Only register if at least one font file is found
-            if any(font_files.values()):
-                LabelBase.register(
-                    name=folder,  # folder name as font name
-                    **{k: v for k, v in font_files.items() if v is not None}
-                )
     
+    #-----------------------------
+    # PERSISTENCE  
+    #-----------------------------
     
-    # Save current settings to user file.
-    def _save_user_settings(self) -> None:
-        os.makedirs(os.path.dirname(self.user_path), exist_ok=True)
-        with open(self.user_path, "w") as file:
-            json.dump(self.settings, file, indent=2)
+    # Writes pending changes to the user file.
+    # :param wait: if True, writes on the calling thread (used on pause/stop)
+    def flush(self, wait: bool = False) -> bool:
+        if self._save_event:
+            self._save_event.cancel()
+            self._save_event = None
+            
+        snapshot = self.settings.to_dict()
+        if snapshot == self._saved_settings:
+            return False  # nothing changed
+            
+        self._saved_settings = snapshot
+        self._save_seq += 1
+        self.flush_count += 1
+        
+        if wait:
+            self._write_settings(snapshot, self._save_seq)
+        else:
+            threading.Thread(
+                target=self._write_settings,
+                args=(snapshot, self._save_seq),
+                daemon=True
+            ).start()
+        return True
+    
+    
+    # Writes a settings snapshot atomically (temp file + os.replace).
+    def _write_settings(self, snapshot: dict, seq: int) -> None:
+        with self._write_lock:
+            # A newer snapshot has already been written
+            if seq <= self._written_seq:
+                return
+            
+            try:
+                write_json_atomic(self.user_path, snapshot)
+                self._written_seq = seq
+            except OSError as e:
+                print(f"Warning: Failed to save settings: {e}")
+                self._saved_settings = None  # retry on next flush
@@ -0,0 +1,41 @@
+import mmap
+import struct
+from contextlib import contextmanager
+
+
+class FontFormatError(Exception):
+    pass
+
+
+# Memory-maps a font file read-only. Tables are read in place, so only
+# the pages a reader touches are loaded from disk.
+@contextmanager
+def map_font(path: str):
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise FontFormatError("empty file")
+        with data:
+            yield data
+
+
+# {tag: (offset, length)} of a TrueType/OpenType font, or of the first
+# font of a collection (.ttc)
+def table_directory(data) -> dict[bytes, tuple[int, int]]:
+    try:
+        base = 0
+        if data[:4] == b"ttcf":
+            base = struct.unpack_from(">I", data, 12)[0]
+
+        version, num_tables = struct.unpack_from(">IH", data, base)
+        if version not in (0x00010000, 0x4F54544F, 0x74727565):  # 1.0, "OTTO", "true"
+            raise FontFormatError("not a TrueType/OpenType font")
+
+        tables = {}
+        for index in range(num_tables):
+            tag, _, offset, length = struct.unpack_from(">4sIII", data, base + 12 + 16 * index)
+            tables[tag] = (offset, length)
+        return tables
+    except struct.error:
+        raise FontFormatError("truncated table directory")
@@ -0,0 +1,239 @@
+import datetime
+import math
+
+from kivy.clock import Clock
+
+from app.services.diary_repository import DiaryRepository
+from app.services.entry_crypto import TAG_SIZE
+
+
+PAGE_SIZE = 50
+
+# Rows kept in memory; the far end is dropped as new pages arrive
+MAX_ROWS = 300
+
+MAX_PREVIEW_LINES = 3
+
+
+# Turns a list row into RecycleView data for a timeline row, with the
+# preview already shortened and the row height computed, so the main
+# thread only assigns values. Runs on the worker thread.
+#
+# Sealed rows stay sealed: their "title", "preview" and "nonce" are kept
+# and only rows being shown are decrypted, by open_row(). Their height
+# comes from the ciphertext size, which is at least the preview's length.
+#
+# :param metrics: pixel sizes measured on the main thread:
+#     {"width", "char_width", "line_height", "base_height"}
+#     base_height is the row without preview lines (padding, date, title)
+def make_row(entry: dict, metrics: dict) -> dict:
+    chars_per_line = max(1, int(metrics["width"] / metrics["char_width"]))
+    max_chars = chars_per_line * MAX_PREVIEW_LINES
+
+    date = datetime.date.fromisoformat(entry["entry_date"])
+    row = {
+        "entry_id": entry["id"],
+        "entry_date": entry["entry_date"],
+        "date_text": date.strftime("%a, %d %b %Y"),
+    }
+
+    if entry.get("nonce") is None:
+        preview = shorten_preview(entry["preview"], max_chars)
+        length = len(preview)
+        row["title_text"] = entry["title"] or "Untitled"
+        row["preview_text"] = preview
+    else:
+        length = min(max_chars, len(entry["preview"]) - TAG_SIZE)
+        row.update(nonce=entry["nonce"], title=entry["title"], preview=entry["preview"],
+                   max_chars=max_chars)
+
+    lines = min(MAX_PREVIEW_LINES, math.ceil(length / chars_per_line))
+    row["preview_height"] = lines * metrics["line_height"]
+    row["height"] = metrics["base_height"] + lines * metrics["line_height"]
+    return row
+
+
+# Display data of a make_row() row: sealed rows get their title and
+# preview decrypted through the cipher's bounded cache. Main thread.
+def open_row(repository: DiaryRepository, row: dict) -> dict:
+    if row.get("nonce") is None:
+        return row
+
+    title = repository.reveal(row, "title")
+    preview = repository.reveal(row, "preview")
+    return {
+        name: value for name, value in row.items()
+        if name not in ("nonce", "title", "preview", "max_chars")
+    } | {
+        "title_text": title or "Untitled",
+        "preview_text": shorten_preview(preview, row["max_chars"]),
+    }
+
+
+# Whitespace collapsed, cut to max_chars with an ellipsis
+def shorten_preview(text: str, max_chars: int) -> str:
+    preview = " ".join(text.split())
+    if len(preview) > max_chars:
+        preview = preview[:max_chars - 1].rstrip() + "…"
+    return preview
+
+
+# Pages the diary for a scrolling timeline, newest first.
+#
+# Pages are fetched by keyset (entry_date, id) in either direction and
+# prepared with make_row() on the worker thread. At most max_rows stay in
+# `rows`: loading older entries drops the newest ones and the other way
+# round, so memory stays flat however far the user scrolls. Rows of an
+# encrypted diary stay sealed in `rows`; open_row() decrypts the ones on
+# screen.
+#
+# Callbacks run on the main thread as callback(page, dropped), where
+# dropped are the rows removed from the opposite end.
+class TimelineSource:
+    def __init__(self, repository: DiaryRepository, page_size: int = PAGE_SIZE,
+                 max_rows: int = MAX_ROWS):
+        self.repository = repository
+        self.page_size = page_size
+        self.max_rows = max_rows
+
+        self.rows = []
+        self.metrics = None
+        self.has_older = False
+        self.has_newer = False
+        self.loading = False
+        self._generation = 0
+
+        # Called on the main thread after entries were written
+        self.change_listeners = []
+        repository.write_hooks.append(self._on_write)
+        repository.bulk_insert_hooks.append(lambda conn, first_id: self._on_write(conn, [], []))
+
+
+    # Starts over from the newest entry
+    def reload(self, callback) -> None:
+        self.clear()
+        self._fetch(None, None, lambda page: self._loaded_first(page, callback))
+
+
+    # Fetches the loaded rows again after entries changed, keeping the
+    # same window: from the first row down, or from the newest entry if
+    # the window is at the top. callback(page, dropped) gets the new rows
+    # and all the old ones.
+    def refresh(self, callback) -> None:
+        if not self.rows:
+            self.reload(callback)
+            return
+
+        # (entry_date, id) < (date, id + 1) includes the first row itself
+        first = self.rows[0]
+        after = (first["entry_date"], first["entry_id"] + 1) if self.has_newer else None
+        limit = max(self.page_size, len(self.rows))
+
+        self._generation += 1  # pages in flight were for the old rows
+        self._fetch(after, None, lambda page: self._loaded_refresh(page, limit, callback), limit)
+
+
+    # Forgets all rows (e.g. on lock) and ignores pages still in flight
+    def clear(self) -> None:
+        self._generation += 1
+        self.rows = []
+        self.has_older = False
+        self.has_newer = False
+        self.loading = False
+
+
+    # Returns False if there is nothing to load or a page is on its way
+    def load_older(self, callback) -> bool:
+        if not self.has_older or self.loading or not self.rows:
+            return False
+
+        last = self.rows[-1]
+        self._fetch((last["entry_date"], last["entry_id"]), None,
+                    lambda page: self._loaded_older(page, callback))
+        return True
+
+
+    def load_newer(self, callback) -> bool:
+        if not self.has_newer or self.loading or not self.rows:
+            return False
+
+        first = self.rows[0]
+        self._fetch(None, (first["entry_date"], first["entry_id"]),
+                    lambda page: self._loaded_newer(page, callback))
+        return True
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _fetch(self, after, before, on_page, limit: int = None) -> None:
+        self.loading = True
+        generation = self._generation
+        metrics = dict(self.metrics)
+        repository = self.repository
+        limit = limit or self.page_size
+
+        def query(conn):
+            try:
+                rows = repository.query_page(conn, after, limit, before)
+                return [make_row(row, metrics) for row in rows]
+            except Exception as e:
+                print(f"Warning: Timeline page failed: {e}")
+                return None
+
+        def deliver(page):
+            if generation != self._generation:
+                return
+            self.loading = False
+            if page is not None:
+                on_page(page)
+
+        repository.submit(query, deliver)
+
+
+    def _loaded_first(self, page: list[dict], callback) -> None:
+        self.rows = page
+        self.has_older = len(page) == self.page_size
+        callback(page, [])
+
+
+    def _loaded_refresh(self, page: list[dict], limit: int, callback) -> None:
+        dropped, self.rows = self.rows, page
+        self.has_older = len(page) == limit
+        callback(page, dropped)
+
+
+    def _loaded_older(self, page: list[dict], callback) -> None:
+        self.has_older = len(page) == self.page_size
+        self.rows.extend(page)
+
+        excess = len(self.rows) - self.max_rows
+        dropped = self.rows[:max(0, excess)]
+        if dropped:
+            del self.rows[:excess]
+            self.has_newer = True
+        callback(page, dropped)
+
+
+    def _loaded_newer(self, page: list[dict], callback) -> None:
+        self.has_newer = len(page) == self.page_size
+        self.rows[:0] = page
+
+        excess = len(self.rows) - self.max_rows
+        dropped = self.rows[len(self.rows) - excess:] if excess > 0 else []
+        if dropped:
+            del self.rows[-excess:]
+            self.has_older = True
+        callback(page, dropped)
+
+
+    # Worker thread: rows may have changed anywhere, the UI decides when
+    # to reload
+    def _on_write(self, conn, saved: list[dict], deleted_ids: list[int]) -> None:
+        Clock.schedule_once(lambda dt: self._notify())
+
+
+    def _notify(self) -> None:
+        for listener in self.change_listeners:
+            listener()
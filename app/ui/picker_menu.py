@@ -0,0 +1,76 @@
+from kivymd.uix.menu import MDDropdownMenu
+
+
+# A dropdown built once and reused on every open.
+#
+# MDDropdownMenu already renders its items through a RecycleView, so only
+# visible rows get widgets. What was slow was rebuilding the item dicts
+# (and a new menu) on every open. Here items are built once; opening only
+# moves the check mark, which is an O(1) lookup plus a RecycleView refresh.
+class PickerMenu:
+    def __init__(self, **menu_kwargs):
+        self.menu_kwargs = menu_kwargs
+        self.menu = None
+        self.items = []
+        self.key = None
+        self._index = {}
+        self._checked = None
+
+
+    # Replaces the items. Selectable items are keyed by their "text".
+    # :param key: a hashable describing the items; rebuilds only if it changed
+    def set_items(self, items: list[dict], key=None) -> None:
+        if key is not None and key == self.key:
+            return
+
+        self.key = key
+        self.items = items
+        self._checked = None
+        self._index = {
+            item["text"]: position
+            for position, item in enumerate(items) if "trailing_icon" in item
+        }
+
+        if self.menu:
+            self.menu.items = items
+
+
+    # Opens the menu under caller with a check mark next to checked
+    def open(self, caller, checked: str = None) -> None:
+        if not self.menu:
+            self._set_checked(checked)
+            self.menu = MDDropdownMenu(items=self.items, **self.menu_kwargs)
+        elif self._set_checked(checked) and self.menu.menu:
+            self.menu.menu.refresh_from_data()
+
+        self.menu.caller = caller
+        self.menu.open()
+
+
+    def dismiss(self) -> None:
+        if self.menu:
+            self.menu.dismiss()
+
+
+    # Moves the check mark. Returns True if anything changed.
+    def _set_checked(self, checked: str) -> bool:
+        if checked == self._checked:
+            return False
+
+        self._set_icon(self._checked, "")
+        self._set_icon(checked, "check")
+        self._checked = checked
+        return True
+
+
+    def _set_icon(self, text: str, icon: str) -> None:
+        position = self._index.get(text)
+        if position is None:
+            return
+
+        self.items[position]["trailing_icon"] = icon
+
+        # The RecycleView may hold its own copies of the item dicts
+        data = self.menu.menu.data if self.menu and self.menu.menu else None
+        if data and position < len(data):
+            data[position]["trailing_icon"] = icon
@@ -1,15 +1,179 @@
+import calendar
+import datetime
+
 from kivymd.app import MDApp
 from kivy.lang import Builder
+from kivy.metrics import dp
+from kivy.properties import BooleanProperty, NumericProperty, StringProperty
 
+from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.screen import MDScreen
 
+from app.services.calendar_index import add_months
+
+# Six weeks always fit any month
+GRID_DAYS = 42
+
+
+class CalendarDay(MDBoxLayout):
+    day_text = StringProperty("")
+    in_month = BooleanProperty(False)
+    is_today = BooleanProperty(False)
+    entry_count = NumericProperty(0)
+
+
 class CalendarScreen(MDScreen):
-    pass
-    
+    title = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        today = datetime.date.today()
+        self.year = today.year
+        self.month = today.month
+        self._cells = []
+        self._calendar = calendar.Calendar(firstweekday=calendar.MONDAY)
+
+
+    def on_kv_post(self, *args):
+        # Day cells are created once and only updated on month changes
+        grid = self.ids.grid
+        for _ in range(GRID_DAYS):
+            cell = CalendarDay()
+            grid.add_widget(cell)
+            self._cells.append(cell)
+
+        app = MDApp.get_running_app()
+        app.calendar_index.change_listeners.append(self._reload)
+        self.show_month(0)
+
+
+    # Moves the visible month by delta and refreshes the grid
+    def show_month(self, delta: int):
+        self.year, self.month = add_months(self.year, self.month, delta)
+        self.title = datetime.date(self.year, self.month, 1).strftime("%B %Y")
+
+        # Lay out the days right away; markers follow from the index
+        today = datetime.date.today()
+        dates = list(self._calendar.itermonthdates(self.year, self.month))
+        dates += [dates[-1] + datetime.timedelta(days=i + 1) for i in range(GRID_DAYS - len(dates))]
+        for cell, date in zip(self._cells, dates):
+            cell.day_text = str(date.day)
+            cell.in_month = date.month == self.month
+            cell.is_today = date == today
+
+        self._reload()
+
+
+    # Requests marker data for the visible month
+    def _reload(self):
+        app = MDApp.get_running_app()
+        year, month = self.year, self.month
+        app.calendar_index.get_month(
+            year, month,
+            lambda stats: self._apply_stats(year, month, stats)
+        )
+
+
+    def _apply_stats(self, year: int, month: int, stats: dict):
+        # A newer month was shown while this one loaded
+        if (year, month) != (self.year, self.month):
+            return
+
+        for cell in self._cells:
+            day = int(cell.day_text) if cell.in_month else None
+            cell.entry_count = stats.get(day, {}).get("entry_count", 0) if day else 0
+
+
+    # Horizontal swipe on the grid changes month instead of tab
+    def on_touch_up(self, touch):
+        grid = self.ids.grid
+        if grid.collide_point(*touch.pos) and touch.grab_current is None:
+            distance = touch.x - touch.ox
+            if abs(distance) > dp(50):
+                touch.ud["swipe_handled"] = True
+                self.show_month(-1 if distance > 0 else 1)
+                return True
+        return super().on_touch_up(touch)
+
+
 Builder.load_string("""
-<CalendarScreen>
+<CalendarDay>
+    orientation: "vertical"
+    padding: 0, dp(4)
 
     MDLabel:
-        text: "Calendar "
+        text: root.day_text
+        halign: "center"
+        bold: root.is_today
+        theme_text_color: "Custom"
+        text_color:
+            app.theme_cls.primaryColor if root.is_today else \
+            app.theme_cls.onSurfaceColor if root.in_month else \
+            app.theme_cls.outlineColor
+
+    MDIcon:
+        icon: "circle-small"
         halign: "center"
+        size_hint_y: None
+        height: dp(16)
+        theme_icon_color: "Custom"
+        icon_color: app.theme_cls.primaryColor
+        opacity: 1 if root.entry_count else 0
+
+<CalendarScreen>
+    md_bg_color: app.theme_cls.backgroundColor
+
+    MDBoxLayout:
+        orientation: "vertical"
+        padding: dp(8)
+
+        MDBoxLayout:
+            size_hint_y: None
+            height: dp(56)
+
+            MDIconButton:
+                icon: "chevron-left"
+                pos_hint: {"center_y": 0.5}
+                on_release: root.show_month(-1)
+
+            MDLabel:
+                text: root.title
+                halign: "center"
+                font_style: "Title"
+
+            MDIconButton:
+                icon: "chevron-right"
+                pos_hint: {"center_y": 0.5}
+                on_release: root.show_month(1)
+
+        MDGridLayout:
+            cols: 7
+            size_hint_y: None
+            height: dp(32)
+
+            MDLabel:
+                text: "Mon"
+                halign: "center"
+            MDLabel:
+                text: "Tue"
+                halign: "center"
+            MDLabel:
+                text: "Wed"
+                halign: "center"
+            MDLabel:
+                text: "Thu"
+                halign: "center"
+            MDLabel:
+                text: "Fri"
+                halign: "center"
+            MDLabel:
+                text: "Sat"
+                halign: "center"
+            MDLabel:
+                text: "Sun"
+                halign: "center"
+
+        MDGridLayout:
+            id: grid
+            cols: 7
 """)
@@ -0,0 +1,229 @@
+import datetime
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.properties import StringProperty
+
+from kivymd.app import MDApp
+from kivymd.uix.screen import MDScreen
+
+# Writes or edits one entry.
+#
+# Keystrokes only mark the text dirty; an autosave trigger hands the text
+# to the entry journal, which diffs and appends on its own thread, so
+# typing costs the same in a short note and a 1 MB entry. The journal
+# folds the changes into the diary (see EntryJournal) and replays them
+# after a crash.
+class EntryEditorScreen(MDScreen):
+    date_text = StringProperty("")
+    status = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entry = None
+        self._dirty = False
+        self._filling = False
+        self._autosave_trigger = None
+
+        # Reopened after unlock: (entry_id, entry_date) of the entry open at lock
+        self._resume = None
+
+
+    def on_kv_post(self, *args):
+        app = MDApp.get_running_app()
+        journal = app.entry_journal
+        journal.flush_listeners.append(self.save_pending)
+        journal.recovered_listeners.append(self._on_recovered)
+
+        # Ahead of the other lock listeners, while the cipher is still set
+        app.app_lock.lock_listeners.insert(0, self._on_lock)
+
+        self.ids.title.bind(text=self._on_text)
+        self.ids.body.bind(text=self._on_text)
+
+        # Seconds between journal writes while typing (at most this much
+        # is lost on a crash)
+        settings = app.settings_service.settings
+        settings.bind(autosave_interval=self._set_autosave_interval)
+        self._set_autosave_interval(settings, settings.autosave_interval)
+
+
+    def on_leave(self, *args):
+        self.close()
+
+
+    # Shows an entry for editing, or a new one for entry_date (default today)
+    def open_entry(self, entry_id: int = None, entry_date: str = None):
+        app = MDApp.get_running_app()
+        self.close()
+
+        if entry_id:
+            # The previous entry's text must not stay editable while this
+            # one loads: keystrokes would go nowhere
+            self._fill("", "")
+            self._set_editable(False)
+            self.status = "Loading"
+            app.diary_repository.get_entry(entry_id, self._show)
+        else:
+            self._show({"entry_date": entry_date or datetime.date.today().isoformat(),
+                        "title": "", "body": ""})
+
+
+    # Journals the text if it changed since the last save
+    def save_pending(self, *args):
+        if not self._dirty or self._entry is None:
+            return
+
+        self._dirty = False
+        if self._autosave_trigger:
+            self._autosave_trigger.cancel()
+        MDApp.get_running_app().entry_journal.record(
+            self.ids.title.text, self.ids.body.text, self._saved
+        )
+
+
+    # Saves and ends editing
+    def close(self):
+        if self._entry is None:
+            return
+
+        self.save_pending()
+        MDApp.get_running_app().entry_journal.close()
+        self._entry = None
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _set_autosave_interval(self, settings, interval: float):
+        if self._autosave_trigger:
+            self._autosave_trigger.cancel()
+        self._autosave_trigger = Clock.create_trigger(self.save_pending, interval)
+        if self._dirty:
+            self._autosave_trigger()
+
+
+    def _show(self, entry: dict):
+        if entry is None:
+            self.status = "Entry not found"
+            return
+
+        self._fill(entry["title"], entry["body"])
+        self._set_editable(True)
+
+        self._entry = entry
+        self._dirty = False
+        self.date_text = datetime.date.fromisoformat(entry["entry_date"]).strftime("%A, %d %B %Y")
+        self.status = ""
+        MDApp.get_running_app().entry_journal.open(entry)
+
+
+    # Sets the fields without marking the text as edited
+    def _fill(self, title: str, body: str):
+        self._filling = True
+        self.ids.title.text = title
+        self.ids.body.text = body
+        self._filling = False
+
+
+    def _set_editable(self, editable: bool):
+        self.ids.title.disabled = not editable
+        self.ids.body.disabled = not editable
+
+
+    # Per keystroke: no work besides (re)arming the trigger and keeping
+    # the unlocked session alive while the user writes
+    def _on_text(self, *args):
+        if self._filling or self._entry is None:
+            return
+
+        MDApp.get_running_app().app_lock.touch()
+        if not self._dirty:
+            self._dirty = True
+            self.status = "Editing"
+        if self._autosave_trigger:
+            self._autosave_trigger()
+
+
+    def _saved(self):
+        if not self._dirty:
+            self.status = "Saved"
+
+
+    # Decrypted text must not stay on screen. The journal keeps what was
+    # typed and recover() saves it after unlock.
+    def _on_lock(self):
+        if self._entry is None:
+            return
+
+        self._resume = (self._entry.get("id"), self._entry["entry_date"])
+        self.close()
+        self._fill("", "")
+
+
+    # After unlock (see DiaryApp): the journal has been replayed, so the
+    # entry that was open at lock can be shown again
+    def _on_recovered(self, entry: dict | None):
+        if self._resume is None:
+            return
+
+        entry_id, entry_date = self._resume
+        self._resume = None
+        if entry is not None:
+            self._show(entry)
+        else:
+            self.open_entry(entry_id, entry_date)
+
+
+Builder.load_string("""
+<EntryEditorScreen>
+    md_bg_color: app.theme_cls.backgroundColor
+
+    MDBoxLayout:
+        orientation: "vertical"
+
+        MDTopAppBar:
+            theme_bg_color: "Custom"
+            md_bg_color: app.theme_cls.primaryContainerColor
+            size_hint_y: None
+            height: dp(56)
+
+            MDTopAppBarLeadingButtonContainer:
+
+                MDActionTopAppBarButton:
+                    icon: "arrow-left"
+                    on_release: app.router.on_back()
+
+            MDTopAppBarTitle:
+                text: root.date_text
+
+        MDLabel:
+            text: root.status
+            font_style: "Label"
+            role: "small"
+            adaptive_height: True
+            padding: dp(16), dp(4)
+            theme_text_color: "Custom"
+            text_color: app.theme_cls.onSurfaceVariantColor
+
+        MDTextField:
+            id: title
+            multiline: False
+            size_hint_x: None
+            width: root.width - dp(32)
+            pos_hint: {"center_x": 0.5}
+
+            MDTextFieldHintText:
+                text: "Title"
+
+        TextInput:
+            id: body
+            hint_text: "Write about your day..."
+            padding: dp(16), dp(12)
+            background_color: 0, 0, 0, 0
+            foreground_color: app.theme_cls.onSurfaceColor
+            cursor_color: app.theme_cls.primaryColor
+            font_name: app.theme_cls.font_styles["Body"]["large"]["font-name"]
+            font_size: app.theme_cls.font_styles["Body"]["large"]["font-size"]
+""")
@@ -1,29 +1,389 @@
+import datetime
+
 from kivymd.app import MDApp
+from kivy.clock import Clock
+from kivy.core.text import Label as CoreLabel
 from kivy.lang import Builder
+from kivy.metrics import dp
+from kivy.properties import BooleanProperty, NumericProperty, StringProperty
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 
+from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.screen import MDScreen
 
+from app.core.router import ENTRY_EDITOR
+from app.services.timeline import TimelineSource, open_row
+from app.ui.text_cache import CachedLabel
+
+# Start loading the next page this many viewport heights before the end
+PREFETCH_SCREENS = 2
+
+# Seconds to wait after the last keystroke before searching
+SEARCH_DELAY = 0.25
+
+# Pages of search results streamed per query
+SEARCH_MAX_PAGES = 5
+
+# Used to measure the average character width of the preview font
+_SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog, then naps in the sun."
+
+ROW_PADDING = dp(12)
+ROW_SPACING = dp(4)
+
+
+# Shows the entry editor for an entry, or for a new one
+def open_editor(entry_id: int = None):
+    router = MDApp.get_running_app().router
+    router.get_screen(ENTRY_EDITOR).open_entry(entry_id)
+    router.go_to(ENTRY_EDITOR)
+
+
+# One timeline row. Everything it shows, including its height, is
+# computed off the main thread (see timeline.make_row); recycled rows only
+# take new values, except that sealed rows are decrypted here, for the
+# rows actually on screen.
+class TimelineRow(RecycleDataViewBehavior, ButtonBehavior, MDBoxLayout):
+    entry_id = NumericProperty(0)
+    entry_date = StringProperty("")
+    date_text = StringProperty("")
+    title_text = StringProperty("")
+    preview_text = StringProperty("")
+    preview_height = NumericProperty(0)
+
+    def refresh_view_attrs(self, rv, index, data):
+        repository = MDApp.get_running_app().diary_repository
+        super().refresh_view_attrs(rv, index, open_row(repository, data))
+
+    def on_release(self):
+        open_editor(self.entry_id)
+
+
+# One search result: date, title and a snippet with the hits in [b] markup
+class SearchResultRow(RecycleDataViewBehavior, ButtonBehavior, MDBoxLayout):
+    entry_id = NumericProperty(0)
+    date_text = StringProperty("")
+    title_text = StringProperty("")
+    snippet_text = StringProperty("")
+
+    def on_release(self):
+        open_editor(self.entry_id)
+
+
+# Search result as RecycleView data
+def make_result_row(result: dict) -> dict:
+    date = datetime.date.fromisoformat(result["entry_date"])
+    return {
+        "entry_id": result["id"],
+        "date_text": date.strftime("%a, %d %b %Y"),
+        "title_text": result["title"] or "Untitled",
+        "snippet_text": result["snippet"],
+    }
+
+
 class HomeScreen(MDScreen):
-    pass
-    
+    empty = BooleanProperty(False)
+
+    # True while the search field has a query; results replace the timeline
+    searching = BooleanProperty(False)
+    no_results = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.timeline = None
+        self._reload_trigger = Clock.create_trigger(self.reload, 0.3)
+        self._refresh_trigger = Clock.create_trigger(self.refresh, 0.3)
+        self._search_trigger = Clock.create_trigger(self.search, SEARCH_DELAY)
+
+
+    def on_kv_post(self, *args):
+        app = MDApp.get_running_app()
+
+        self.timeline = TimelineSource(app.diary_repository)
+        self.timeline.change_listeners.append(self._refresh_trigger)
+        self.timeline.change_listeners.append(self._on_entries_changed)
+
+        # Decrypted rows must not outlive an unlocked session
+        app.app_lock.lock_listeners.append(self._clear)
+        app.app_lock.unlock_listeners.append(lambda key: self._reload_trigger())
+
+        # Row heights depend on the font and the width
+        app.theme_cls.bind(font_styles=self._reload_trigger)
+        self.ids.timeline.bind(width=self._reload_trigger, scroll_y=self._on_scroll)
+        self.ids.search.bind(text=lambda field, text: self._search_trigger())
+
+
+    # Fetches the newest page and scrolls to the top
+    def reload(self, *args):
+        app = MDApp.get_running_app()
+        if app.app_lock.is_locked() or self.ids.timeline.width <= 1:
+            return
+
+        self.timeline.metrics = self._measure()
+        self.timeline.reload(self._show_first)
+
+
+    # Streams results for the search field's query into the results list
+    def search(self, *args):
+        app = MDApp.get_running_app()
+        query = self.ids.search.text.strip()
+        self.searching = bool(query)
+        self.no_results = False
+        self.ids.results.data = []
+
+        if not query or app.app_lock.is_locked():
+            app.search_index.cancel()
+            return
+
+        self.ids.results.scroll_y = 1
+        app.search_index.search_pages(query, self._show_results, max_pages=SEARCH_MAX_PAGES)
+
+
+    # Brings the loaded rows up to date after writes, in place: the
+    # visible rows keep their position
+    def refresh(self, *args):
+        app = MDApp.get_running_app()
+        if app.app_lock.is_locked() or self.ids.timeline.width <= 1:
+            return
+        if self.timeline.metrics is None:
+            self.reload()
+            return
+
+        self.timeline.refresh(self._show_refreshed)
+
+
+    def new_entry(self):
+        open_editor()
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _clear(self):
+        self.timeline.clear()
+        self.ids.timeline.data = []
+
+        MDApp.get_running_app().search_index.cancel()
+        self._search_trigger.cancel()
+        self.ids.search.text = ""
+        self.ids.results.data = []
+        self.searching = False
+
+
+    # Pages arrive one by one from search_pages()
+    def _show_results(self, results, done):
+        self.ids.results.data.extend(make_result_row(result) for result in results)
+        self.no_results = done and not self.ids.results.data
+
+
+    # Results may be out of date after a write
+    def _on_entries_changed(self):
+        if self.searching:
+            self._search_trigger()
+
+
+    def _show_first(self, page, dropped):
+        self.empty = not page
+        self.ids.timeline.data = list(self.timeline.rows)
+        self.ids.timeline.scroll_y = 1
+
+
+    def _show_refreshed(self, page, dropped):
+        self.empty = not page
+        if self.ids.timeline.children:
+            self._replace_data(0)
+        else:
+            self.ids.timeline.data = list(self.timeline.rows)
+
+
+    # Loads pages ahead of the viewport in whichever direction it moves
+    def _on_scroll(self, recycle_view, scroll_y):
+        scrollable = recycle_view.children[0].height - recycle_view.height if recycle_view.children else 0
+        if scrollable <= 0:
+            return
+
+        prefetch = recycle_view.height * PREFETCH_SCREENS
+        if scroll_y * scrollable < prefetch:
+            self.timeline.load_older(self._show_older)
+        elif (1 - scroll_y) * scrollable < prefetch:
+            self.timeline.load_newer(self._show_newer)
+
+
+    def _show_older(self, page, dropped):
+        # Rows dropped above the viewport would otherwise make it jump
+        self._replace_data(-sum(row["height"] for row in dropped))
+
+
+    def _show_newer(self, page, dropped):
+        self._replace_data(sum(row["height"] for row in page))
+
+
+    # Swaps in the current rows, keeping the visible rows where they were.
+    # :param shift: pixels added (+) or removed (-) above the viewport
+    def _replace_data(self, shift: float):
+        recycle_view = self.ids.timeline
+        old_scrollable = recycle_view.children[0].height - recycle_view.height
+        offset = (1 - recycle_view.scroll_y) * max(0, old_scrollable) + shift
+
+        recycle_view.data = list(self.timeline.rows)
+
+        # Heights are known up front, so the new position is too; it is
+        # applied once the layout has taken the new data
+        content_height = sum(row["height"] for row in self.timeline.rows)
+        scrollable = content_height - recycle_view.height
+        if scrollable > 0:
+            scroll_y = 1 - min(max(offset, 0), scrollable) / scrollable
+            Clock.schedule_once(lambda dt: setattr(recycle_view, "scroll_y", scroll_y))
+
+
+    # Measures the fonts rows use, on the main thread where text
+    # rendering is safe
+    def _measure(self) -> dict:
+        app = MDApp.get_running_app()
+        font_styles = app.theme_cls.font_styles
+
+        def line(style, role, text=_SAMPLE_TEXT):
+            font = font_styles[style][role]
+            label = CoreLabel(text=text, font_name=font["font-name"], font_size=font["font-size"])
+            label.refresh()
+            return label.texture.size
+
+        preview_width, line_height = line("Body", "medium")
+        date_height = line("Label", "small", "Mon")[1]
+        title_height = line("Title", "medium", "Title")[1]
+
+        return {
+            "width": self.ids.timeline.width - 2 * ROW_PADDING,
+            "char_width": preview_width / len(_SAMPLE_TEXT),
+            "line_height": line_height,
+            "base_height": 2 * ROW_PADDING + 2 * ROW_SPACING + date_height + title_height,
+        }
+
+
 Builder.load_string("""
+<TimelineRow>
+    orientation: "vertical"
+    padding: dp(12)
+    spacing: dp(4)
+
+    CachedLabel:
+        text: root.date_text
+        font_style: "Label"
+        role: "small"
+        adaptive_height: True
+        theme_text_color: "Custom"
+        text_color: app.theme_cls.primaryColor
+
+    CachedLabel:
+        text: root.title_text
+        font_style: "Title"
+        role: "medium"
+        adaptive_height: True
+        shorten: True
+        shorten_from: "right"
+        text_size: self.width, None
+
+    CachedLabel:
+        text: root.preview_text
+        font_style: "Body"
+        role: "medium"
+        size_hint_y: None
+        height: root.preview_height
+        text_size: self.width, self.height
+        valign: "top"
+        theme_text_color: "Custom"
+        text_color: app.theme_cls.onSurfaceVariantColor
+
+<SearchResultRow>
+    orientation: "vertical"
+    padding: dp(12)
+    spacing: dp(4)
+
+    CachedLabel:
+        text: root.date_text
+        font_style: "Label"
+        role: "small"
+        adaptive_height: True
+        theme_text_color: "Custom"
+        text_color: app.theme_cls.primaryColor
+
+    CachedLabel:
+        text: root.title_text
+        font_style: "Title"
+        role: "medium"
+        adaptive_height: True
+        shorten: True
+        shorten_from: "right"
+        text_size: self.width, None
+
+    CachedLabel:
+        text: root.snippet_text
+        markup: True
+        font_style: "Body"
+        role: "medium"
+        max_lines: 2
+        shorten: True
+        text_size: self.width, None
+        valign: "top"
+        theme_text_color: "Custom"
+        text_color: app.theme_cls.onSurfaceVariantColor
+
 <HomeScreen>
     md_bg_color: app.theme_cls.backgroundColor
 
+    MDBoxLayout:
+        orientation: "vertical"
+
+        MDTextField:
+            id: search
+            multiline: False
+            size_hint_x: None
+            width: root.width - dp(32)
+            pos_hint: {"center_x": 0.5}
+
+            MDTextFieldLeadingIcon:
+                icon: "magnify"
+
+            MDTextFieldHintText:
+                text: "Search entries"
+
+        # Only one of the lists takes space at a time
+        RecycleView:
+            id: timeline
+            viewclass: "TimelineRow"
+            size_hint_y: None if root.searching else 1
+            height: 0
+            opacity: 0 if root.searching else 1
+
+            RecycleBoxLayout:
+                orientation: "vertical"
+                default_size: None, dp(96)
+                default_size_hint: 1, None
+                size_hint_y: None
+                height: self.minimum_height
+
+        RecycleView:
+            id: results
+            viewclass: "SearchResultRow"
+            size_hint_y: 1 if root.searching else None
+            height: 0
+            opacity: 1 if root.searching else 0
+
+            RecycleBoxLayout:
+                orientation: "vertical"
+                default_size: None, dp(112)
+                default_size_hint: 1, None
+                size_hint_y: None
+                height: self.minimum_height
+
     MDLabel:
-        theme_text_color: "Primary"
-        text: f"{self.font_size / sp(1)} {self.font_name} {self.line_height} "
+        text: "No matches" if root.searching else "No entries yet"
         halign: "center"
-        
-    MDButton:
-        MDButtonText:
-            text: "I am a button!"        
-""")
+        opacity: 1 if (root.no_results if root.searching else root.empty) else 0
 
-"""
-class App(MDApp):  
-    def build(self):  
-        return HomeScreen()  
-  
-App().run()
-"""
\ No newline at end of file
+    MDFabButton:
+        icon: "pencil"
+        pos_hint: {"right": 0.95, "y": 0.04}
+        on_release: root.new_entry()
+""")
@@ -0,0 +1,137 @@
+from kivy.lang import Builder
+from kivy.properties import BooleanProperty, OptionProperty, StringProperty
+
+from kivymd.app import MDApp
+from kivymd.uix.screen import MDScreen
+
+# Shortest passcode accepted when setting one
+MIN_PASSCODE_LENGTH = 4
+
+
+# Asks for the passcode, or sets a new one (mode "set": enter, then confirm).
+#
+# Key derivation runs on a worker thread inside AppLock, so this screen only
+# shows a busy state while it waits and stays responsive throughout.
+class LockScreen(MDScreen):
+    mode = OptionProperty("unlock", options=["unlock", "set"])
+    message = StringProperty("")
+    busy = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._first_entry = None
+
+
+    def on_pre_enter(self, *args):
+        self._first_entry = None
+        self.ids.passcode.text = ""
+        self.message = "Enter passcode" if self.mode == "unlock" else "Choose a passcode"
+
+
+    def on_enter(self, *args):
+        self.ids.passcode.focus = True
+
+
+    # Called by the button and the keyboard's enter key
+    def submit(self):
+        passcode = self.ids.passcode.text
+        if self.busy or not passcode:
+            return
+
+        if self.mode == "unlock":
+            self._unlock(passcode)
+        else:
+            self._set(passcode)
+
+
+    #-----------------------------
+    # INTERNAL
+    #-----------------------------
+
+    def _unlock(self, passcode: str):
+        app = MDApp.get_running_app()
+
+        def done(ok):
+            self.busy = False
+            self.ids.passcode.text = ""
+            if ok:
+                app.router.unlocked()
+            else:
+                self.message = "Wrong passcode"
+
+        self.busy = True
+        self.message = "Unlocking..."
+        app.app_lock.unlock(passcode, done)
+
+
+    def _set(self, passcode: str):
+        app = MDApp.get_running_app()
+        self.ids.passcode.text = ""
+
+        if self._first_entry is None:
+            if len(passcode) < MIN_PASSCODE_LENGTH:
+                self.message = f"Use at least {MIN_PASSCODE_LENGTH} characters"
+                return
+            self._first_entry = passcode
+            self.message = "Confirm passcode"
+            return
+
+        if passcode != self._first_entry:
+            self._first_entry = None
+            self.message = "Passcodes didn't match. Choose a passcode"
+            return
+
+        def done():
+            self.busy = False
+            self.mode = "unlock"
+            app.router.on_back()
+
+        self.busy = True
+        self.message = "Saving..."
+        app.app_lock.set_passcode(passcode, done)
+
+
+Builder.load_string("""
+<LockScreen>
+    md_bg_color: app.theme_cls.backgroundColor
+
+    MDBoxLayout:
+        orientation: "vertical"
+        adaptive_height: True
+        padding: dp(32)
+        spacing: dp(24)
+        pos_hint: {"center_y": 0.6}
+
+        MDIcon:
+            icon: "lock"
+            theme_font_size: "Custom"
+            font_size: "64sp"
+            theme_icon_color: "Custom"
+            icon_color: app.theme_cls.primaryColor
+            pos_hint: {"center_x": 0.5}
+
+        MDLabel:
+            text: root.message
+            halign: "center"
+            adaptive_height: True
+            font_style: "Title"
+
+        MDTextField:
+            id: passcode
+            password: True
+            multiline: False
+            disabled: root.busy
+            on_text_validate: root.submit()
+
+            MDTextFieldHintText:
+                text: "Passcode"
+
+        MDButton:
+            style: "filled"
+            pos_hint: {"center_x": 0.5}
+            disabled: root.busy
+            on_release: root.submit()
+
+            MDButtonText:
+                text: "Unlock" if root.mode == "unlock" else "Next"
+""")
@@ -74,6 +74,12 @@ class MainScreen(MDScreen):
     
   
     def on_touch_up(self, touch):
+        handled = super().on_touch_up(touch)
+        
+        # A child (e.g. the calendar grid) already used this swipe
+        if touch.ud.get("swipe_handled"):
+            return handled
+        
         if self.collide_point(*touch.pos):
             swipe_distance = touch.x - self._touch_start_x
             
@@ -91,7 +97,7 @@ class MainScreen(MDScreen):
                     new_tab = self.tab_order[current_index + 1]
                     self.set_active_tab(new_tab)
         
-        return super().on_touch_up(touch)      
+        return handled      
         
          
 Builder.load_string('''  
@@ -1,3 +1,6 @@
+import os
+
+from kivy.core.window import Window
 from kivy.lang import Builder
 from kivy.properties import StringProperty
 
@@ -5,12 +8,214 @@ from kivymd.app import MDApp
 from kivymd.uix.list import MDListItem
 from kivymd.uix.screen import MDScreen
 
+from app.services.app_lock import DEFAULT_SESSION_TIMEOUT
+from app.services.entry_import import EntryImportTask
+from app.services.export_service import EXPORT_FORMATS, ExportTask, default_export_dir
+from app.ui.picker_menu import PickerMenu
+from app.ui.snackbars import ProgressSnackbar, show_snackbar
+
+# Menu label -> unlock session length in seconds (0: until the app is left)
+SESSION_TIMEOUTS = {
+    "Lock when leaving the app": 0,
+    "Lock after 1 minute": 60,
+    "Lock after 5 minutes": DEFAULT_SESSION_TIMEOUT,
+    "Lock after 15 minutes": 900,
+}
+
 class DListItem(MDListItem):
     icon = StringProperty()
     text = StringProperty()
 
 class SettingsScreen(MDScreen):
-    pass     
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.app_lock_menu = None
+        self.export_menu = None
+        self.export_task = None
+        self.import_task = None
+        self.file_manager = None
+        self.manager_open = False
+
+        # Entries can't be written while locked
+        MDApp.get_running_app().app_lock.lock_listeners.append(self._cancel_import)
+
+
+    # Screen is cached by the router, so only listen for keys while shown
+    def on_enter(self, *args):
+        Window.bind(on_keyboard=self.events)
+
+    def on_leave(self, *args):
+        Window.unbind(on_keyboard=self.events)
+
+
+    # Opens the app lock options under the "App Lock" item
+    def open_app_lock_menu(self, caller):
+        app = MDApp.get_running_app()
+        enabled = app.app_lock.enabled
+
+        if not self.app_lock_menu:
+            self.app_lock_menu = PickerMenu(position="center")
+
+        # Rebuilt only when the lock is turned on or off
+        self.app_lock_menu.set_items([
+                {
+                    "text": "Change passcode" if enabled else "Set passcode",
+                    "leading_icon": "form-textbox-password",
+                    "on_release": lambda: self._set_passcode(),
+                },
+                *([
+                    {
+                        "text": label,
+                        "trailing_icon": "",
+                        "on_release": lambda x=seconds: self._set_session_timeout(x),
+                    }
+                    for label, seconds in SESSION_TIMEOUTS.items()
+                ] if enabled else []),
+                *([
+                    {
+                        "text": "Turn off app lock",
+                        "leading_icon": "lock-open-variant",
+                        "text_color": app.theme_cls.errorColor,
+                        "leading_icon_color": app.theme_cls.errorColor,
+                        "on_release": lambda: self._disable_app_lock(),
+                    }
+                ] if enabled else []),
+            ],
+            key=enabled
+        )
+
+        checked = next(
+            (label for label, seconds in SESSION_TIMEOUTS.items()
+             if seconds == app.app_lock.session_timeout),
+            None
+        )
+        self.app_lock_menu.open(caller, checked=checked)
+
+
+    # Opens the lock screen for entering a new passcode twice
+    def _set_passcode(self):
+        app = MDApp.get_running_app()
+        self.app_lock_menu.dismiss()
+
+        app.router.get_screen("lock_screen").mode = "set"
+        app.router.go_to("lock_screen")
+
+
+    def _set_session_timeout(self, seconds: int):
+        app = MDApp.get_running_app()
+        self.app_lock_menu.dismiss()
+        app.app_lock.set_session_timeout(seconds)
+
+
+    # Entries are decrypted first, while the session key is still there
+    def _disable_app_lock(self):
+        app = MDApp.get_running_app()
+        self.app_lock_menu.dismiss()
+
+        def done():
+            app.app_lock.disable()
+            show_snackbar("App lock turned off")
+
+        app.diary_repository.unseal_all(done)
+
+
+    # Opens the list of export formats under the "Export Entries" item
+    def open_export_menu(self, caller):
+        if not self.export_menu:
+            self.export_menu = PickerMenu(position="center")
+            self.export_menu.set_items([
+                {
+                    "text": label,
+                    "on_release": lambda fmt=fmt: (self.export_menu.dismiss(), self.export_entries(fmt)),
+                }
+                for fmt, (label, extension) in EXPORT_FORMATS.items()
+            ])
+        self.export_menu.open(caller)
+
+
+    # Exports all entries in the background, with progress and Cancel
+    def export_entries(self, fmt: str):
+        app = MDApp.get_running_app()
+
+        if self.export_task:
+            self.export_task.cancel()
+
+        progress = ProgressSnackbar(
+            "Exporting entries",
+            on_cancel=lambda: self.export_task and self.export_task.cancel()
+        ).open()
+
+        def on_done(message, path):
+            if self.export_task is task:
+                self.export_task = None
+            progress.finish(message)
+
+        task = ExportTask(
+            app.diary_repository,
+            fmt,
+            on_progress=progress.update,
+            on_done=on_done
+        )
+        self.export_task = task.start()
+
+
+    # Opens file manager to pick an export to restore
+    def file_manager_open(self):
+        if not self.file_manager:
+            from kivymd.uix.filemanager import MDFileManager
+
+            self.file_manager = MDFileManager(
+                exit_manager=self.exit_manager,
+                select_path=self.select_path,
+                ext=[".jsonl", ".zip"]
+            )
+
+        start_path = default_export_dir()
+        self.file_manager.show(start_path if os.path.isdir(start_path) else "/")
+        self.manager_open = True
+
+    # Called when a file is selected
+    def select_path(self, path: str):
+        app = MDApp.get_running_app()
+
+        self.exit_manager()
+        if self.import_task:
+            self.import_task.cancel()
+
+        progress = ProgressSnackbar(
+            "Importing entries",
+            on_cancel=lambda: self.import_task and self.import_task.cancel()
+        ).open()
+
+        def on_done(message, stats):
+            if self.import_task is task:
+                self.import_task = None
+            progress.finish(message)
+
+        task = EntryImportTask(
+            app.diary_repository,
+            path,
+            on_progress=progress.update,
+            on_done=on_done
+        )
+        self.import_task = task.start()
+
+    def _cancel_import(self):
+        if self.import_task:
+            self.import_task.cancel()
+
+    # Called when the user reaches the root of the directory tree
+    def exit_manager(self, *args):
+        self.manager_open = False
+        self.file_manager.close()
+
+    # Called when buttons are pressed on the mobile device
+    def events(self, instance, keyboard, keycode, text, modifiers):
+        if keyboard in (1001, 27):
+            if self.manager_open:
+                self.file_manager.back()
+                return True
+        return False
         
                
 Builder.load_string("""
@@ -46,6 +251,7 @@ Builder.load_string("""
         DListItem:
             icon: "lock"
             text: "App Lock"
+            on_release: root.open_app_lock_menu(self)
             
         DListItem:
             icon: "palette"      
@@ -55,6 +261,12 @@ Builder.load_string("""
         DListItem:
             icon: "file-export"
             text: "Export Entries"   
+            on_release: root.open_export_menu(self)
+
+        DListItem:
+            icon: "file-import"
+            text: "Import Entries"
+            on_release: root.file_manager_open()
 """)
 
 
@@ -1,29 +1,39 @@
+import os
+
 from kivy.clock import Clock
 from kivy.core.window import Window
-from kivy.graphics import Color, Line
+from kivy.graphics import Color, Mesh
 from kivy.lang import Builder
-from kivy.metrics import dp
-from kivy.properties import BooleanProperty
+from kivy.properties import BooleanProperty, StringProperty
 from kivy.uix.widget import Widget
-from kivy.utils import hex_colormap
+from kivy.utils import get_color_from_hex, hex_colormap
 from kivy.utils import platform
 
 from kivymd.app import MDApp
 from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.button import MDButton, MDButtonText
-from kivymd.uix.dialog import (
-    MDDialog,
-    MDDialogIcon,
-    MDDialogHeadlineText,
-    MDDialogSupportingText, 
-    MDDialogButtonContainer
-)
-from kivymd.uix.filemanager import MDFileManager
-from kivymd.uix.label import MDLabel
-from kivymd.uix.menu import MDDropdownMenu
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.selectioncontrol import MDSwitch
-from kivymd.uix.snackbar import MDSnackbar, MDSnackbarText
+
+from app.ui.picker_menu import PickerMenu
+from app.ui.snackbars import ProgressSnackbar, show_snackbar
+from app.ui.text_cache import CachedLabel
+from app.ui.widget_hooks import on_child_created
+
+# Dialog, file manager and snackbar modules are imported where they
+# are used, so opening this screen doesn't pay for them up front.
+
+
+_palette_swatches = None
+
+# Returns {palette name: rgba}, computed once for all colour menus
+def get_palette_swatches() -> dict:
+    global _palette_swatches
+    if _palette_swatches is None:
+        _palette_swatches = {
+            name.capitalize(): get_color_from_hex(hex_value)
+            for name, hex_value in hex_colormap.items()
+        }
+    return _palette_swatches
 
 
 class DBasicList(MDBoxLayout):
@@ -32,14 +42,12 @@ class DBasicList(MDBoxLayout):
 class DSwitch(MDSwitch):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        Clock.schedule_interval(self._try_disable_thumb, 0)
+        # Thumb is created lazily in KivyMD
+        on_child_created(self, "thumb", self._disable_thumb)
 
     # Disable switch thumb button interaction
-    def _try_disable_thumb(self, dt):
-        # Thumb is created lazily in KivyMD
-        if hasattr(self, "thumb") and self.thumb:
-            self.thumb.disabled = True
-            return False  # stop scheduling
+    def _disable_thumb(self, thumb):
+        thumb.disabled = True
     
     # Use switch track to change state
     def on_touch_up(self, touch):
@@ -51,73 +59,94 @@ class DSwitch(MDSwitch):
         return super().on_touch_up(touch)
 
 
-class NotebookLabel(MDLabel):
+class NotebookLabel(CachedLabel):
     enable_lines = BooleanProperty(True)
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        
+        # All ruled lines are drawn by one Mesh whose vertices are
+        # rewritten in place; several changes in one frame cause one update
+        self._vertices = []
+        self._indices = []
+        with self.canvas.before:
+            self._line_color = Color(0, 0, 0, 0)
+            self._lines = Mesh(mode="lines")
+        
+        self._trigger_update = Clock.create_trigger(self._update_lines, -1)
         self.bind(
             size=self.update_lines, 
             pos=self.update_lines,
             font_size=self.update_lines,
+            texture_size=self.update_lines,
             enable_lines=self.update_lines,
         )
+        # Recolor on light/dark switch; screens are no longer rebuilt for it
+        self.theme_cls.bind(onSurfaceColor=self.update_lines)
         
     def update_lines(self, *args):
-        self.canvas.before.clear()
+        self._trigger_update()
         
-        # Stop if enable_lines is set to False
-        if not self.enable_lines:
-            return
+    def _update_lines(self, *args):
+        vertices = self._vertices
+        indices = self._indices
+        vertices.clear()
+        indices.clear()
         
-        with self.canvas.before:
+        # Calculate line spacing based on font size
+        line_spacing = self.font_size * self.line_height #@# + (self.font_size * 0.176)
+        
+        # Stop if enable_lines is set to False
+        if self.enable_lines and line_spacing > 0:
             app = MDApp.get_running_app()
             # Semi-transparent line color
-            Color(
+            self._line_color.rgba = (
                 app.theme_cls.onSurfaceColor[0],
                 app.theme_cls.onSurfaceColor[1],
                 app.theme_cls.onSurfaceColor[2],
                 0.3
             )
             
-            # Calculate line spacing based on font size
-            line_spacing = self.font_size * self.line_height #@# + (self.font_size * 0.176)
-            
             # Calculate how many lines based on texture height
-            if line_spacing > 0:
-                num_lines = int(self.texture_size[1] / line_spacing) + 1
-                
-                # Draw lines from bottom up, aligned with text baselines
-                for i in range(num_lines):
-                    y_pos = self.y + self.padding[1] + (i *  line_spacing) + (self.font_size * 0.4)
-                    if y_pos < self.top:
-                        Line(
-                            points=[
-                                self.x + self.padding[0], y_pos,
-                                self.right - self.padding[2], y_pos
-                            ],
-                            width=1
-                        )
+            num_lines = int(self.texture_size[1] / line_spacing) + 1
+            x1 = self.x + self.padding[0]
+            x2 = self.right - self.padding[2]
+            base = self.y + self.padding[1] + (self.font_size * 0.4)
+            
+            # Lines from bottom up, aligned with text baselines
+            for i in range(num_lines):
+                y_pos = base + i * line_spacing
+                if y_pos >= self.top:
+                    break
+                vertices.extend((x1, y_pos, 0, 0, x2, y_pos, 0, 0))
+                indices.extend((2 * i, 2 * i + 1))
+        
+        self._lines.vertices = vertices
+        self._lines.indices = indices
+
+# Sample text for the font preview; {size} is the slider value
+PREVIEW_TEXT = (
+    "Latin / {size} / 한국어 / 漢字 / カタカナ / [b]bold[/b] / [i]italic[/i] / "
+    "[u]underline[/u] /  [s]strikethrough[/s] / [b][i]bolditalic[/b][/i]"
+)
+
 
 class ThemeAndStyleScreen(MDScreen):
+    # PREVIEW_TEXT as markup, with scripts the selected font lacks shown
+    # in a fallback font
+    preview_text = StringProperty("")
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        Window.bind(on_keyboard=self.events)
         
         self.manager_open = False
-        self.file_manager = MDFileManager(
-            exit_manager=self.exit_manager, 
-            select_path=self.select_path,
-            ext=[".zip"]
-        )
+        self.font_import = None
+        self.file_manager = None  # created on first use
+        self.color_menu = None
+        self.font_menu = None
         
         
     def on_kv_post(self, *args):
-        app = MDApp.get_running_app()
-        self.ids.dark_switch.active = (
-            app.theme_cls.theme_style == "Dark"
-        )
-        
         slider = self.ids.font_size_slider
         slider.bind(
             on_touch_up=lambda s, t: self.on_slider_touch_up(s, t)
@@ -132,6 +161,21 @@ class ThemeAndStyleScreen(MDScreen):
 
         # run once to initialize correct state
         self._update_scroll()
+        
+        # Fallbacks are picked again when the font or its coverage changes
+        app = MDApp.get_running_app()
+        slider.bind(value=self._update_preview)
+        app.settings_service.settings.bind(font_name=self._update_preview)
+        app.settings_service.coverage_listeners.append(self._update_preview)
+        self._update_preview()
+        
+    
+    # Screen is cached by the router, so only listen for keys while shown
+    def on_enter(self, *args):
+        Window.bind(on_keyboard=self.events)
+        
+    def on_leave(self, *args):
+        Window.unbind(on_keyboard=self.events)
           
              
     def enable_dark_mode(self, switch, value):
@@ -143,29 +187,29 @@ class ThemeAndStyleScreen(MDScreen):
         
     # THEME
          
-    # Adds drop-down items based on list of color names     
+    # Opens the colour picker; items are built once and reused
     def open_dropdown_colors(self, item):
         app = MDApp.get_running_app()
         
-        # Get current font name from theme manager
-        app.current_theme= app.theme_cls.primary_palette
-        
-        MDDropdownMenu(
-            caller=item,
-            items=[
+        if not self.color_menu:
+            self.color_menu = PickerMenu(hor_growth="left")
+            self.color_menu.set_items([
                 {
                     "text": color,
-                     "trailing_icon": "check" if app.current_theme == color else "", #adds check icon for current theme
+                    "leading_icon": "circle",
+                    "leading_icon_color": swatch,
+                    "trailing_icon": "",
                     "on_release": lambda x=color: self.set_color_theme(x),
                 }
-                for color in [c.capitalize() for c in hex_colormap.keys()]
-            ],
-            hor_growth="left",
-        ).open()
+                for color, swatch in get_palette_swatches().items()
+            ])
+        
+        # adds check icon for current theme
+        self.color_menu.open(item, checked=app.settings_service.settings.primary_palette)
 
     # Called when an item in drop-down is clicked
     def set_color_theme(self, color_name):
-        self.ids.color_text.text = color_name
+        self.color_menu.dismiss()
         
         app = MDApp.get_running_app()
         app.settings_service.apply_theme(primary_palette=color_name)  
@@ -174,51 +218,68 @@ class ThemeAndStyleScreen(MDScreen):
     # FONTS
     def open_dropdown_fonts(self, item):
         app = MDApp.get_running_app()
+        registry = app.settings_service.font_registry
+        
+        if not self.font_menu:
+            self.font_menu = PickerMenu()
         
-        # Get current font name from theme manager
-        app.current_font = app.theme_cls.font_styles["Title"]["medium"]["font-name"].replace("_", " ")
+        # Rebuild items only when the installed fonts changed
+        if self.font_menu.key != registry.version:
+            self.font_menu.set_items(self._font_items(), key=registry.version)
+        
+        font_name = app.settings_service.settings.font_name or "Roboto"
+        current_font = registry.get_fonts().get(font_name, "Roboto")
+        
+        # adds check icon for current font
+        self.font_menu.open(item, checked=current_font)
     
-        self.font_menu = MDDropdownMenu(
-            caller=item,
-            items=[
-                {
-                    "text": "Upload font",
-                    "leading_icon": "file-upload",
-                    "text_color": app.theme_cls.onSurfaceVariantColor,
-                    "leading_icon_color": app.theme_cls.onSurfaceVariantColor,
-                    "on_release": lambda: self.file_manager_open()
-                },
-                *[
-                    {
-                        "text": font_name,
-                        "trailing_icon": "check" if app.current_font == font_name else "", #adds check icon for current font
-                        "on_release": lambda x=font_name: self.set_font(x),
-                    }
-                    for font_name
-                    in ["Roboto"] + app.settings_service.get_fonts() # adds Roboto as first item
-                ],
+    # Upload, Roboto, the user fonts by family name, then Delete all
+    def _font_items(self) -> list[dict]:
+        app = MDApp.get_running_app()
+        fonts = {"Roboto": "Roboto", **app.settings_service.get_fonts()}
+        return [
+            {
+                "text": "Upload font",
+                "leading_icon": "file-upload",
+                "text_color": app.theme_cls.onSurfaceVariantColor,
+                "leading_icon_color": app.theme_cls.onSurfaceVariantColor,
+                "on_release": lambda: self.file_manager_open()
+            },
+            *[
                 {
-                    "text": "Delete all fonts",
-                    "leading_icon": "trash-can",
-                    "text_color": app.theme_cls.errorColor,
-                    "leading_icon_color": app.theme_cls.errorColor,
-                    "on_release": lambda: self._delete_all_fonts()
-                },
-            ]
-        )
-        self.font_menu.open()
+                    "text": display_name,
+                    "trailing_icon": "",
+                    "on_release": lambda x=font_name: self.set_font(x),
+                }
+                for font_name, display_name in fonts.items()
+            ],
+            {
+                "text": "Delete all fonts",
+                "leading_icon": "trash-can",
+                "text_color": app.theme_cls.errorColor,
+                "leading_icon_color": app.theme_cls.errorColor,
+                "on_release": lambda: self._delete_all_fonts()
+            },
+        ]
     
     # Sets font to app theme
     def set_font(self, font_name):
+        self.font_menu.dismiss()
         app = MDApp.get_running_app()    
         app.settings_service.apply_font(font_name=font_name)      
-        
-        # Change preview font
-        self.ids.text_style_preview.font_name = font_name
        
        
     # Opens file manager 
     def file_manager_open(self):
+        if not self.file_manager:
+            from kivymd.uix.filemanager import MDFileManager
+            
+            self.file_manager = MDFileManager(
+                exit_manager=self.exit_manager, 
+                select_path=self.select_path,
+                ext=[".zip"]
+            )
+            
         if platform == "android":
             default_file_path = "/storage/emulated/0"
         elif platform == "win":
@@ -234,14 +295,27 @@ class ThemeAndStyleScreen(MDScreen):
         app = MDApp.get_running_app()    
         
         self.exit_manager()
-        MDSnackbar(
-            MDSnackbarText(
-                text=app.settings_service.extract_font_zip(zip_path=path)
-            ),
-            y=dp(24),
-            pos_hint={"center_x": 0.5},
-            size_hint_x=0.8,
+        if self.font_import:
+            self.font_import.cancel()
+        
+        # Progress snackbar stays open until the import finishes
+        progress = ProgressSnackbar(
+            "Importing font",
+            on_cancel=lambda: self.font_import and self.font_import.cancel()
         ).open()
+        
+        def on_done(message):
+            # A newer import may have replaced this one
+            if self.font_import is task:
+                self.font_import = None
+            progress.finish(message)
+        
+        task = app.settings_service.import_font_zip(
+            zip_path=path,
+            on_progress=progress.update,
+            on_done=on_done
+        )
+        self.font_import = task
 
     # Called when the user reaches the root of the directory tree
     def exit_manager(self, *args):
@@ -269,19 +343,19 @@ class ThemeAndStyleScreen(MDScreen):
     def _confirm_delete_all_fonts(self):
         app = MDApp.get_running_app()    
 
-        MDSnackbar(
-            MDSnackbarText(
-                text=app.settings_service.delete_all_fonts()
-            ),
-            y=dp(24),
-            pos_hint={"center_x": 0.5},
-            size_hint_x=0.8,
-        ).open()
-        
-        self.ids.text_style_preview.font_name = "Roboto"
+        show_snackbar(app.settings_service.delete_all_fonts())
     
     # Prompts user to confirm deleting all uploaded fonts
     def _delete_all_fonts(self):
+        from kivymd.uix.button import MDButton, MDButtonText
+        from kivymd.uix.dialog import (
+            MDDialog,
+            MDDialogIcon,
+            MDDialogHeadlineText,
+            MDDialogSupportingText, 
+            MDDialogButtonContainer
+        )
+        
         dialog = MDDialog(
             MDDialogIcon(
                 icon="trash-can",
@@ -314,6 +388,13 @@ class ThemeAndStyleScreen(MDScreen):
         dialog.open()
   
                                                            
+    # Rebuilds the preview markup for the slider value and current font
+    def _update_preview(self, *args):
+        app = MDApp.get_running_app()
+        text = PREVIEW_TEXT.format(size=int(self.ids.font_size_slider.value))
+        self.preview_text = app.settings_service.fallback_markup(text)
+    
+                                                           
     # Enables scrolling if scroll content exceeds viewport
     def _update_scroll(self, *args):
         scroll_view = self.ids.scroll_view
@@ -354,7 +435,7 @@ Builder.load_string("""
                     
                 MDActionTopAppBarButton:
                     icon: "arrow-left"
-                    on_release: app.router.on_back(reload_all=True)          
+                    on_release: app.router.on_back()          
             
             MDTopAppBarTitle:
                 text: "Theme & Style Settings"
@@ -375,6 +456,7 @@ Builder.load_string("""
                                               
                     DSwitch:
                         id: dark_switch
+                        active: app.settings_service.settings.theme_style == "Dark"
                         on_active: root.enable_dark_mode(self, self.active)      
                                         
                     
@@ -388,7 +470,7 @@ Builder.load_string("""
                             
                         MDDropDownItemText:
                             id: color_text
-                            text: app.theme_cls.primary_palette    
+                            text: app.settings_service.settings.primary_palette
                             theme_font_size: "Custom" 
                             font_size: sp(16)                
           
@@ -413,7 +495,8 @@ Builder.load_string("""
                         
                         NotebookLabel:
                             id: text_style_preview
-                            text: f"Latin / {str(int(font_size_slider.value))} / 한국어 / 漢字 / カタカナ / [b]bold[/b] / [i]italic[/i] / [u]underline[/u] /  [s]strikethrough[/s] / [b][i]bolditalic[/b][/i]"
+                            font_name: app.settings_service.settings.font_name or "Roboto"
+                            text: root.preview_text
                             markup: True
                             multiline: True
                             size_hint_y: None
@@ -436,7 +519,7 @@ Builder.load_string("""
                             
                         MDSlider:
                             id: font_size_slider
-                            value: app.settings_service.get_current_font_size()
+                            value: app.settings_service.settings.font_size
                             min: 10
                             max: 50
                             pos_hint: {"center_y": 0.5}
@@ -0,0 +1,58 @@
+from kivy.metrics import dp
+
+
+# Shows a short message at the bottom of the screen
+def show_snackbar(text: str) -> None:
+    from kivymd.uix.snackbar import MDSnackbar, MDSnackbarText
+
+    MDSnackbar(
+        MDSnackbarText(text=text),
+        y=dp(24),
+        pos_hint={"center_x": 0.5},
+        size_hint_x=0.8,
+    ).open()
+
+
+# Snackbar that stays open while a background task runs, with a Cancel
+# button. Call update(fraction) for progress and finish(message) when done.
+class ProgressSnackbar:
+    def __init__(self, label: str, on_cancel):
+        from kivymd.uix.snackbar import (
+            MDSnackbar,
+            MDSnackbarText,
+            MDSnackbarButtonContainer,
+            MDSnackbarActionButton,
+            MDSnackbarActionButtonText
+        )
+
+        self.label = label
+        self.text = MDSnackbarText(text=f"{label}... 0%")
+        self.snackbar = MDSnackbar(
+            self.text,
+            MDSnackbarButtonContainer(
+                MDSnackbarActionButton(
+                    MDSnackbarActionButtonText(text="Cancel"),
+                    on_release=lambda *_: on_cancel()
+                ),
+                pos_hint={"center_y": 0.5}
+            ),
+            y=dp(24),
+            pos_hint={"center_x": 0.5},
+            size_hint_x=0.8,
+            duration=3600,
+        )
+
+
+    def open(self) -> "ProgressSnackbar":
+        self.snackbar.open()
+        return self
+
+
+    def update(self, fraction: float) -> None:
+        self.text.text = f"{self.label}... {int(fraction * 100)}%"
+
+
+    # Closes the progress snackbar and shows the result message
+    def finish(self, message: str) -> None:
+        self.snackbar.dismiss()
+        show_snackbar(message)
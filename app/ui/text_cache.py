@@ -0,0 +1,131 @@
+import hashlib
+from collections import OrderedDict
+
+from kivymd.uix.label import MDLabel
+
+
+# Rendered text kept across labels; textures are RGBA, 4 bytes per pixel
+MAX_TEXTURE_BYTES = 32 * 1024 * 1024
+
+
+# LRU cache of rendered label textures.
+#
+# Rendering text (the core text provider laying out and rasterising
+# glyphs) is the costly part of showing a label. Recycled timeline rows and
+# re-opened pages keep asking for the same strings, so the finished
+# textures are kept, keyed by a hash of the text plus every option that
+# changes the pixels (font name and size, text_size width, markup, color,
+# alignment...). Entries are dropped least recently used first once the
+# total texture size goes over max_bytes.
+#
+# Main thread only. Holds rendered diary text, so it is cleared on lock.
+class TextureCache:
+    def __init__(self, max_bytes: int = MAX_TEXTURE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        # key -> (texture, is_shortened, refs, anchors, size in bytes)
+        self._entries = OrderedDict()
+
+
+    # Key for rendering `text` with a core label's options. The text is
+    # stored as a digest so keys don't keep plain entry text around.
+    # :param text_size: the label's (width, height) bounds, None for unbounded
+    def key(self, text: str, options: dict, text_size: tuple, markup: bool) -> tuple:
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return (
+            digest,
+            options.get("font_name"),
+            options.get("font_size"),
+            text_size,
+            markup,
+            tuple(sorted((name, _freeze(value)) for name, value in options.items()
+                         if name not in _KEY_OPTIONS)),
+        )
+
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+
+
+    def put(self, key: tuple, texture, is_shortened: bool = False,
+            refs: dict = None, anchors: dict = None) -> None:
+        size = texture.width * texture.height * 4
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[4]
+
+        self._entries[key] = (texture, is_shortened, refs or {}, anchors or {}, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self.bytes -= self._entries.popitem(last=False)[1][4]
+            self.stats["evictions"] += 1
+
+
+    # Drops every texture, e.g. after the font or theme changed
+    def clear(self, *args) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+texture_cache = TextureCache()
+
+
+# Label that looks its texture up in texture_cache before asking the text
+# provider to render it, and adds what it renders.
+class CachedLabel(MDLabel):
+    def texture_update(self, *largs):
+        core = self._label
+        text = core.text
+        if not text or (self.strip or self.halign == "justify") and not text.strip():
+            return super().texture_update(*largs)
+
+        key = texture_cache.key(text, core.options, _freeze(core.usersize), self.markup)
+        entry = texture_cache.get(key)
+        if entry is not None:
+            texture, self.is_shortened, refs, anchors, size = entry
+            if self.markup:
+                self.refs, self.anchors = refs, anchors
+            self.texture = texture
+            self.texture_size = list(texture.size)
+            return
+
+        super().texture_update(*largs)
+
+        texture = self.texture
+        if texture is None or texture is core.texture_1px:
+            return
+        texture_cache.put(key, texture, self.is_shortened,
+                          getattr(core, "refs", None), getattr(core, "anchors", None))
+
+        # The core label redraws into its texture when the next text has
+        # the same size; start a new one so the cached pixels stay put
+        core.texture = None
+
+
+# Options already part of the key's named fields. The core label keeps
+# text and text_size outside its options (these entries are stale).
+_KEY_OPTIONS = ("text", "font_name", "font_size", "text_size", "markup")
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((name, _freeze(item)) for name, item in value.items()))
+    return value
@@ -0,0 +1,30 @@
+from kivy.uix.widget import Widget
+
+
+# Calls callback(child) once a KivyMD composite widget has created its
+# sub-widget `name` (an attribute or a KV id), without polling every frame.
+#
+# Checks right away, then re-checks only when the widget's KV rules have
+# been applied (on_kv_post) or its children change. All bindings are
+# removed after the first hit.
+def on_child_created(widget: Widget, name: str, callback) -> None:
+    def find():
+        child = getattr(widget, name, None)
+        if isinstance(child, Widget):
+            return child
+        return widget.ids.get(name)
+
+    child = find()
+    if child is not None:
+        callback(child)
+        return
+
+    def check(*args):
+        child = find()
+        if child is None:
+            return
+
+        widget.unbind(on_kv_post=check, children=check)
+        callback(child)
+
+    widget.bind(on_kv_post=check, children=check)
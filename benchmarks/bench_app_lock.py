@@ -0,0 +1,89 @@
+# Measures app lock key derivation cost and unlock latency, and checks that
+# unlocking never stalls the main thread: the Clock is ticked while the
+# worker derives the key and the longest gap between ticks is reported.
+#
+#   python benchmarks/bench_app_lock.py [--runs 5]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.clock import Clock
+
+from app.services.app_lock import PBKDF2_ITERATIONS, AppLock, derive_key, new_kdf_config
+
+PASSCODE = "correct horse"
+
+
+def time_kdf(config: dict, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        derive_key(PASSCODE, config)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+# Unlocks while ticking the Clock like the app's main loop would.
+# Returns (ms until unlock() returned, ms until the callback ran, longest tick gap ms)
+def time_unlock(lock: AppLock) -> tuple[float, float, float]:
+    result = []
+    start = time.perf_counter()
+    lock.unlock(PASSCODE, result.append)
+    returned = (time.perf_counter() - start) * 1000
+
+    last_tick = time.perf_counter()
+    longest_gap = 0
+    while not result:
+        Clock.tick()
+        now = time.perf_counter()
+        longest_gap = max(longest_gap, now - last_tick)
+        last_tick = now
+        time.sleep(0.001)
+
+    assert result[0], "unlock failed"
+    return returned, (time.perf_counter() - start) * 1000, longest_gap * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    config = new_kdf_config()
+    pbkdf2 = {"kdf": "pbkdf2_sha256", "iterations": PBKDF2_ITERATIONS, "salt": config["salt"]}
+    print(f"{config['kdf']:<16} {time_kdf(config, args.runs):>8.1f} ms per derivation")
+    if config["kdf"] != "pbkdf2_sha256":
+        print(f"{'pbkdf2_sha256':<16} {time_kdf(pbkdf2, args.runs):>8.1f} ms per derivation")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock = AppLock(os.path.join(tmp, "app_lock.json"))
+        done = []
+        lock.set_passcode(PASSCODE, lambda: done.append(True))
+        while not done:
+            Clock.tick()
+            time.sleep(0.001)
+
+        samples = []
+        for _ in range(args.runs):
+            lock.lock()
+            samples.append(time_unlock(lock))
+
+        returned, total, gap = (statistics.median(column) for column in zip(*samples))
+        print(f"\nunlock() returns after   {returned:8.2f} ms (main thread)")
+        print(f"unlocked after           {total:8.1f} ms")
+        print(f"longest main loop gap    {gap:8.2f} ms")
+
+        # A cached session skips key derivation entirely
+        start = time.perf_counter()
+        locked = lock.is_locked()
+        print(f"session check            {(time.perf_counter() - start) * 1000:8.4f} ms (locked: {locked})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Types into entries of growing size and compares autosaving by rewriting
+# the whole entry with journaling only the change:
+#   main ms    time the editor's thread spends handing over each autosave
+#   save ms    time until the autosave is on disk (background)
+#   bytes      written per autosave
+# and how long replaying an un-compacted journal takes after a "crash".
+#
+#   python benchmarks/bench_editor_journal.py [--saves 50]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.calendar_index import CalendarIndex
+from app.services.diary_repository import DiaryRepository
+from app.services.entry_journal import EntryJournal
+from app.services.search_index import SearchIndex
+
+from bench_search import WORDS, percentile
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+# Keystrokes between autosaves
+KEYSTROKES_PER_SAVE = 12
+
+
+def make_body(size: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+# Types a few words at one spot, as between two autosaves
+def type_burst(body: str, rng: random.Random) -> str:
+    position = rng.randint(0, len(body))
+    typed = " ".join(rng.choices(WORDS, k=3))[:KEYSTROKES_PER_SAVE] + " "
+    return body[:position] + typed + body[position:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--saves", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = DiaryRepository(os.path.join(tmp, "diary.db"))
+        SearchIndex(repository)
+        CalendarIndex(repository)
+
+        print(f"{args.saves} autosaves of {KEYSTROKES_PER_SAVE} keystrokes each")
+        print(f"{'entry':>9} {'mode':<8} {'main p95 ms':>12} {'save p50 ms':>12} {'save p95 ms':>12} {'bytes/save':>11}")
+
+        for size in SIZES:
+            rng = random.Random(size)
+            body = make_body(size, rng)
+            entry = repository.save_entry({"entry_date": "2024-05-01", "title": "Long day", "body": body}).result()
+
+            # Baseline: save the whole entry every time
+            main_ms, save_ms = [], []
+            for _ in range(args.saves):
+                body = type_burst(body, rng)
+                start = time.perf_counter()
+                future = repository.save_entry(dict(entry, body=body))
+                main_ms.append((time.perf_counter() - start) * 1000)
+                future.result()
+                save_ms.append((time.perf_counter() - start) * 1000)
+            report(size, "full", main_ms, save_ms, len(body.encode("utf-8")))
+
+            # Journal; compaction off so every save is a delta
+            journal = EntryJournal(repository, os.path.join(tmp, "journal.jsonl"),
+                                   compact_every=args.saves + 1, compact_interval=3600)
+            journal.open(repository.get_entry(entry["id"]).result()).result()
+            main_ms, save_ms = [], []
+            for _ in range(args.saves):
+                body = type_burst(body, rng)
+                start = time.perf_counter()
+                future = journal.record("Long day", body)
+                main_ms.append((time.perf_counter() - start) * 1000)
+                future.result()
+                save_ms.append((time.perf_counter() - start) * 1000)
+            report(size, "journal", main_ms, save_ms, journal.stats["bytes"] / args.saves)
+
+            # Crash before compaction: a new journal replays the deltas
+            journal.detach().result()
+            start = time.perf_counter()
+            recovered = EntryJournal(repository, journal.path).recover().result()
+            replay = (time.perf_counter() - start) * 1000
+            assert recovered["body"] == body
+            print(f"{'':>9} {'replay':<8} {replay:>12.2f} ms for {args.saves} deltas")
+
+        repository.close()
+
+
+def report(size: int, mode: str, main_ms: list[float], save_ms: list[float], bytes_per_save: float):
+    print(
+        f"{size:>9} {mode:<8} {percentile(main_ms, 0.95):>12.3f} {percentile(save_ms, 0.5):>12.2f} "
+        f"{percentile(save_ms, 0.95):>12.2f} {bytes_per_save:>11.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
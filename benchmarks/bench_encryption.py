@@ -0,0 +1,95 @@
+# Compares a plain and an encrypted diary: timeline paging, main-thread
+# decryption of the rows that scroll into view, and search latency.
+# The frame budget at 60 fps is 16.7 ms.
+#
+#   python benchmarks/bench_encryption.py [--entries 10000]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.diary_repository import DiaryRepository
+from app.services.entry_crypto import EntryCipher
+from app.services.search_index import SearchIndex
+
+from bench_search import QUERIES, make_entries, percentile
+
+FRAME_MS = 1000 / 60
+
+# Rows that come into view per frame while flinging the timeline
+ROWS_PER_FRAME = 4
+PAGE_SIZE = 50
+
+
+def build(path: str, entries: list[dict], cipher) -> tuple[DiaryRepository, SearchIndex]:
+    repository = DiaryRepository(path)
+    repository.cipher = cipher
+    search = SearchIndex(repository)
+    for batch in range(0, len(entries), 1000):
+        repository.save_entries(entries[batch:batch + 1000]).result()
+    return repository, search
+
+
+# Pages through the whole timeline. Returns (page fetch ms, per-frame reveal ms)
+def scroll(repository: DiaryRepository) -> tuple[list[float], list[float]]:
+    fetch_samples, frame_samples = [], []
+    after = None
+    while True:
+        start = time.perf_counter()
+        page = repository.get_entries_page(after, PAGE_SIZE).result()
+        fetch_samples.append((time.perf_counter() - start) * 1000)
+        if not page:
+            return fetch_samples, frame_samples
+
+        # What the main thread does as rows scroll into view
+        for first in range(0, len(page), ROWS_PER_FRAME):
+            start = time.perf_counter()
+            for row in page[first:first + ROWS_PER_FRAME]:
+                repository.reveal(row, "title")
+                repository.reveal(row, "preview")
+            frame_samples.append((time.perf_counter() - start) * 1000)
+
+        after = (page[-1]["entry_date"], page[-1]["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    entries = list(make_entries(args.entries, random.Random(42)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, cipher in (("plain", None), ("encrypted", EntryCipher(os.urandom(32)))):
+            start = time.perf_counter()
+            repository, search = build(os.path.join(tmp, f"{label}.db"), entries, cipher)
+            print(f"\n{label}: {args.entries} entries saved in {time.perf_counter() - start:.2f} s")
+
+            fetch, frames = scroll(repository)
+            print(f"  page fetch        p50 {percentile(fetch, 0.5):6.2f} ms  p95 {percentile(fetch, 0.95):6.2f} ms")
+            print(
+                f"  reveal per frame  p50 {percentile(frames, 0.5):6.3f} ms  p95 {percentile(frames, 0.95):6.3f} ms"
+                f"  max {max(frames):6.3f} ms (budget {FRAME_MS:.1f} ms)"
+            )
+
+            samples = []
+            for query in QUERIES:
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    search.search(query).result()
+                    samples.append((time.perf_counter() - start) * 1000)
+            print(f"  search            p50 {percentile(samples, 0.5):6.2f} ms  p95 {percentile(samples, 0.95):6.2f} ms")
+
+            if cipher:
+                print(f"  decrypt cache     {cipher.cache_stats}")
+            repository.close()
+
+
+if __name__ == "__main__":
+    main()
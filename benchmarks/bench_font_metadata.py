@@ -0,0 +1,148 @@
+# Indexes a synthetic font tree with the font registry, which reads each
+# file's name/OS/2 tables, and reports:
+#   cold      first scan, metadata read from every file
+#   warm      rescan of every folder with the metadata kept in the manifest
+#   correct   families whose four styles were all picked correctly, by
+#             metadata and by the old filename heuristics
+# Half the families have misleading filenames ("font1.ttf"). Each file is
+# padded with a sparse glyf table to `--size-kb`, which is never read.
+#
+#   python benchmarks/bench_font_metadata.py [--families 100] [--size-kb 2000]
+
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KIVY_NO_ARGS", "1")  # keep Kivy from parsing --families
+
+from app.services.font_registry import FontRegistry
+from app.services.font_styles import FONT_EXTENSIONS, pick_styles
+
+# (subfamily, weight, italic) and the slot it should fill
+STYLES = {
+    "fn_regular": ("Regular", 400, False),
+    "fn_bold": ("Bold", 700, False),
+    "fn_italic": ("Italic", 400, True),
+    "fn_bolditalic": ("Bold Italic", 700, True),
+}
+
+
+def name_table(family: str, subfamily: str) -> bytes:
+    records, strings = b"", b""
+    for name_id, text in ((1, family), (2, subfamily), (16, family), (17, subfamily)):
+        raw = text.encode("utf-16-be")
+        records += struct.pack(">HHHHHH", 3, 1, 0x409, name_id, len(raw), len(strings))
+        strings += raw
+    return struct.pack(">HHH", 0, 4, 6 + len(records)) + records + strings
+
+
+def os2_table(weight: int, italic: bool) -> bytes:
+    table = bytearray(78)
+    struct.pack_into(">H", table, 4, weight)
+    struct.pack_into(">H", table, 62, 0x01 if italic else (0x20 if weight >= 700 else 0x40))
+    return bytes(table)
+
+
+def write_font(path: str, family: str, subfamily: str, weight: int, italic: bool, size: int) -> None:
+    tables = [(b"OS/2", os2_table(weight, italic)), (b"name", name_table(family, subfamily))]
+    offset = 12 + 16 * (len(tables) + 1)
+    directory, body = b"", b""
+    for tag, data in tables:
+        data += b"\0" * (-len(data) % 4)
+        directory += struct.pack(">4sIII", tag, 0, offset + len(body), len(data))
+        body += data
+    glyf_offset = offset + len(body)
+    directory += struct.pack(">4sIII", b"glyf", 0, glyf_offset, max(0, size - glyf_offset))
+
+    header = struct.pack(">IHHHH", 0x00010000, len(tables) + 1, 32, 1, 0)
+    with open(path, "wb") as file:
+        file.write(header + directory + body)
+        file.truncate(max(size, glyf_offset))  # sparse; never read
+
+
+# One folder per family; odd families have filenames that say nothing
+# (or the wrong thing) about their styles
+def build_tree(root: str, families: int, size: int) -> dict[str, dict[str, str]]:
+    expected = {}
+    for index in range(families):
+        family = f"Family {index:03d}"
+        folder = f"Family_{index:03d}"
+        os.makedirs(os.path.join(root, folder))
+        expected[folder] = {}
+        for number, (slot, (subfamily, weight, italic)) in enumerate(STYLES.items()):
+            if index % 2:
+                filename = f"font{number}.ttf"
+            else:
+                filename = f"{folder}-{subfamily.replace(' ', '')}.ttf"
+            path = os.path.join(root, folder, filename)
+            write_font(path, family, subfamily, weight, italic, size)
+            expected[folder][slot] = path
+    return expected
+
+
+# Old path: styles from filenames only
+def filename_styles(root: str) -> dict[str, dict[str, str]]:
+    found = {}
+    for folder in os.listdir(root):
+        path = os.path.join(root, folder)
+        if not os.path.isdir(path):
+            continue
+        files = [
+            (name, os.path.join(path, name)) for name in os.listdir(path)
+            if name.lower().endswith(FONT_EXTENSIONS)
+        ]
+        found[folder] = pick_styles(files, folder)
+    return found
+
+
+def correct(found: dict, expected: dict) -> int:
+    return sum(1 for folder, styles in expected.items() if found.get(folder) == styles)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--families", type=int, default=100)
+    parser.add_argument("--size-kb", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "fonts")
+        expected = build_tree(root, args.families, args.size_kb * 1024)
+        manifest = os.path.join(tmp, "font_manifest.json")
+        files = args.families * len(STYLES)
+        print(f"{args.families} families, {files} files of {args.size_kb} KB")
+
+        start = time.perf_counter()
+        registry = FontRegistry(root, manifest)
+        registry.load()
+        cold = time.perf_counter() - start
+        found = {name: entry["styles"] for name, entry in registry.fonts.items()}
+
+        # Every folder looks changed, so each one is listed again
+        for entry in registry.fonts.values():
+            entry["mtime"] = None
+        start = time.perf_counter()
+        registry.validate()
+        warm = time.perf_counter() - start
+        found_warm = {name: entry["styles"] for name, entry in registry.fonts.items()}
+
+        start = time.perf_counter()
+        by_filename = filename_styles(root)
+        filenames = time.perf_counter() - start
+
+        print(f"{'scan':<22} {'ms':>8} {'us/file':>8} {'correct':>8}")
+        print(f"{'metadata (cold)':<22} {cold * 1000:>8.1f} {cold / files * 1e6:>8.1f} "
+              f"{correct(found, expected):>8}")
+        print(f"{'metadata (warm)':<22} {warm * 1000:>8.1f} {warm / files * 1e6:>8.1f} "
+              f"{correct(found_warm, expected):>8}")
+        print(f"{'filenames (old)':<22} {filenames * 1000:>8.1f} {filenames / files * 1e6:>8.1f} "
+              f"{correct(by_filename, expected):>8}")
+        print(f"dropdown: {list(registry.get_fonts().values())[:3]} ...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Imports synthetic font ZIPs into the content-addressed font store and
+# reports disk use and import times:
+#   first      every family imported once
+#   again      half the ZIPs imported again under another name (a second
+#              download, "Family_000 (1).zip"): their files are already stored
+#   unchanged  every original ZIP imported again: returns after reading the
+#              archive directory, compared with a full re-extraction
+#   delete     delete all fonts, then garbage collection
+# Before the store every import wrote its own copies, so disk use was the
+# total size of all font folders.
+#
+#   python benchmarks/bench_font_store.py [--families 20] [--size-kb 500]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KIVY_NO_ARGS", "1")  # keep Kivy from parsing --families
+
+from app.services.font_import import FontImportTask
+from app.services.font_registry import FontRegistry
+from app.services.font_store import IMPORTS_FILE, FontStore
+
+from bench_font_metadata import STYLES, write_font
+
+
+def make_zips(folder: str, families: int, size: int) -> list[str]:
+    paths = []
+    for index in range(families):
+        family = f"Family_{index:03d}"
+        zip_path = os.path.join(folder, f"{family}.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for subfamily, weight, italic in STYLES.values():
+                font_path = os.path.join(folder, f"{family}-{subfamily.replace(' ', '')}.ttf")
+                write_font(font_path, family.replace("_", " "), subfamily, weight, italic, size)
+                archive.write(font_path, os.path.basename(font_path))
+                os.remove(font_path)
+        paths.append(zip_path)
+    return paths
+
+
+def import_all(zip_paths: list[str], fonts_path: str, store: FontStore) -> float:
+    start = time.perf_counter()
+    for zip_path in zip_paths:
+        message, font_name = FontImportTask(zip_path, fonts_path, store=store).run()
+        assert font_name, message
+    return (time.perf_counter() - start) * 1000
+
+
+def megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--families", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        zips = make_zips(tmp, args.families, args.size_kb * 1024)
+        fonts_path = os.path.join(tmp, "fonts")
+        os.makedirs(fonts_path)
+        store = FontStore(fonts_path)
+
+        # Second downloads of half the families, under new names
+        copies = []
+        for zip_path in zips[::2]:
+            copy = zip_path[:-len(".zip")] + " (1).zip"
+            shutil.copyfile(zip_path, copy)
+            copies.append(copy)
+
+        print(f"{args.families} families of {len(STYLES)} x {args.size_kb} KB, {len(copies)} imported twice")
+        print(f"{'import':<10} {'ms':>9} {'ms/zip':>8}")
+        first = import_all(zips, fonts_path, store)
+        print(f"{'first':<10} {first:>9.1f} {first / len(zips):>8.2f}")
+        again = import_all(copies, fonts_path, store)
+        print(f"{'again':<10} {again:>9.1f} {again / len(copies):>8.2f}")
+        unchanged = import_all(zips, fonts_path, store)
+        print(f"{'unchanged':<10} {unchanged:>9.1f} {unchanged / len(zips):>8.2f}")
+
+        # Same ZIPs with the import records gone: extracted in full
+        os.remove(os.path.join(store.store_path, IMPORTS_FILE))
+        full = import_all(zips, fonts_path, store)
+        print(f"{'full':<10} {full:>9.1f} {full / len(zips):>8.2f}")
+
+        usage = store.usage()
+        print(f"\n{usage['files']} font files, {usage['stored']} stored")
+        print(f"without store {megabytes(usage['bytes']):>10}")
+        print(f"with store    {megabytes(usage['stored_bytes']):>10}")
+        print(f"saved         {megabytes(usage['saved_bytes']):>10}")
+
+        registry = FontRegistry(fonts_path, os.path.join(tmp, "font_manifest.json"))
+        registry.load()
+        start = time.perf_counter()
+        deleted, _ = registry.remove_all()
+        files, freed = store.collect_garbage()
+        delete = (time.perf_counter() - start) * 1000
+        print(f"\ndelete {deleted} fonts + GC: {delete:.1f} ms, {files} files / {megabytes(freed)} freed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Compares the old per-style directory walks with the single-pass classifier
+# over a synthetic 5,000-file font tree.
+#
+#   python benchmarks/bench_font_styles.py [--files 5000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.font_styles import FONT_EXTENSIONS, pick_styles
+
+
+STYLES = ["Regular", "Bold", "Italic", "BoldItalic", "Light", "SemiBold", "Black", "ThinItalic"]
+
+
+def build_tree(root: str, total_files: int) -> list[str]:
+    folders = []
+    per_folder = len(STYLES) + 2
+    for i in range(max(1, total_files // per_folder)):
+        family = f"Family{i:04d}"
+        folder = os.path.join(root, family)
+        os.makedirs(os.path.join(folder, "static"), exist_ok=True)
+        for style in STYLES:
+            open(os.path.join(folder, "static", f"{family}-{style}.ttf"), "wb").close()
+        open(os.path.join(folder, f"{family}[wght].ttf"), "wb").close()
+        open(os.path.join(folder, "OFL.txt"), "wb").close()
+        folders.append(folder)
+    return folders
+
+
+# Old path: one os.walk per style, as _find_file_by_style did
+def old_find_file_by_style(dirpath: str, style: str) -> str | None:
+    patterns = [f"-{style}.ttf", f"_{style}.ttf", f" {style}.ttf"]
+    for root, _, files in os.walk(dirpath):
+        for f in files:
+            lf = f.lower()
+            if not lf.endswith(".ttf"):
+                continue
+            for pattern in patterns:
+                if lf.endswith(pattern):
+                    return os.path.join(root, f)
+    return None
+
+
+# Old path: substring checks over a second listing, as _register_fonts did
+def old_register_styles(folder: str) -> dict[str, str]:
+    font_files = {}
+    for root, _, files in os.walk(folder):
+        for file in files:
+            lower_file = file.lower()
+            if not lower_file.endswith((".ttf", ".otf")):
+                continue
+            if "-regular" in lower_file:
+                font_files["fn_regular"] = file
+            elif "-bolditalic" in lower_file:
+                font_files["fn_bolditalic"] = file
+            elif "-bold" in lower_file:
+                font_files["fn_bold"] = file
+            elif "-italic" in lower_file:
+                font_files["fn_italic"] = file
+    return font_files
+
+
+# Import (one walk per style) followed by registration (another listing)
+def old_path(folders: list[str]) -> int:
+    found = 0
+    for folder in folders:
+        for style in ("regular", "bold", "italic", "bolditalic"):
+            if old_find_file_by_style(folder, style):
+                found += 1
+        old_register_styles(folder)
+    return found
+
+
+# New path: one walk per folder, every file classified once and the
+# result shared by import and registration
+def new_path(folders: list[str]) -> int:
+    found = 0
+    for folder in folders:
+        files = []
+        for root, _, names in os.walk(folder):
+            files.extend(
+                (name, os.path.join(root, name)) for name in names
+                if name.lower().endswith(FONT_EXTENSIONS)
+            )
+        found += len(pick_styles(files, os.path.basename(folder)))
+    return found
+
+
+def timed(func, *args) -> tuple[float, int]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        folders = build_tree(root, args.files)
+        print(f"{len(folders)} font folders, ~{args.files} files")
+
+        old = min(timed(old_path, folders) for _ in range(args.repeat))
+        new = min(timed(new_path, folders) for _ in range(args.repeat))
+
+        print(f"old (walk per style + register): {old[0] * 1000:8.1f} ms  {old[1]} styles found")
+        print(f"new (single pass):               {new[0] * 1000:8.1f} ms  {new[1]} styles found")
+        print(f"speedup:                         {old[0] / new[0]:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
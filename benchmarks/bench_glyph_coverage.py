@@ -0,0 +1,202 @@
+# Builds the glyph coverage index over a folder of fonts and measures:
+#   build     cold (every cmap parsed) and warm (index on disk, files
+#             unchanged, as on every app start)
+#   lookup    per-string latency of covers(), fallback_chain() (first call
+#             and memoised) and fallback_markup()
+# Without --fonts, `--count` synthetic fonts are generated: a real cmap
+# (format 4, or 12 for emoji) for a random mix of scripts, padded out with
+# a sparse glyf table to `--size-kb`.
+#
+#   python benchmarks/bench_glyph_coverage.py [--count 200] [--size-kb 2000] [--fonts DIR]
+
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KIVY_NO_ARGS", "1")  # keep Kivy from parsing --fonts
+
+from app.services.glyph_coverage import GlyphCoverage
+
+from bench_search import WORDS, percentile
+
+SCRIPTS = {
+    "latin": [(0x20, 0x7E), (0xA0, 0x17F)],
+    "greek": [(0x370, 0x3FF)],
+    "cyrillic": [(0x400, 0x4FF)],
+    "arabic": [(0x600, 0x6FF)],
+    "devanagari": [(0x900, 0x97F)],
+    "kana": [(0x3040, 0x30FF)],
+    "hangul": [(0x3130, 0x318F), (0xAC00, 0xD7A3)],
+    "cjk": [(0x3000, 0x303F), (0x4E00, 0x9FFF)],
+    "emoji": [(0x1F300, 0x1F64F)],
+}
+
+SAMPLES = ["한국어", "漢字", "カタカナ", "Ελληνικά", "Привет", "مرحبا", "नमस्ते", "\U0001F600\U0001F334"]
+
+LOOKUPS = 2000
+
+
+#-----------------------------
+# SYNTHETIC FONTS
+#-----------------------------
+
+def cmap_format_4(ranges: list[tuple[int, int]]) -> bytes:
+    segments = [(start, end) for start, end in ranges if end <= 0xFFFF] + [(0xFFFF, 0xFFFF)]
+    count = len(segments)
+    glyph = 1
+    deltas = []
+    for start, end in segments[:-1]:
+        deltas.append((glyph - start) & 0xFFFF)
+        glyph += end - start + 1
+    deltas.append(1)
+
+    body = struct.pack(f">{count}H", *(end for _, end in segments)) + b"\0\0"
+    body += struct.pack(f">{count}H", *(start for start, _ in segments))
+    body += struct.pack(f">{count}H", *deltas)
+    body += struct.pack(f">{count}H", *([0] * count))
+    return struct.pack(">HHHHHHH", 4, 14 + len(body), 0, 2 * count, 0, 0, 0) + body
+
+
+def cmap_format_12(ranges: list[tuple[int, int]]) -> bytes:
+    groups = b""
+    glyph = 1
+    for start, end in ranges:
+        groups += struct.pack(">III", start, end, glyph)
+        glyph += end - start + 1
+    return struct.pack(">HHIII", 12, 0, 16 + len(groups), 0, len(ranges)) + groups
+
+
+def write_font(path: str, ranges: list[tuple[int, int]], size: int) -> None:
+    if ranges[-1][1] > 0xFFFF:
+        subtable, encoding = cmap_format_12(ranges), 10
+    else:
+        subtable, encoding = cmap_format_4(ranges), 1
+    cmap = struct.pack(">HHHHI", 0, 1, 3, encoding, 12) + subtable
+    cmap += b"\0" * (-len(cmap) % 4)
+
+    tables = 2
+    cmap_offset = 12 + 16 * tables
+    glyf_offset = cmap_offset + len(cmap)
+    glyf_length = max(0, size - glyf_offset)
+    header = struct.pack(">IHHHH", 0x00010000, tables, 32, 1, 0)
+    directory = struct.pack(">4sIII", b"cmap", hash(cmap) & 0xFFFFFFFF, cmap_offset, len(cmap))
+    directory += struct.pack(">4sIII", b"glyf", 0, glyf_offset, glyf_length)
+
+    with open(path, "wb") as file:
+        file.write(header + directory + cmap)
+        file.truncate(glyf_offset + glyf_length)  # sparse; never read
+
+
+# {name: path} of `count` fonts, each Latin plus up to two other scripts
+# with a few glyphs missing
+def make_fonts(folder: str, count: int, size: int, rng: random.Random) -> dict[str, str]:
+    others = [name for name in SCRIPTS if name != "latin"]
+    fonts = {}
+    for index in range(count):
+        scripts = ["latin"] + rng.sample(others, rng.randint(0, 2))
+        ranges = []
+        for script in scripts:
+            for start, end in SCRIPTS[script]:
+                # Punch holes so ranges look like a real font's
+                position = start
+                while position <= end:
+                    run_end = min(end, position + rng.randint(8, 120))
+                    ranges.append((position, run_end))
+                    position = run_end + rng.randint(2, 6)
+        ranges.sort()
+
+        name = f"Synthetic{index:03d}"
+        path = os.path.join(folder, f"{name}-Regular.ttf")
+        write_font(path, ranges, size)
+        fonts[name] = path
+    return fonts
+
+
+def font_folder(folder: str) -> dict[str, str]:
+    fonts = {}
+    for root, _, files in os.walk(folder):
+        for filename in files:
+            if filename.lower().endswith((".ttf", ".otf", ".ttc")):
+                path = os.path.join(root, filename)
+                fonts[path] = path
+    return fonts
+
+
+def make_strings(count: int, rng: random.Random) -> list[str]:
+    strings = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(3, 12))
+        if rng.random() < 0.6:
+            words.insert(rng.randint(0, len(words)), rng.choice(SAMPLES))
+        strings.append(" ".join(words))
+    return strings
+
+
+#-----------------------------
+# MEASURE
+#-----------------------------
+
+def timed_us(func, strings: list[str]) -> list[float]:
+    samples = []
+    for text in strings:
+        start = time.perf_counter()
+        func(text)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=2000)
+    parser.add_argument("--fonts", help="folder of real fonts instead of synthetic ones")
+    args = parser.parse_args()
+
+    rng = random.Random(23)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fonts:
+            fonts = font_folder(args.fonts)
+        else:
+            fonts = make_fonts(tmp, args.count, args.size_kb * 1024, rng)
+        index_path = os.path.join(tmp, "glyph_coverage.json")
+        primary = sorted(fonts)[0]
+
+        coverage = GlyphCoverage(index_path)
+        cold = coverage.update(fonts)
+
+        warm_coverage = GlyphCoverage(index_path)
+        start = time.perf_counter()
+        warm_coverage.load()
+        warm = warm_coverage.update(fonts)
+        warm_seconds = time.perf_counter() - start
+
+        print(f"{len(fonts)} fonts, index {os.path.getsize(index_path) / 1024:.0f} KB")
+        print(f"{'build':<10} {'ms':>9} {'parsed':>7} {'cached':>7} {'failed':>7}")
+        print(f"{'cold':<10} {cold['seconds'] * 1000:>9.1f} {cold['parsed']:>7} {cold['cached']:>7} {cold['failed']:>7}")
+        print(f"{'warm':<10} {warm_seconds * 1000:>9.1f} {warm['parsed']:>7} {warm['cached']:>7} {warm['failed']:>7}")
+
+        strings = make_strings(LOOKUPS, rng)
+        print(f"\n{LOOKUPS} strings, primary font {os.path.basename(primary)}")
+        print(f"{'lookup':<16} {'p50 us':>8} {'p95 us':>8}")
+
+        def first_chain(text):
+            warm_coverage._state[2].clear()  # forget memoised chains
+            warm_coverage.fallback_chain(text, primary)
+
+        for label, func in (
+            ("covers", lambda text: warm_coverage.covers(primary, text)),
+            ("chain (first)", first_chain),
+            ("chain (cached)", lambda text: warm_coverage.fallback_chain(text, primary)),
+            ("markup", lambda text: warm_coverage.fallback_markup(text, primary)),
+        ):
+            samples = timed_us(func, strings)
+            print(f"{label:<16} {percentile(samples, 0.5):>8.1f} {percentile(samples, 0.95):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Measures restoring a JSON Lines export: bulk import (batched, deferred
+# indexing, dedupe) against saving the same entries one commit per row,
+# and re-importing the same file (every entry a duplicate).
+#
+#   python benchmarks/bench_import.py [--entries 10000]
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.calendar_index import CalendarIndex
+from app.services.diary_repository import DiaryRepository
+from app.services.entry_import import EntryImportTask
+from app.services.search_index import SearchIndex
+
+from bench_search import make_entries
+
+
+def open_repository(path: str) -> DiaryRepository:
+    repository = DiaryRepository(path)
+    SearchIndex(repository)
+    CalendarIndex(repository)
+    return repository
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+
+    entries = list(make_entries(args.entries, random.Random(42)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_path = os.path.join(tmp, "export.jsonl")
+        with open(export_path, "w", encoding="utf-8") as file:
+            for entry in entries:
+                file.write(json.dumps(entry) + "\n")
+
+        # Baseline: one transaction (and index update) per entry
+        repository = open_repository(os.path.join(tmp, "rows.db"))
+        start = time.perf_counter()
+        for entry in entries:
+            repository.save_entry(entry).result()
+        per_row = time.perf_counter() - start
+        repository.close()
+
+        repository = open_repository(os.path.join(tmp, "bulk.db"))
+        message, first = EntryImportTask(repository, export_path).run()
+        message, again = EntryImportTask(repository, export_path).run()
+        count = repository.count().result()
+        repository.close()
+
+        print(f"{args.entries} entries")
+        print(f"{'per-row commits':<18} {per_row:>8.2f} s {args.entries / per_row:>10.0f} entries/s")
+        print(f"{'bulk import':<18} {first['seconds']:>8.2f} s {first['per_second']:>10.0f} entries/s")
+        print(
+            f"{'re-import':<18} {again['seconds']:>8.2f} s "
+            f"{again['duplicates']:>10} duplicates skipped"
+        )
+        print(f"speedup: {per_row / first['seconds']:.1f}x, entries stored: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Builds a synthetic diary and measures full-text index build time, index
+# size and query latency percentiles.
+#
+#   python benchmarks/bench_search.py [--entries 10000]
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.diary_repository import DiaryRepository
+from app.services.search_index import SearchIndex
+
+
+WORDS = (
+    "morning coffee walk rain sunny work meeting friend family dinner book "
+    "read wrote tired happy anxious calm garden train city beach mountain "
+    "music movie dream sleep early late weekend holiday birthday school "
+    "project deadline run gym bike cooking bread market letter phone call "
+    "quiet noisy cold warm snow spring summer autumn winter river forest"
+).split()
+
+QUERIES = ["morning", "coffee", "rain walk", "birth", '"quiet morning"', "moun", "garden bread", "xyzzy"]
+
+
+# Zipf-like vocabulary: the common words above plus generated rare ones
+def make_vocabulary(rng: random.Random, size: int = 5000) -> tuple[list[str], list[float]]:
+    syllables = ["ka", "lo", "mi", "ren", "sa", "to", "vel", "du", "ne", "ri", "po", "sha"]
+    words = list(WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choices(syllables, k=rng.randint(2, 4))))
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def make_entries(count: int, rng: random.Random):
+    words, weights = make_vocabulary(rng)
+    start = datetime.date.today() - datetime.timedelta(days=count)
+    for day in range(count):
+        length = rng.randint(80, 600)
+        yield {
+            "entry_date": (start + datetime.timedelta(days=day)).isoformat(),
+            "title": " ".join(rng.choices(words, weights, k=rng.randint(2, 6))).capitalize(),
+            "body": " ".join(rng.choices(words, weights, k=length)),
+        }
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "diary.db")
+        repository = DiaryRepository(db_path)
+        search = SearchIndex(repository)
+
+        entries = list(make_entries(args.entries, rng))
+        start = time.perf_counter()
+        for batch in range(0, len(entries), 1000):
+            repository.save_entries(entries[batch:batch + 1000]).result()
+        build = time.perf_counter() - start
+
+        def index_bytes(conn):
+            return conn.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'entries_fts%'"
+            ).fetchone()[0]
+
+        try:
+            size = repository.submit(index_bytes).result()
+        except Exception:
+            size = None
+
+        print(f"{args.entries} entries, insert + index: {build:.2f} s")
+        if size:
+            print(f"index size: {size / 1024 / 1024:.1f} MB")
+        print(f"db file size: {os.path.getsize(db_path) / 1024 / 1024:.1f} MB")
+
+        print(f"\n{'query':<18} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                results = search.search(query).result()
+                samples.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{query:<18} {len(results):>6} {percentile(samples, 0.5):>8.2f} "
+                f"{percentile(samples, 0.95):>8.2f} {max(samples):>8.2f}"
+            )
+
+        repository.close()
+
+
+if __name__ == "__main__":
+    main()
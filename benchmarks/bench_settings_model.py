@@ -0,0 +1,101 @@
+# Microbenchmarks for the typed settings model against the plain dict it
+# replaced:
+#   read    one setting
+#   write   one setting (the model validates and notifies its observers)
+#   notify  one change with `--widgets` observers spread over the fields.
+#           The dict could only signal "something changed" (font_styles was
+#           re-dispatched), so every observer re-ran; the model only calls
+#           observers of the changed field.
+#
+#   python benchmarks/bench_settings_model.py [--widgets 50]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.event import EventDispatcher
+from kivy.properties import DictProperty
+
+from app.services.settings_model import SettingsModel
+
+OPERATIONS = 200_000
+
+
+# Stand-in for theme_cls: font_styles is dispatched as a whole
+class DictTheme(EventDispatcher):
+    font_styles = DictProperty({})
+
+
+def per_op_ns(func, operations: int = OPERATIONS) -> float:
+    start = time.perf_counter()
+    func(operations)
+    return (time.perf_counter() - start) / operations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--widgets", type=int, default=50)
+    args = parser.parse_args()
+
+    settings = {"theme_style": "Light", "primary_palette": "Blue", "font_name": "",
+                "font_size": 16, "autosave_interval": 2.0}
+    model = SettingsModel()
+    theme = DictTheme()
+
+    def dict_read(n):
+        for _ in range(n):
+            settings.get("font_size")
+
+    def model_read(n):
+        for _ in range(n):
+            model.font_size
+
+    def dict_write(n):
+        for i in range(n):
+            settings["font_size"] = 10 + i % 40
+
+    def model_write(n):
+        for i in range(n):
+            model.font_size = 10 + i % 40
+
+    print(f"{'operation':<10} {'dict ns':>10} {'model ns':>10}")
+    print(f"{'read':<10} {per_op_ns(dict_read):>10.0f} {per_op_ns(model_read):>10.0f}")
+    print(f"{'write':<10} {per_op_ns(dict_write):>10.0f} {per_op_ns(model_write):>10.0f}")
+
+    # Observers, one field each, like widgets showing one value. Each is
+    # its own function: Kivy binds an identical callback only once.
+    calls = {"dict": 0, "model": 0}
+
+    def observer(kind):
+        def on_change(*args):
+            calls[kind] += 1
+        return on_change
+
+    for i in range(args.widgets):
+        theme.bind(font_styles=observer("dict"))
+        model.bind(**{SettingsModel.FIELDS[i % len(SettingsModel.FIELDS)]: observer("model")})
+
+    changes = OPERATIONS // 100
+
+    def dict_notify(n):
+        for i in range(n):
+            settings["font_size"] = 10 + i % 40
+            theme.property("font_styles").dispatch(theme)
+
+    def model_notify(n):
+        for i in range(n):
+            model.font_size = 10 + i % 40
+
+    dict_ns = per_op_ns(dict_notify, changes)
+    model_ns = per_op_ns(model_notify, changes)
+    print(
+        f"{'notify':<10} {dict_ns:>10.0f} {model_ns:>10.0f}   observers called per change: "
+        f"dict {calls['dict'] / changes:.0f}, model {calls['model'] / changes:.0f} of {args.widgets}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Scrolls recycled timeline rows down a synthetic diary and back up, and
+# compares per-frame text rendering with and without the texture cache.
+# Needs a Kivy window (a GL context) for the text provider.
+#
+#   python benchmarks/bench_text_cache.py [--rows 300] [--passes 3]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.core.window import Window  # noqa: F401 (creates the GL context)
+from kivymd.app import MDApp
+from kivymd.uix.label import MDLabel
+
+from app.ui.text_cache import CachedLabel, texture_cache
+
+from bench_search import make_entries, percentile
+
+FRAME_MS = 1000 / 60
+
+# Rows that come into view per frame while flinging, and views recycled
+ROWS_PER_FRAME = 4
+VIEWS = 12
+ROW_WIDTH = 1020
+
+
+def make_views(label_class) -> list[tuple]:
+    views = []
+    for _ in range(VIEWS):
+        title = label_class(font_style="Title", role="medium", shorten=True)
+        preview = label_class(font_style="Body", role="medium", valign="top")
+        title.text_size = (ROW_WIDTH, None)
+        preview.text_size = (ROW_WIDTH, 170)
+        views.append((title, preview))
+    return views
+
+
+# Down the rows and back up, `passes` times. Returns per-frame ms
+def scroll(views: list[tuple], rows: list[dict], passes: int) -> list[float]:
+    order = list(range(len(rows)))
+    order = (order + order[::-1]) * passes
+
+    samples = []
+    for first in range(0, len(order), ROWS_PER_FRAME):
+        start = time.perf_counter()
+        for index in order[first:first + ROWS_PER_FRAME]:
+            title, preview = views[index % VIEWS]
+            title.text = rows[index]["title"] or "Untitled"
+            preview.text = " ".join(rows[index]["body"].split())[:300]
+            title.texture_update()
+            preview.texture_update()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+class BenchApp(MDApp):
+    def __init__(self, args, **kwargs):
+        super().__init__(**kwargs)
+        self.args = args
+
+    def build(self):
+        return MDLabel()
+
+    def on_start(self):
+        rows = list(make_entries(self.args.rows, random.Random(3)))
+        print(f"{self.args.rows} rows, {self.args.passes} passes down and up, {ROWS_PER_FRAME} rows per frame")
+        print(f"{'labels':<8} {'frames':>7} {'over budget':>12} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+
+        for name, label_class in (("plain", MDLabel), ("cached", CachedLabel)):
+            texture_cache.clear()
+            samples = scroll(make_views(label_class), rows, self.args.passes)
+            over = sum(1 for sample in samples if sample > FRAME_MS)
+            print(
+                f"{name:<8} {len(samples):>7} {over:>12} {percentile(samples, 0.5):>8.3f} "
+                f"{percentile(samples, 0.95):>8.3f} {max(samples):>8.3f}"
+            )
+
+        print(f"cache: {texture_cache.stats}, {len(texture_cache)} textures, "
+              f"{texture_cache.bytes / 1024 / 1024:.1f} MB of {texture_cache.max_bytes / 1024 / 1024:.0f} MB")
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--passes", type=int, default=3)
+    args = parser.parse_args()
+    BenchApp(args).run()
+
+
+if __name__ == "__main__":
+    main()
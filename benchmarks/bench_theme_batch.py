@@ -0,0 +1,80 @@
+# Counts widget property dispatches for one appearance change: dark mode,
+# a palette, a font and a font size, applied one call at a time and
+# inside settings_service.batch(). `--widgets` observers stand in for the
+# widgets bound to theme_cls.theme_style, primary_palette and font_styles.
+#
+#   python benchmarks/bench_theme_batch.py [--widgets 300]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivymd.app import MDApp
+
+from app.services.settings_service import SettingsService
+
+THEME_PROPERTIES = ("theme_style", "primary_palette", "font_styles")
+
+CHANGES = (
+    {"theme_style": "Dark", "primary_palette": "Teal", "font_name": "Roboto", "font_size": 18},
+    {"theme_style": "Light", "primary_palette": "Blue", "font_name": "Roboto", "font_size": 16},
+)
+
+
+def apply(service: SettingsService, change: dict) -> None:
+    service.apply_theme(theme_style=change["theme_style"])
+    service.apply_theme(primary_palette=change["primary_palette"])
+    service.apply_font(font_name=change["font_name"])
+    service.apply_font_size(font_size=change["font_size"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--widgets", type=int, default=300)
+    args = parser.parse_args()
+
+    app = MDApp()
+    dispatches = {name: 0 for name in THEME_PROPERTIES}
+
+    def observer(name):
+        def on_change(*args):
+            dispatches[name] += 1
+        return on_change
+
+    for i in range(args.widgets):
+        name = THEME_PROPERTIES[i % len(THEME_PROPERTIES)]
+        app.theme_cls.bind(**{name: observer(name)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # settings files are relative to the working directory
+        service = SettingsService(defer_fonts=True)
+
+        print(f"{args.widgets} bound widgets")
+        print(f"{'mode':<10} {'dispatches':>11} {'theme passes':>13} {'ms':>8}")
+
+        for mode, change in zip(("separate", "batch"), CHANGES):
+            for name in dispatches:
+                dispatches[name] = 0
+            passes = service.theme_passes
+
+            start = time.perf_counter()
+            if mode == "batch":
+                with service.batch():
+                    apply(service, change)
+            else:
+                apply(service, change)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{mode:<10} {sum(dispatches.values()):>11} {service.theme_passes - passes:>13} "
+                f"{elapsed:>8.2f}"
+            )
+            service.flush(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Flings a simulated viewport through a synthetic diary at 60 fps, driving
+# TimelineSource the way HomeScreen does, and reports dropped frames:
+#   over budget  main-thread work in a frame exceeded 16.7 ms
+#   blank        the viewport ran past the rows loaded so far
+#
+#   python benchmarks/bench_timeline.py [--entries 10000] [--velocity 12000]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.clock import Clock
+
+from app.services.diary_repository import DiaryRepository
+from app.services.timeline import TimelineSource
+
+from bench_search import make_entries, percentile
+
+FRAME = 1 / 60
+
+# A mid-range phone: 1080 x 2400 px viewport, 16 sp body text at 2.6x
+METRICS = {"width": 1020, "char_width": 22, "line_height": 56, "base_height": 190}
+VIEWPORT = 2000
+PREFETCH_SCREENS = 2
+
+
+class Viewport:
+    def __init__(self, source: TimelineSource):
+        self.source = source
+        self.offset = 0  # px from the top of the loaded rows
+        self.frame_work = 0
+
+    def content_height(self) -> float:
+        return sum(row["height"] for row in self.source.rows)
+
+    # Mirrors HomeScreen: rebuild the data list and keep the visible rows in place
+    def show_older(self, page, dropped):
+        list(self.source.rows)
+        self.offset -= sum(row["height"] for row in dropped)
+
+    def show_newer(self, page, dropped):
+        list(self.source.rows)
+        self.offset += sum(row["height"] for row in page)
+
+    def prefetch(self):
+        prefetch = VIEWPORT * PREFETCH_SCREENS
+        if self.content_height() - (self.offset + VIEWPORT) < prefetch:
+            self.source.load_older(self.show_older)
+        elif self.offset < prefetch:
+            self.source.load_newer(self.show_newer)
+
+
+def fling(viewport: Viewport, velocity: float, seconds: float) -> tuple[list[float], int]:
+    samples, blank = [], 0
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        frame_start = time.perf_counter()
+
+        Clock.tick()  # delivers finished pages
+        viewport.offset += velocity * FRAME
+        viewport.prefetch()
+
+        loaded = viewport.content_height()
+        if viewport.offset < 0 or viewport.offset + VIEWPORT > loaded:
+            if (velocity > 0 and not viewport.source.has_older) or (velocity < 0 and not viewport.source.has_newer):
+                break  # reached an end of the diary
+            blank += 1
+            viewport.offset = min(max(viewport.offset, 0), max(0, loaded - VIEWPORT))
+
+        work = time.perf_counter() - frame_start
+        samples.append(work * 1000)
+        time.sleep(max(0, FRAME - work))
+
+    return samples, blank
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--velocity", type=float, default=12000, help="px per second")
+    parser.add_argument("--seconds", type=float, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = DiaryRepository(os.path.join(tmp, "diary.db"))
+        entries = list(make_entries(args.entries, random.Random(7)))
+        for batch in range(0, len(entries), 1000):
+            repository.save_entries(entries[batch:batch + 1000]).result()
+
+        source = TimelineSource(repository)
+        source.metrics = METRICS
+        ready = []
+        source.reload(lambda page, dropped: ready.append(True))
+        while not ready:
+            Clock.tick()
+            time.sleep(0.001)
+
+        viewport = Viewport(source)
+        print(f"{args.entries} entries, fling at {args.velocity:.0f} px/s, {VIEWPORT} px viewport")
+        print(f"{'direction':<10} {'frames':>7} {'over budget':>12} {'blank':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+
+        for label, velocity in (("down", args.velocity), ("up", -args.velocity)):
+            samples, blank = fling(viewport, velocity, args.seconds)
+            over = sum(1 for sample in samples if sample > FRAME * 1000)
+            print(
+                f"{label:<10} {len(samples):>7} {over:>12} {blank:>6} {percentile(samples, 0.5):>8.3f} "
+                f"{percentile(samples, 0.95):>8.3f} {max(samples):>8.3f}"
+            )
+
+        print(f"rows in memory: {len(source.rows)} (max {source.max_rows})")
+        repository.close()
+
+
+if __name__ == "__main__":
+    main()
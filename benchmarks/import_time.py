@@ -0,0 +1,67 @@
+# Reports per-module import cost for the app's entry point, using the
+# interpreter's own -X importtime output.
+#
+#   python benchmarks/import_time.py [--module main] [--top 30] [--app-only]
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Returns [(module, self_us, cumulative_us, depth)] in import order
+def collect(module: str) -> list[tuple[str, int, int, int]]:
+    env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1], file=sys.stderr)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--app-only", action="store_true", help="only show app.* modules")
+    args = parser.parse_args()
+
+    rows = collect(args.module)
+    if not rows:
+        print("No import timings collected.")
+        return
+
+    if args.app_only:
+        rows = [row for row in rows if row[0] == "app" or row[0].startswith("app.")]
+
+    rows.sort(key=lambda row: row[2], reverse=True)
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, _ in rows[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    entry = next((row for row in rows if row[0] == args.module), None)
+    if entry:
+        print(f"\nimport {args.module}: {entry[2] / 1000:.1f} ms total")
+
+
+if __name__ == "__main__":
+    main()